@@ -0,0 +1,244 @@
+"""
+Benchmark the 502 financial analytics blocks on synthetic OHLCV data at several sizes.
+
+Record a baseline on a quiet machine, then compare later runs against it:
+
+    python -m benchmarks.analytics_502 --sizes 10x252 100x1260 500x2520 --save-baseline
+    python -m benchmarks.analytics_502 --sizes 10x252 100x1260 500x2520 --threshold 0.2
+
+Each (block, size) case runs in a fresh process, so peak RSS growth is attributable to the
+block. The run exits with status 1 when a case is slower or uses more memory than the
+baseline by more than the threshold, fails where it used to pass, or can't be compared
+because it failed in the baseline. Baselines are machine-specific and are not committed.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import runpy
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import polars as pl
+
+from benchmarks.synthetic_ohlcv import MARKET_SYMBOL, generate_ohlcv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'analytics_502.json')
+DEFAULT_SIZES = ('10x252', '100x1260')
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+# Regressions smaller than these are treated as noise regardless of the relative threshold
+MIN_SECONDS_DELTA = 0.01
+MIN_BYTES_DELTA = 8 * 1024 * 1024
+
+
+def _polars_frame(df: pl.DataFrame):
+    return df.clone()
+
+
+def _pandas_frame(df: pl.DataFrame):
+    return df.to_pandas()
+
+
+def _pandas_ticker_frame(df: pl.DataFrame):
+    return df.rename({'symbol': 'ticker'}).to_pandas()
+
+
+def _pandas_time_series(df: pl.DataFrame):
+    # time_based_analysis_502 analyzes one Date-indexed series: the market symbol's history
+    symbol = MARKET_SYMBOL if MARKET_SYMBOL in df.get_column('symbol') else df.item(0, 'symbol')
+    frame = df.filter(pl.col('symbol') == symbol).sort('date').rename({
+        'date': 'Date', 'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume',
+    })
+    return frame.to_pandas()
+
+
+# Block -> (source file, adapter turning the synthetic frame into the block's input)
+BLOCKS: Dict[str, Tuple[str, Callable[[pl.DataFrame], Any]]] = {
+    'prepare_financial_data_502': ('transformers/prepare_financial_data_502.py', _polars_frame),
+    'market_analysis_502': ('transformers/market_analysis_502.py', _polars_frame),
+    'company_comparison_502': ('transformers/company_comparison_502.py', _polars_frame),
+    'volatility_analysis_502': ('transformers/volatility_analysis_502.py', _pandas_ticker_frame),
+    'volume_analysis_502': ('transformers/volume_analysis_502.py', _pandas_frame),
+    'time_based_analysis_502': ('transformers/time_based_analysis_502.py', _pandas_time_series),
+}
+
+
+def load_block(path: str) -> Callable:
+    """
+    Execute a Mage block file outside Mage and return its decorated block function.
+    """
+    registry = []
+
+    def register(fn):
+        registry.append(fn)
+        return fn
+
+    def ignore(fn):
+        return fn
+
+    runpy.run_path(
+        os.path.join(ROOT, path),
+        init_globals=dict(
+            data_loader=register,
+            transformer=register,
+            data_exporter=register,
+            sensor=register,
+            custom=register,
+            test=ignore,
+        ),
+    )
+    if not registry:
+        raise ValueError(f'No block function found in {path}')
+    return registry[0]
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    symbols, days = size.lower().split('x')
+    return int(symbols), int(days)
+
+
+def run_case(block: str, size: str, repeat: int, seed: int) -> Dict[str, Any]:
+    """
+    Time one block at one size (best of repeat) and measure its peak RSS growth.
+    """
+    os.environ['BLOCK_METRICS_FORMAT'] = 'off'
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    path, adapter = BLOCKS[block]
+    symbols, days = parse_size(size)
+    df = generate_ohlcv(symbols, days, seed=seed)
+    result = dict(block=block, size=size, rows=df.height)
+
+    try:
+        fn = load_block(path)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+        timings = []
+        for _ in range(repeat):
+            block_input = adapter(df)
+            start = time.perf_counter()
+            fn(block_input)
+            timings.append(time.perf_counter() - start)
+            del block_input
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+    except Exception as err:
+        result.update(status='error', error=f'{type(err).__name__}: {err}'[:500])
+        return result
+
+    result.update(
+        status='ok',
+        seconds=min(timings),
+        mean_seconds=sum(timings) / len(timings),
+        peak_rss_growth_bytes=rss_after - rss_before,
+        rows_per_second=df.height / min(timings) if min(timings) > 0 else None,
+    )
+    return result
+
+
+def run(blocks: List[str], sizes: List[str], repeat: int = 3, seed: int = 42) -> List[Dict[str, Any]]:
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for size in sizes:
+        for block in blocks:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_case, (block, size, repeat, seed))
+            results.append(result)
+            if result['status'] == 'ok':
+                print(
+                    f"{block:28s} {size:>10s} {result['rows']:>9d} rows  {result['seconds']:8.3f}s  "
+                    f"{result['peak_rss_growth_bytes'] / 2 ** 20:8.1f} MiB"
+                )
+            else:
+                print(f"{block:28s} {size:>10s} {result['rows']:>9d} rows  ERROR {result['error']}")
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    threshold: float,
+    memory_threshold: float,
+) -> List[str]:
+    """
+    Return a description of every case that regressed against the baseline.
+
+    Cases that failed in the baseline can't be compared and are reported as not measured,
+    so a block that never ran doesn't pass silently.
+    """
+    expected = {(case['block'], case['size']): case for case in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        previous = expected.get((result['block'], result['size']))
+        if previous is None:
+            continue
+
+        name = f"{result['block']} @ {result['size']}"
+        if previous['status'] != 'ok':
+            if result['status'] != 'ok':
+                regressions.append(f"{name}: not measured, fails in the baseline and now ({result['error']})")
+            else:
+                regressions.append(f'{name}: not measured, failed in the baseline; save a new baseline')
+            continue
+        if result['status'] != 'ok':
+            regressions.append(f"{name}: now fails ({result['error']})")
+            continue
+
+        seconds, previous_seconds = result['seconds'], previous['seconds']
+        if seconds > previous_seconds * (1 + threshold) and seconds - previous_seconds > MIN_SECONDS_DELTA:
+            regressions.append(f'{name}: {previous_seconds:.3f}s -> {seconds:.3f}s')
+
+        memory, previous_memory = result['peak_rss_growth_bytes'], previous['peak_rss_growth_bytes']
+        if memory > previous_memory * (1 + memory_threshold) and memory - previous_memory > MIN_BYTES_DELTA:
+            regressions.append(f'{name}: {previous_memory / 2 ** 20:.1f} MiB -> {memory / 2 ** 20:.1f} MiB')
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=list(DEFAULT_SIZES), help='SYMBOLSxDAYS, e.g. 100x1260')
+    parser.add_argument('--blocks', nargs='+', default=list(BLOCKS), choices=list(BLOCKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative slowdown')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='Allowed relative memory growth')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.blocks, args.sizes, repeat=args.repeat, seed=args.seed)
+    report = dict(created_at=time.time(), python=sys.version.split()[0], polars=pl.__version__, results=results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Saved baseline to {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --save-baseline first')
+        return
+
+    with open(args.baseline) as f:
+        baseline: Optional[Dict[str, Any]] = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+    if regressions:
+        print('\nRegressions against the baseline:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+    print('\nNo regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
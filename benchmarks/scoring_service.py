@@ -0,0 +1,184 @@
+"""
+Load test for utils.scoring_service: block-mode throughput and HTTP latency under concurrency.
+
+    python -m benchmarks.scoring_service
+    python -m benchmarks.scoring_service --model-name enchanting_stasis --concurrency 32 --max-batch-size 1 64 512
+
+Uses the model tagged --model-name in the model cache when there is one, otherwise trains a
+small RandomForest pipeline on synthetic passenger rows. For every --max-batch-size the HTTP
+test runs --concurrency keep-alive clients, each sending --requests requests of
+--rows-per-request rows, and reports p50/p95/p99 latency, requests/s, rows/s and the mean
+number of rows per model call.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.model_cache import DEFAULT_MODEL_CACHE_DIR, ModelCache
+from utils.scoring_service import ScoringModel, ScoringServer, load_scoring_model, score_in_batches
+
+
+def synthetic_passengers(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Titanic-shaped rows with a learnable survival signal.
+    """
+    rng = np.random.default_rng(seed)
+    sex = rng.choice(['male', 'female'], size=rows)
+    pclass = rng.integers(1, 4, size=rows)
+    age = np.where(rng.random(rows) < 0.2, np.nan, rng.uniform(1, 80, size=rows))
+    logit = -0.5 + 1.8 * (sex == 'female') - 0.6 * (pclass - 2) - 0.01 * np.nan_to_num(age, nan=30)
+
+    return pd.DataFrame({
+        'survived': (rng.random(rows) < 1 / (1 + np.exp(-logit))).astype(int),
+        'pclass': pclass,
+        'sex': sex,
+        'age': age,
+        'fare': rng.lognormal(3, 1, size=rows),
+        'embarked': rng.choice(['S', 'C', 'Q'], size=rows, p=[0.7, 0.2, 0.1]),
+    })
+
+
+def benchmark_model(model_name: Optional[str], cache_dir: str) -> ScoringModel:
+    if model_name and ModelCache(cache_dir).resolve(model_name):
+        return load_scoring_model(model_name, cache_dir=cache_dir)
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+
+    from utils.forest_search import build_preprocessor
+
+    train = synthetic_passengers(5000)
+    model = Pipeline(steps=[
+        ('preprocessor', build_preprocessor(['pclass', 'age', 'fare'], ['sex', 'embarked'])),
+        ('classifier', RandomForestClassifier(n_estimators=100, random_state=42)),
+    ])
+    model.fit(train.drop(columns='survived'), train['survived'])
+    return ScoringModel(model, key='synthetic')
+
+
+def run_block_mode(scoring_model: ScoringModel, rows: int, batch_size: int) -> Dict[str, Any]:
+    frame = synthetic_passengers(rows, seed=7).drop(columns='survived')
+    start = time.perf_counter()
+    score_in_batches(scoring_model, frame, batch_size)
+    seconds = time.perf_counter() - start
+    return dict(rows=rows, batch_size=batch_size, seconds=seconds, rows_per_second=rows / seconds)
+
+
+def run_http(
+    scoring_model: ScoringModel,
+    concurrency: int,
+    requests: int,
+    rows_per_request: int,
+    max_batch_size: int,
+    max_latency: float,
+) -> Dict[str, Any]:
+    frame = synthetic_passengers(rows_per_request * 64, seed=11).drop(columns='survived')
+    # JSON can't carry NaN; missing values are sent as null like a real client would
+    records = json.loads(frame.to_json(orient='records'))
+    bodies = [
+        json.dumps({'instances': records[i * rows_per_request:(i + 1) * rows_per_request]}).encode('utf-8')
+        for i in range(64)
+    ]
+
+    latencies: List[float] = []
+    errors = []
+    lock = threading.Lock()
+
+    with ScoringServer(scoring_model, port=0, max_batch_size=max_batch_size, max_latency=max_latency) as server:
+        def client(index: int) -> None:
+            connection = http.client.HTTPConnection(server.host, server.port, timeout=60)
+            local = []
+            try:
+                for i in range(requests):
+                    body = bodies[(index + i) % len(bodies)]
+                    start = time.perf_counter()
+                    connection.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+                    response = connection.getresponse()
+                    payload = response.read()
+                    local.append(time.perf_counter() - start)
+                    if response.status != 200:
+                        with lock:
+                            errors.append(payload.decode('utf-8')[:200])
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(local)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        stats = dict(server.batcher.stats)
+
+    latency = np.array(latencies) * 1000
+    total_requests = len(latencies)
+    return dict(
+        max_batch_size=max_batch_size,
+        max_latency_ms=max_latency * 1000,
+        concurrency=concurrency,
+        requests=total_requests,
+        errors=len(errors),
+        seconds=seconds,
+        p50_ms=float(np.percentile(latency, 50)),
+        p95_ms=float(np.percentile(latency, 95)),
+        p99_ms=float(np.percentile(latency, 99)),
+        requests_per_second=total_requests / seconds,
+        rows_per_second=total_requests * rows_per_request / seconds,
+        mean_batch_rows=stats['rows'] / stats['batches'] if stats['batches'] else 0.0,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-name', default='enchanting_stasis')
+    parser.add_argument('--model-cache-dir', default=DEFAULT_MODEL_CACHE_DIR)
+    parser.add_argument('--block-rows', type=int, default=200_000)
+    parser.add_argument('--block-batch-size', type=int, default=50_000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per client')
+    parser.add_argument('--rows-per-request', type=int, default=1)
+    parser.add_argument('--max-batch-size', type=int, nargs='+', default=[1, 64, 512])
+    parser.add_argument('--max-latency-ms', type=float, default=5.0)
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    args = parser.parse_args()
+
+    scoring_model = benchmark_model(args.model_name, args.model_cache_dir)
+    print(f'Model {scoring_model.key}')
+
+    block = run_block_mode(scoring_model, args.block_rows, args.block_batch_size)
+    print(f"Block mode: {block['rows']} rows in {block['seconds']:.2f}s ({block['rows_per_second']:,.0f} rows/s)")
+
+    http_results = []
+    for max_batch_size in args.max_batch_size:
+        result = run_http(
+            scoring_model,
+            args.concurrency,
+            args.requests,
+            args.rows_per_request,
+            max_batch_size,
+            args.max_latency_ms / 1000,
+        )
+        http_results.append(result)
+        print(
+            f"HTTP max_batch_size={max_batch_size:<5d} p50 {result['p50_ms']:7.2f}ms  p95 {result['p95_ms']:7.2f}ms  "
+            f"p99 {result['p99_ms']:7.2f}ms  {result['requests_per_second']:8.0f} req/s  "
+            f"{result['rows_per_second']:9.0f} rows/s  {result['mean_batch_rows']:6.1f} rows/call  "
+            f"{result['errors']} errors"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'block': block, 'http': http_results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+End-to-end benchmark of the SFTP ingestion chain against an in-process SFTP server.
+
+Drives check_sftp_server_files -> sftp_files_82c -> ethereal_crucible -> galvanizing_catalyst
+with no network or containers:
+
+    python -m benchmarks.sftp_ingestion --files 10 1000 10000
+    python -m benchmarks.sftp_ingestion --files 1000 --latency-ms 5 --bandwidth-mbps 100
+
+Files are CSVs of synthetic OHLCV bars with log-uniformly distributed row counts between
+--min-rows and --max-rows. Each stage reports wall time and files, bytes and rows per second.
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import polars as pl
+
+from benchmarks.analytics_502 import load_block
+from benchmarks.sftp_server import ThrottledSFTPServer
+from benchmarks.synthetic_ohlcv import generate_ohlcv
+
+STAGES = (
+    ('check_sftp_server_files', 'sensors/check_sftp_server_files.py'),
+    ('sftp_files_82c', 'data_loaders/sftp_files_82c.py'),
+    ('ethereal_crucible', 'transformers/ethereal_crucible.py'),
+    ('galvanizing_catalyst', 'transformers/galvanizing_catalyst.py'),
+)
+
+
+def write_upload_files(directory: str, files: int, min_rows: int, max_rows: int, seed: int = 42) -> Dict[str, int]:
+    """
+    Write files CSVs into directory/upload; returns total bytes and rows written.
+    """
+    upload = os.path.join(directory, 'upload')
+    os.makedirs(upload, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    rows = np.exp(rng.uniform(math.log(min_rows), math.log(max_rows), size=files)).astype(int)
+    # One wide frame sliced per file is much faster than generating every file separately
+    source = generate_ohlcv(1, int(rows.max()), seed=seed, missing_rate=0.0, include_market=False)
+    source = source.with_columns(pl.col('date').dt.strftime('%Y-%m-%d'))
+
+    total_bytes = 0
+    for i, count in enumerate(rows):
+        symbol = f'B{i:05d}'
+        path = os.path.join(upload, f'{symbol.lower()}.csv')
+        source.head(int(count)).with_columns(pl.lit(symbol).alias('symbol')).write_csv(path)
+        total_bytes += os.path.getsize(path)
+
+    return dict(files=files, bytes=total_bytes, rows=int(rows.sum()))
+
+
+def run(
+    files: int,
+    min_rows: int,
+    max_rows: int,
+    latency: float = 0.0,
+    bandwidth: float = None,
+) -> Dict[str, Any]:
+    os.environ['BLOCK_METRICS_FORMAT'] = 'off'
+    directory = tempfile.mkdtemp(prefix='sftp_bench_')
+    try:
+        dataset = write_upload_files(directory, files, min_rows, max_rows)
+        blocks = {name: load_block(path) for name, path in STAGES}
+        baseline_path = os.path.join(directory, 'baseline.json')
+
+        with ThrottledSFTPServer(directory, latency=latency, bandwidth=bandwidth) as server:
+            os.environ.update(
+                SFTP_HOST=server.host,
+                SFTP_PORT=str(server.port),
+                SFTP_USER=server.username,
+                SFTP_PASS=server.password,
+            )
+
+            stages = []
+            output = None
+            for name, _ in STAGES:
+                fn = blocks[name]
+                connections_before = server.connections
+                start = time.perf_counter()
+                if name == 'check_sftp_server_files':
+                    if not fn():
+                        raise RuntimeError('check_sftp_server_files did not see the uploaded files')
+                elif name == 'sftp_files_82c':
+                    output = fn()
+                elif name == 'galvanizing_catalyst':
+                    fn(output, baseline_path=baseline_path, update_baseline=False)
+                else:
+                    output = fn(output)
+                seconds = time.perf_counter() - start
+
+                stages.append(dict(
+                    stage=name,
+                    seconds=seconds,
+                    files_per_second=files / seconds,
+                    megabytes_per_second=dataset['bytes'] / 2 ** 20 / seconds,
+                    rows_per_second=dataset['rows'] / seconds,
+                    connections=server.connections - connections_before,
+                ))
+
+        return dict(
+            dataset,
+            latency_seconds=latency,
+            bandwidth_bytes_per_second=bandwidth,
+            total_seconds=sum(stage['seconds'] for stage in stages),
+            stages=stages,
+        )
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--min-rows', type=int, default=20)
+    parser.add_argument('--max-rows', type=int, default=5000)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added to every SFTP request')
+    parser.add_argument('--bandwidth-mbps', type=float, help='Link bandwidth in megabits per second')
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    args = parser.parse_args()
+
+    bandwidth = args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None
+    reports: List[Dict[str, Any]] = []
+    for files in args.files:
+        report = run(files, args.min_rows, args.max_rows, latency=args.latency_ms / 1000, bandwidth=bandwidth)
+        reports.append(report)
+
+        print(f"\n{files} files, {report['bytes'] / 2 ** 20:.1f} MiB, {report['rows']} rows")
+        for stage in report['stages']:
+            print(
+                f"  {stage['stage']:24s} {stage['seconds']:8.2f}s  {stage['files_per_second']:9.1f} files/s  "
+                f"{stage['megabytes_per_second']:8.2f} MiB/s  {stage['rows_per_second']:11.0f} rows/s  "
+                f"{stage['connections']:6d} connections"
+            )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+In-process SFTP server serving a local directory, with optional latency and bandwidth limits.
+
+    with ThrottledSFTPServer('/tmp/sftp_root', latency=0.005, bandwidth=10 * 2 ** 20) as server:
+        transport = paramiko.Transport(('127.0.0.1', server.port))
+        ...
+
+Remote paths are resolved under root ('/upload/a.csv' -> root/upload/a.csv). Only the read
+side of the protocol is implemented, which is all the ingestion blocks use.
+"""
+import os
+import socket
+import threading
+import time
+from typing import List, Optional
+
+import paramiko
+
+
+class _Throttle:
+    """
+    Shared link model: a fixed per-request latency plus a bandwidth cap across all clients.
+    """
+
+    def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._lock = threading.Lock()
+        self._link_free_at = 0.0
+
+    def request(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def transfer(self, size: int) -> None:
+        if not self.bandwidth or not size:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._link_free_at)
+            self._link_free_at = start + size / self.bandwidth
+            delay = self._link_free_at - now
+        time.sleep(delay)
+
+
+class _ThrottledHandle(paramiko.SFTPHandle):
+    def __init__(self, throttle: _Throttle, flags: int = 0):
+        super().__init__(flags)
+        self.throttle = throttle
+
+    def read(self, offset, length):
+        self.throttle.request()
+        data = super().read(offset, length)
+        if isinstance(data, bytes):
+            self.throttle.transfer(len(data))
+        return data
+
+
+class _ThrottledSFTPInterface(paramiko.SFTPServerInterface):
+    def __init__(self, server, root: str, throttle: _Throttle, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = root
+        self.throttle = throttle
+
+    def _local(self, path: str) -> str:
+        return os.path.join(self.root, self.canonicalize(path).lstrip('/'))
+
+    def canonicalize(self, path):
+        return os.path.normpath('/' + path.lstrip('/')).replace(os.sep, '/')
+
+    def list_folder(self, path):
+        self.throttle.request()
+        local = self._local(path)
+        try:
+            entries = []
+            for name in os.listdir(local):
+                attrs = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(local, name)))
+                attrs.filename = name
+                entries.append(attrs)
+        except OSError as err:
+            return paramiko.SFTPServer.convert_errno(err.errno)
+        # Directory listings are transferred too
+        self.throttle.transfer(sum(len(entry.filename) + 64 for entry in entries))
+        return entries
+
+    def stat(self, path):
+        self.throttle.request()
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as err:
+            return paramiko.SFTPServer.convert_errno(err.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        self.throttle.request()
+        if flags & (os.O_WRONLY | os.O_RDWR):
+            return paramiko.sftp.SFTP_PERMISSION_DENIED
+        try:
+            f = open(self._local(path), 'rb')
+        except OSError as err:
+            return paramiko.SFTPServer.convert_errno(err.errno)
+        handle = _ThrottledHandle(self.throttle, flags)
+        handle.filename = self._local(path)
+        handle.readfile = f
+        return handle
+
+
+class _PasswordServer(paramiko.ServerInterface):
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+
+    def check_auth_password(self, username, password):
+        if username == self.username and password == self.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class ThrottledSFTPServer:
+    """
+    SFTP server on a background thread, for benchmarks and offline end-to-end runs.
+
+    Args:
+        root: Local directory served as '/'
+        username: Accepted username
+        password: Accepted password
+        latency: Seconds added to every SFTP request (one round trip)
+        bandwidth: Bytes per second shared by all transfers, or None for unlimited
+        host: Interface to listen on
+        port: Port to listen on; 0 picks a free port (see .port)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        username: str = 'bench',
+        password: str = 'bench',
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+    ):
+        self.root = root
+        self.username = username
+        self.password = password
+        self.host = host
+        self.port = port
+        self.throttle = _Throttle(latency, bandwidth)
+        self.connections = 0
+
+        # ECDSA keys are fast to generate and keep handshakes cheap
+        self._host_key = paramiko.ECDSAKey.generate()
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._transports: List[paramiko.Transport] = []
+        self._stopped = threading.Event()
+
+    def start(self) -> 'ThrottledSFTPServer':
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(128)
+        self._socket.settimeout(0.2)
+        self.port = self._socket.getsockname()[1]
+
+        self._thread = threading.Thread(target=self._serve, name='sftp-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._socket is not None:
+            self._socket.close()
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+
+    def __enter__(self) -> 'ThrottledSFTPServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _serve(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                client, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            self.connections += 1
+            self.throttle.request()
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self._host_key)
+            transport.set_subsystem_handler(
+                'sftp',
+                paramiko.SFTPServer,
+                _ThrottledSFTPInterface,
+                root=self.root,
+                throttle=self.throttle,
+            )
+            try:
+                transport.start_server(server=_PasswordServer(self.username, self.password))
+            except (paramiko.SSHException, EOFError):
+                transport.close()
+                continue
+            # Drop transports whose clients already disconnected
+            self._transports = [t for t in self._transports if t.is_active()]
+            self._transports.append(transport)
@@ -0,0 +1,122 @@
+"""
+Deterministic synthetic market data for benchmarks.
+
+    python -m benchmarks.synthetic_ohlcv --symbols 100 --days 1260 --output ohlcv.parquet
+"""
+import argparse
+from typing import Optional
+
+import numpy as np
+import polars as pl
+
+MARKET_SYMBOL = 'SPY'
+# Extra volume on the days after a burst, as a fraction of the burst
+BURST_DECAY = (1.0, 0.5, 0.25, 0.125)
+
+
+def generate_ohlcv(
+    symbols: int = 50,
+    days: int = 252,
+    seed: int = 42,
+    start: str = '2015-01-01',
+    missing_rate: float = 0.01,
+    burst_rate: float = 0.01,
+    include_market: bool = True,
+) -> pl.DataFrame:
+    """
+    Generate symbols x days of daily OHLCV bars.
+
+    Closes follow a one-factor geometric random walk (market return times a per-symbol beta
+    plus idiosyncratic noise). Volume is log-normal around a per-symbol base with decaying
+    bursts, and rises with the size of the day's move. Each (symbol, day) is dropped with
+    probability missing_rate to mimic halts and gaps in the upload files.
+
+    Args:
+        symbols: Number of symbols (excluding the market symbol)
+        days: Number of business days
+        seed: Random seed; equal arguments always give an identical frame
+        start: First business day
+        missing_rate: Probability a bar is missing
+        burst_rate: Probability a volume burst starts on a given day
+        include_market: Add a SPY series that tracks the market factor
+
+    Returns:
+        Polars DataFrame with symbol, date, open, high, low, close, volume and changepercent,
+        sorted by symbol and date
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64(start, 'D'), np.arange(days), roll='forward')
+
+    market = rng.normal(0.0003, 0.01, size=days)
+    betas = rng.uniform(0.5, 1.5, size=symbols)
+    sigmas = rng.uniform(0.01, 0.03, size=symbols)
+    noise = rng.normal(0.0, 1.0, size=(days, symbols)) * sigmas
+    returns = market[:, None] * betas + noise
+    names = [f'S{i:04d}' for i in range(symbols)]
+
+    if include_market:
+        returns = np.column_stack([returns, market])
+        sigmas = np.append(sigmas, 0.01)
+        names.append(MARKET_SYMBOL)
+
+    close = rng.uniform(10, 500, size=len(names)) * np.exp(np.cumsum(returns, axis=0))
+    previous_close = np.vstack([close[:1], close[:-1]])
+    gap = rng.normal(0.0, 1.0, size=close.shape) * sigmas / 4
+    open_ = previous_close * (1 + gap)
+    wick = np.abs(rng.normal(0.0, 1.0, size=(2,) + close.shape)) * sigmas / 2
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+
+    bursts = np.where(rng.random(close.shape) < burst_rate, rng.uniform(3, 10, size=close.shape), 0.0)
+    burst_volume = np.zeros_like(bursts)
+    for lag, weight in enumerate(BURST_DECAY):
+        burst_volume[lag:] += weight * bursts[:days - lag]
+    base_volume = rng.lognormal(13, 1, size=len(names))
+    move = np.abs(returns) / sigmas
+    volume = base_volume * (1 + burst_volume) * (1 + 0.3 * move) * rng.lognormal(0, 0.25, size=close.shape)
+
+    change_percent = np.vstack([np.full((1, len(names)), np.nan), close[1:] / close[:-1] - 1]) * 100
+    keep = rng.random(close.shape) >= missing_rate
+
+    # Column-major ravel gives symbol-major rows, i.e. sorted by symbol and then date
+    frame = pl.DataFrame({
+        'symbol': np.repeat(np.array(names), days)[keep.ravel(order='F')],
+        'date': np.tile(dates, len(names))[keep.ravel(order='F')].astype('datetime64[us]'),
+        'open': open_.ravel(order='F')[keep.ravel(order='F')],
+        'high': high.ravel(order='F')[keep.ravel(order='F')],
+        'low': low.ravel(order='F')[keep.ravel(order='F')],
+        'close': close.ravel(order='F')[keep.ravel(order='F')],
+        'volume': volume.round().astype(np.int64).ravel(order='F')[keep.ravel(order='F')],
+        'changepercent': change_percent.ravel(order='F')[keep.ravel(order='F')],
+    })
+    return frame.with_columns(pl.col('changepercent').fill_nan(None))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--days', type=int, default=252)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--missing-rate', type=float, default=0.01)
+    parser.add_argument('--burst-rate', type=float, default=0.01)
+    parser.add_argument('--output', help='Parquet or CSV path; prints a preview when omitted')
+    args = parser.parse_args()
+
+    df = generate_ohlcv(
+        args.symbols,
+        args.days,
+        seed=args.seed,
+        missing_rate=args.missing_rate,
+        burst_rate=args.burst_rate,
+    )
+    output: Optional[str] = args.output
+    if output is None:
+        print(df)
+    elif output.endswith('.csv'):
+        df.write_csv(output)
+    else:
+        df.write_parquet(output)
+
+
+if __name__ == '__main__':
+    main()
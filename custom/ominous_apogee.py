@@ -1,12 +1,22 @@
-import paramiko
-import json
+import asyncio
 import os
 
+from utils.known_files_store import KnownFilesStore
+from utils.sftp_watcher import SFTPWatcher
+
 
 @custom
 def transform_custom(*args, **kwargs):
-    hostname = "sftp"      # Use container name from docker-compose
-    port = 22              # Default SFTP port inside the container
+    """
+    Wait for new, fully uploaded files in the SFTP upload directory.
+
+    Holds one SFTP connection open and checks every watch_poll_interval seconds (default 2),
+    listing the directory only when its mtime changed. Returns as soon as new files have a
+    stable size, or an empty list after watch_timeout seconds (default 60). Processed files are
+    recorded in an indexed SQLite store, so each check only writes the new filenames.
+    """
+    hostname = os.getenv('SFTP_HOST', 'sftp')    # Container name from docker-compose
+    port = int(os.getenv('SFTP_PORT', 22))        # Default SFTP port inside the container
     username = os.getenv('SFTP_USER')
     password = os.getenv('SFTP_PASS')
 
@@ -25,28 +35,33 @@ def transform_custom(*args, **kwargs):
         'gme.csv',
     ]
 
-    path = 'known_files.json'
-    if os.path.exists(path):
-        with open(path, 'r') as f:
-            known_files.extend(json.load(f))
+    store = KnownFilesStore(kwargs.get('known_files_path', 'known_files.sqlite3'))
+    if not store.count():
+        # One-time migration from the legacy JSON list
+        store.import_json('known_files.json')
+    store.add_many(known_files)
 
-    known_files = set(known_files)
+    watcher = SFTPWatcher(
+        hostname,
+        port,
+        username,
+        password,
+        remote_dir='/upload',
+        store=store,
+        poll_interval=kwargs.get('watch_poll_interval', 2),
+        stable_checks=kwargs.get('watch_stable_checks', 2),
+    )
 
-    transport = paramiko.Transport((hostname, port))
-    transport.connect(username=username, password=password)
-    sftp = paramiko.SFTPClient.from_transport(transport)
+    async def watch():
+        try:
+            return await watcher.wait_for_new_files(timeout=kwargs.get('watch_timeout', 60))
+        finally:
+            await watcher.close()
+            store.close()
 
-    current_files = set(sftp.listdir('/upload'))
-    current_files = set([fn for fn in current_files if not fn.startswith('.')])
-    new_files = current_files - known_files
+    new_files = asyncio.run(watch())
 
     for fn in new_files:
         print(f'Here is a new file: {fn}')
 
-    sftp.close()
-    transport.close()
-
-    with open(path, 'w') as f:
-        f.write(json.dumps(list(set(list(known_files) + list(current_files)))))
-
-    return new_files
\ No newline at end of file
+    return new_files
@@ -1,27 +1,47 @@
 from mage_ai.orchestration.triggers.api import trigger_pipeline
+from utils.instrumentation import instrument
+from utils.pipeline_triggers import symbols_from_filenames, trigger_symbol_batches
+from utils.trigger_scheduler import TriggerScheduler
 if 'data_exporter' not in globals():
     from mage_ai.data_preparation.decorators import data_exporter
 
 
 @data_exporter
+@instrument(name='cosmic_nebula')
 def trigger(filenames, *args, **kwargs):
     """
     Trigger another Mage pipeline to run.
 
+    By default symbols from all new files are coalesced into trigger_shards runs (default 1)
+    that carry a 'symbols' list, skipping symbols already queued or running. Set the
+    trigger_mode variable to 'per_symbol' to trigger one run per symbol instead, with at most
+    max_concurrent_runs in flight.
+
     Documentation: https://docs.mage.ai/orchestration/triggers/trigger-pipeline
     """
-    for filename in filenames:
-        symbol = filename.split('.')[0]
-        
-        trigger_pipeline(
-            'calculate_user_account_holdings',        # Required: enter the UUID of the pipeline to trigger
-            variables={
-                'symbol': symbol,
-            },           # Optional: runtime variables for the pipeline
-            check_status=False,     # Optional: poll and check the status of the triggered pipeline
-            error_on_failure=False, # Optional: if triggered pipeline fails, raise an exception
-            poll_interval=60,       # Optional: check the status of triggered pipeline every N seconds
-            poll_timeout=None,      # Optional: raise an exception after N seconds
-            verbose=True,           # Optional: print status of triggered pipeline run
+    if kwargs.get('trigger_mode', 'batched') != 'per_symbol':
+        trigger_symbol_batches(
+            'calculate_user_account_holdings',
+            symbols_from_filenames(filenames),
+            trigger_pipeline,
+            shards=kwargs.get('trigger_shards', 1),
+            max_symbols_per_run=kwargs.get('max_symbols_per_run'),
+            dedupe_active=kwargs.get('dedupe_active_runs', True),
+            check_status=False,
+            error_on_failure=False,
+            poll_interval=60,
+            poll_timeout=None,
+            verbose=True,
         )
+        return
 
+    # One run per symbol, with at most max_concurrent_runs in flight and the rest queued
+    scheduler = TriggerScheduler(
+        'calculate_user_account_holdings',
+        max_concurrent=kwargs.get('max_concurrent_runs', 4),
+        poll_interval=kwargs.get('poll_interval', 10),
+        poll_timeout=kwargs.get('poll_timeout'),
+    )
+    scheduler.enqueue_many({'symbol': symbol} for symbol in symbols_from_filenames(filenames))
+    scheduler.run()
+    print(scheduler.metrics())
@@ -0,0 +1,79 @@
+from typing import Any
+
+from utils.instrumentation import add_metrics, instrument, span
+from utils.postgres_copy import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_CHUNK_ROWS,
+    DEFAULT_DESTINATION_CONFIG,
+    connection_factory,
+    copy_upsert,
+    load_destination_config,
+)
+
+if 'data_exporter' not in globals():
+    from mage_ai.data_preparation.decorators import data_exporter
+
+
+@data_exporter
+@instrument(name='export_stock_data_postgres')
+def export_stock_data_to_postgres(df: Any, validation_results: dict, **kwargs: Any) -> dict:
+    """
+    Bulk export the stock data to the sublime_silence PostgreSQL destination.
+
+    Rows are streamed with COPY in bounded chunks over parallel connections into an unlogged
+    staging table, then upserted into the target in one statement.
+
+    Args:
+        df: Stock data from ethereal_crucible
+        validation_results: Output of galvanizing_catalyst; a failed blocking check fails the
+            export, other failed checks are only reported
+        **kwargs: Additional keyword arguments
+            postgres_config_path: Destination YAML (default data_exporters/sublime_silence.yaml)
+            postgres_table: Target table (default stock_prices)
+            postgres_unique_columns: Upsert key (default ['symbol', 'date'])
+            copy_workers: Concurrent COPY connections (default 4)
+            copy_chunk_rows: Maximum rows per COPY chunk
+            copy_chunk_bytes: Approximate maximum size of a COPY chunk
+            blocking_checks: Validation test ids that must pass (default not_empty,
+                has_columns and <column>_not_null for each upsert key column)
+            export_on_validation_failure: Export even if a blocking check failed (default False)
+
+    Returns:
+        Export statistics
+
+    Raises:
+        ValueError: If a blocking validation check failed, so the pipeline run fails visibly
+    """
+    unique_columns = kwargs.get('postgres_unique_columns', ['symbol', 'date'])
+    validation_results = validation_results or {}
+    blocking_checks = kwargs.get(
+        'blocking_checks',
+        ['not_empty', 'has_columns'] + [f'{column}_not_null' for column in unique_columns],
+    )
+
+    failed = sorted(test_id for test_id, result in validation_results.items() if not result['success'])
+    blocking = [test_id for test_id in failed if test_id in blocking_checks]
+    if failed:
+        print(f"Failed validation checks: {', '.join(failed)}")
+    if blocking and not kwargs.get('export_on_validation_failure', False):
+        raise ValueError(f"Blocking validation checks failed, not exporting: {', '.join(blocking)}")
+
+    config = load_destination_config(kwargs.get('postgres_config_path', DEFAULT_DESTINATION_CONFIG))
+    with span('network'):
+        stats = copy_upsert(
+            df,
+            table=kwargs.get('postgres_table', 'stock_prices'),
+            unique_columns=unique_columns,
+            connect=connection_factory(config),
+            schema=config.get('schema') or 'public',
+            chunk_rows=kwargs.get('copy_chunk_rows', DEFAULT_CHUNK_ROWS),
+            chunk_bytes=kwargs.get('copy_chunk_bytes', DEFAULT_CHUNK_BYTES),
+            workers=kwargs.get('copy_workers', 4),
+        )
+
+    add_metrics(copy_seconds=stats['copy_seconds'], upsert_seconds=stats['upsert_seconds'])
+    print(
+        f"Exported {stats['rows']} rows in {stats['chunks']} chunk(s): "
+        f"COPY {stats['copy_seconds']:.2f}s, upsert {stats['upsert_seconds']:.2f}s"
+    )
+    return stats
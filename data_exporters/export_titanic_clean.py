@@ -1,11 +1,14 @@
 from mage_ai.io.file import FileIO
 from pandas import DataFrame
 
+from utils.instrumentation import instrument
+
 if 'data_exporter' not in globals():
     from mage_ai.data_preparation.decorators import data_exporter
 
 
 @data_exporter
+@instrument(name='export_titanic_clean')
 def export_data_to_file(df: DataFrame, **kwargs) -> None:
     """
     Template for exporting data to filesystem.
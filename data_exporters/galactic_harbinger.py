@@ -1,22 +1,26 @@
-from mage_ai.orchestration.triggers.api import trigger_pipeline
+from utils.instrumentation import instrument
+from utils.trigger_scheduler import TriggerScheduler
 if 'data_exporter' not in globals():
     from mage_ai.data_preparation.decorators import data_exporter
 
 
 @data_exporter
+@instrument(name='galactic_harbinger')
 def trigger(*args, **kwargs):
     """
-    Trigger another Mage pipeline to run.
+    Trigger another Mage pipeline to run and wait for it to finish.
+
+    Outstanding runs are polled with one batched status check per poll_interval
+    (runtime variable, default 60 seconds).
 
     Documentation: https://docs.mage.ai/orchestration/triggers/trigger-pipeline
     """
-
-    trigger_pipeline(
-        'calculate_user_account_holdings',        # Required: enter the UUID of the pipeline to trigger
-        variables={},           # Optional: runtime variables for the pipeline
-        check_status=True,     # Optional: poll and check the status of the triggered pipeline
-        error_on_failure=False, # Optional: if triggered pipeline fails, raise an exception
-        poll_interval=60,       # Optional: check the status of triggered pipeline every N seconds
-        poll_timeout=None,      # Optional: raise an exception after N seconds
-        verbose=True,           # Optional: print status of triggered pipeline run
-    )
\ No newline at end of file
+    scheduler = TriggerScheduler(
+        'calculate_user_account_holdings',
+        max_concurrent=kwargs.get('max_concurrent_runs', 4),
+        poll_interval=kwargs.get('poll_interval', 60),
+        poll_timeout=kwargs.get('poll_timeout'),
+    )
+    scheduler.enqueue({})
+    scheduler.run()
+    print(scheduler.metrics())
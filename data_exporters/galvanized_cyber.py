@@ -1,9 +1,12 @@
 from mage_ai.orchestration.triggers.api import trigger_pipeline
+
+from utils.instrumentation import instrument
 if 'data_exporter' not in globals():
     from mage_ai.data_preparation.decorators import data_exporter
 
 
 @data_exporter
+@instrument(name='galvanized_cyber')
 def trigger(*args, **kwargs):
     """
     Trigger another Mage pipeline to run.
@@ -1,70 +1,90 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
-from sklearn.metrics import confusion_matrix
 from typing import Dict, Tuple, Any
 
+from utils.classification_metrics import confusion_matrix, metrics_artifact
+from utils.figure_rendering import DEFAULT_FIGURE_CACHE_DIR, LazyFigure, render_figures
+from utils.instrumentation import instrument
+from utils.report_bundle import write_report_bundle
 
-@data_exporter
-def main(y_true_y_pred_proba: Tuple[np.ndarray, np.ndarray, np.ndarray], **kwargs) -> Dict[str, Any]:
-    """
-    Generate and visualize a confusion matrix with clear labels for TP, FP, TN, FN.
-    
-    Args:
-        y_true_y_pred_proba: Tuple containing (y_true, y_pred, y_pred_proba)
-    
-    Returns:
-        Dictionary containing the confusion matrix and figure
-    """
-    # Extract data from input tuple
-    y_true, y_pred, y_pred_proba = y_true_y_pred_proba
-    
-    # Calculate confusion matrix
-    cm = confusion_matrix(y_true, y_pred)
-    
-    # Create figure and axis
-    plt.figure(figsize=(10, 8))
+
+def draw_confusion_matrix(fig, cm: np.ndarray) -> None:
+    ax = fig.subplots()
     
     # Create heatmap
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=False)
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=False, ax=ax)
     
     # Add labels and title
-    plt.xlabel('Predicted Label')
-    plt.ylabel('True Label')
-    plt.title('Confusion Matrix')
+    ax.set_xlabel('Predicted Label')
+    ax.set_ylabel('True Label')
+    ax.set_title('Confusion Matrix')
     
     # Set tick labels
-    plt.xticks([0.5, 1.5], ['Negative (0)', 'Positive (1)'])
-    plt.yticks([0.5, 1.5], ['Negative (0)', 'Positive (1)'])
+    ax.set_xticks([0.5, 1.5], ['Negative (0)', 'Positive (1)'])
+    ax.set_yticks([0.5, 1.5], ['Negative (0)', 'Positive (1)'])
     
     # Add annotations for TP, FP, TN, FN
-    plt.text(1.5, 0.5, 'False Positive (FP)', 
-             horizontalalignment='center', verticalalignment='center', 
-             bbox=dict(facecolor='white', alpha=0.5))
+    for x, y, label in [
+        (1.5, 0.5, 'False Positive (FP)'),
+        (0.5, 0.5, 'True Negative (TN)'),
+        (1.5, 1.5, 'True Positive (TP)'),
+        (0.5, 1.5, 'False Negative (FN)'),
+    ]:
+        ax.text(x, y, label,
+                horizontalalignment='center', verticalalignment='center',
+                bbox=dict(facecolor='white', alpha=0.5))
     
-    plt.text(0.5, 0.5, 'True Negative (TN)', 
-             horizontalalignment='center', verticalalignment='center', 
-             bbox=dict(facecolor='white', alpha=0.5))
+    # Add explanation text
+    fig.text(0.5, 0.01, 
+             'TP: Correctly predicted positive\nFP: Incorrectly predicted positive\n'
+             'TN: Correctly predicted negative\nFN: Incorrectly predicted negative',
+             ha='center', fontsize=10, bbox=dict(facecolor='white', alpha=0.8))
     
-    plt.text(1.5, 1.5, 'True Positive (TP)', 
-             horizontalalignment='center', verticalalignment='center', 
-             bbox=dict(facecolor='white', alpha=0.5))
+    fig.tight_layout()
+
+
+@data_exporter
+@instrument(name='generate_confusion_matrix_dc2')
+def main(y_true_y_pred_proba: Tuple[np.ndarray, np.ndarray, np.ndarray], **kwargs) -> Dict[str, Any]:
+    """
+    Generate and visualize a confusion matrix with clear labels for TP, FP, TN, FN.
     
-    plt.text(0.5, 1.5, 'False Negative (FN)', 
-             horizontalalignment='center', verticalalignment='center', 
-             bbox=dict(facecolor='white', alpha=0.5))
+    Args:
+        y_true_y_pred_proba: Tuple containing (y_true, y_pred, y_pred_proba), or the
+            train_test_split_and_predict_dc2 output carrying a metrics_artifact
+        report_dir (kwarg): Optional directory to write a static HTML/PNG/Parquet report bundle to
+        render_formats (kwarg): Also return rendered bytes, e.g. ['png'] -> figure_png
+        figure_cache_dir (kwarg): Keep rendered figures here across runs (default $FIGURE_CACHE_DIR)
     
-    # Add explanation text
-    plt.figtext(0.5, 0.01, 
-                'TP: Correctly predicted positive\nFP: Incorrectly predicted positive\n'
-                'TN: Correctly predicted negative\nFN: Incorrectly predicted negative',
-                ha='center', fontsize=10, bbox=dict(facecolor='white', alpha=0.8))
+    Returns:
+        Dictionary containing the confusion matrix and a LazyFigure
+    """
+    # Confusion matrix of the hard predictions, from the shared metrics artifact
+    cm = confusion_matrix(metrics_artifact(y_true_y_pred_proba))
     
-    # Save figure
-    plt.tight_layout()
+    # Drawn headless (Agg) only when rendered, and cached by the matrix it shows
+    figure = LazyFigure(
+        'confusion_matrix',
+        draw_confusion_matrix,
+        dict(cm=cm),
+        figsize=(10, 8),
+        cache_dir=kwargs.get('figure_cache_dir', DEFAULT_FIGURE_CACHE_DIR),
+    )
     
-    # Return results
-    return {
+    results = {
         'confusion_matrix': cm,
-        'figure': plt.gcf()
-    }
\ No newline at end of file
+        'figure': figure,
+        **render_figures({'figure': figure}, kwargs.get('render_formats', ())),
+    }
+    
+    report_dir = kwargs.get('report_dir')
+    if report_dir:
+        results['report_bundle'] = write_report_bundle(
+            results,
+            report_dir,
+            inputs={'confusion_matrix': cm, 'figure': cm},
+            title='Confusion Matrix Report',
+        )
+    
+    # Return results
+    return results
\ No newline at end of file
@@ -6,8 +6,20 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from typing import Dict, List, Any
 
+from utils.correlation import (
+    block_labels,
+    blocked_matrix,
+    cluster_order,
+    correlation_matrix,
+    returns_from_prices,
+    top_k_neighbors,
+)
+from utils.instrumentation import instrument
+from utils.report_bundle import write_report_bundle
+
 
 @data_exporter
+@instrument(name='visualization_and_reporting_502')
 def main(market_analysis: pd.DataFrame, company_comparison: pd.DataFrame, 
          time_based_analysis: pd.DataFrame, volatility_analysis: pd.DataFrame, 
          volume_analysis: pd.DataFrame, **kwargs) -> Dict[str, Any]:
@@ -20,12 +32,15 @@ def main(market_analysis: pd.DataFrame, company_comparison: pd.DataFrame,
         time_based_analysis: DataFrame containing time-based analysis data
         volatility_analysis: DataFrame containing volatility analysis data
         volume_analysis: DataFrame containing volume analysis data
+        report_dir (kwarg): Optional directory to write a static HTML/PNG/Parquet report bundle to
         
     Returns:
         Dictionary containing visualizations and summary reports
     """
     # Create a dictionary to store all visualizations and reports
     results = {}
+    # Inputs each artifact is built from, used to skip unchanged sections in the report bundle
+    report_inputs = {}
     
     # 1. Interactive time series charts for price and volume
     companies = company_comparison['symbol'].unique().tolist()
@@ -60,22 +75,41 @@ def main(market_analysis: pd.DataFrame, company_comparison: pd.DataFrame,
         fig.update_yaxes(title_text="Volume", secondary_y=True)
         
         price_volume_figs[company] = fig
+        report_inputs[f'price_volume_charts/{company}'] = company_data[['date', 'close', 'volume']]
     
     results['price_volume_charts'] = price_volume_figs
     
-    # 2. Correlation heatmap
+    # 2. Correlation heatmap of daily returns, clustered so correlated companies sit together
     correlation_data = company_comparison.pivot(index='date', columns='symbol', values='close')
-    corr_matrix = correlation_data.corr()
+    correlation_returns = returns_from_prices(correlation_data.sort_index())
+    symbols = correlation_returns.columns.tolist()
+    corr_values = correlation_matrix(
+        correlation_returns.to_numpy(),
+        mode=kwargs.get('correlation_mode', 'pairwise'),
+    )
+    
+    # Large universes are block-averaged so the heatmap stays readable and light
+    display_size = kwargs.get('correlation_display_size', 200)
+    order = cluster_order(corr_values)
+    labels = block_labels(symbols, order, display_size)
+    corr_matrix = pd.DataFrame(blocked_matrix(corr_values, order, display_size), index=labels, columns=labels)
     
     # Create heatmap using Plotly
     corr_fig = px.imshow(
         corr_matrix,
-        text_auto=True,
+        text_auto=len(labels) <= 30,
         color_continuous_scale='RdBu_r',
-        title='Correlation Heatmap of Stock Prices'
+        zmin=-1,
+        zmax=1,
+        title='Correlation Heatmap of Daily Returns'
     )
     
     results['correlation_heatmap'] = corr_fig
+    results['correlation_top_neighbors'] = top_k_neighbors(
+        corr_values,
+        symbols,
+        k=kwargs.get('correlation_top_k', 10),
+    )
     
     # 3. Performance comparison heatmap
     performance_metrics = company_comparison.pivot(index='symbol', columns='metric', values='value')
@@ -134,4 +168,22 @@ def main(market_analysis: pd.DataFrame, company_comparison: pd.DataFrame,
     
     results['risk_return_chart'] = risk_return_fig
     
+    report_dir = kwargs.get('report_dir')
+    if report_dir:
+        report_inputs.update({
+            'correlation_heatmap': correlation_data,
+            'correlation_top_neighbors': correlation_data,
+            'performance_heatmap': performance_metrics,
+            'summary_table': summary_table,
+            'volatility_chart': volatility_analysis,
+            'risk_return_chart': volatility_analysis,
+            'volume_trend_chart': volume_analysis,
+        })
+        results['report_bundle'] = write_report_bundle(
+            results,
+            report_dir,
+            inputs=report_inputs,
+            title='Stock Market Analysis Report',
+        )
+    
     return results
\ No newline at end of file
@@ -1,6 +1,8 @@
 import io
 import pandas as pd
 import requests
+
+from utils.instrumentation import instrument
 if 'data_loader' not in globals():
     from mage_ai.data_preparation.decorators import data_loader
 if 'test' not in globals():
@@ -8,6 +10,7 @@ if 'test' not in globals():
 
 
 @data_loader
+@instrument(name='falling_frog')
 def load_data_from_api(*args, **kwargs):
     """
     Template for loading data from API
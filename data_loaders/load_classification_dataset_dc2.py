@@ -1,34 +1,50 @@
 import numpy as np
 import pandas as pd
-from sklearn.datasets import load_breast_cancer
 from typing import Dict, Any, Tuple
 
+from utils.dataset_cache import DEFAULT_DATASET_CACHE_DIR, load_dataset
+from utils.instrumentation import add_metrics, instrument
+
 
 @data_loader
+@instrument(name='load_classification_dataset_dc2')
 def main(**kwargs) -> Tuple[pd.DataFrame, np.ndarray]:
     """
     Load the Breast Cancer Wisconsin dataset for classification tasks.
     
+    The dataset is stored once as Parquet in the local dataset cache and memory-mapped on
+    later runs instead of being rebuilt from scikit-learn each time.
+    
+    Args:
+        **kwargs: Additional keyword arguments
+            dataset_cache_dir: Dataset cache directory (default cache/datasets, or $DATASET_CACHE_DIR)
+            offline: Never build or fetch the dataset, only read the cache (default $DATASET_OFFLINE)
+    
     Returns:
         Tuple containing:
         - DataFrame with feature data
         - Array with target labels (0 for malignant, 1 for benign)
     """
     # Load the breast cancer dataset
-    cancer = load_breast_cancer()
-    
-    # Create a DataFrame with the feature data
-    feature_names = cancer.feature_names
-    data = pd.DataFrame(cancer.data, columns=feature_names)
+    frame, manifest = load_dataset(
+        'breast_cancer',
+        backend='pandas',
+        cache_dir=kwargs.get('dataset_cache_dir', DEFAULT_DATASET_CACHE_DIR),
+        offline=kwargs.get('offline'),
+    )
+    add_metrics(dataset_cache_hit=manifest['cache_hit'])
     
-    # Get the target labels
-    target = cancer.target
+    # Split the feature data from the target labels
+    target_column = manifest['target_column']
+    data = frame.drop(columns=target_column)
+    feature_names = data.columns
+    target = frame[target_column].to_numpy()
     
     # Add information about the dataset
-    print(f"Dataset loaded: {cancer.DESCR.split('Description')[0].strip()}")
+    print(f"Dataset loaded: {manifest['description']}")
     print(f"Number of samples: {len(data)}")
     print(f"Number of features: {len(feature_names)}")
     print(f"Target distribution: {np.bincount(target)}")
-    print(f"Class names: {cancer.target_names}")
+    print(f"Class names: {np.array(manifest['target_names'])}")
     
     return data, target
\ No newline at end of file
@@ -2,8 +2,11 @@ import os
 import polars as pl
 from typing import Dict, Any, List, Optional, Union
 
+from utils.instrumentation import instrument
+
 
 @data_loader
+@instrument(name='load_stock_data_502')
 def main(dfs, **kwargs) -> pl.DataFrame:
     df = dfs['ethereal_crucible']
 
@@ -11,8 +14,12 @@ def main(dfs, **kwargs) -> pl.DataFrame:
         df = df[0]
 
     symbol = kwargs.get('symbol')
+    symbols = kwargs.get('symbols')
     
-    if symbol:
+    if symbols:
+        # Batched runs carry a list of symbols; filter once for all of them
+        df = df.filter(pl.col('symbol').is_in([s.upper() for s in symbols]))
+    elif symbol:
         symbol = symbol.upper()
         df = df.filter(pl.col('symbol') == symbol)
     
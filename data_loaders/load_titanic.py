@@ -1,8 +1,8 @@
-import io
-import pandas as pd
-import requests
 from pandas import DataFrame
 
+from utils.dataset_cache import DEFAULT_DATASET_CACHE_DIR, load_dataset
+from utils.instrumentation import add_metrics, instrument
+
 if 'data_loader' not in globals():
     from mage_ai.data_preparation.decorators import data_loader
 if 'test' not in globals():
@@ -10,14 +10,27 @@ if 'test' not in globals():
 
 
 @data_loader
+@instrument(name='load_titanic')
 def load_data_from_api(**kwargs) -> DataFrame:
     """
-    Template for loading data from API
+    Load the Titanic dataset from the local dataset cache, fetching it once if needed.
+
+    Args:
+        **kwargs: Additional keyword arguments
+            limit: Return only the first limit rows (default all)
+            dataset_cache_dir: Dataset cache directory (default cache/datasets, or $DATASET_CACHE_DIR)
+            offline: Never touch the network (default $DATASET_OFFLINE)
     """
-    country = kwargs.get('country')
-    url = f'https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv?raw=True&country={country}'
+    df, manifest = load_dataset(
+        'titanic',
+        backend='pandas',
+        cache_dir=kwargs.get('dataset_cache_dir', DEFAULT_DATASET_CACHE_DIR),
+        offline=kwargs.get('offline'),
+    )
+    add_metrics(dataset_cache_hit=manifest['cache_hit'])
 
-    return pd.read_csv(url).iloc[:10]
+    limit = kwargs.get('limit')
+    return df if limit is None else df.iloc[:limit]
 
 
 @test
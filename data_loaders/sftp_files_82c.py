@@ -5,78 +5,59 @@ import os
 import sys
 from stat import S_ISDIR
 
+from utils.instrumentation import add_metrics, instrument, span
+
 
 @data_loader
+@instrument(name='sftp_files_82c')
 def load_data(*args, **kwargs):
     # Connection details
-    hostname = "sftp"      # Use container name from docker-compose
-    port = 22              # Default SFTP port inside the container
+    hostname = os.getenv('SFTP_HOST', 'sftp')    # Container name from docker-compose
+    port = int(os.getenv('SFTP_PORT', 22))        # Default SFTP port inside the container
     username = os.getenv('SFTP_USER')
     password = os.getenv('SFTP_PASS')
     
-    # Try to list files in the user's home directory
-    print("\nListing files in home directory:")
-    home_files = list_sftp_files(
-        hostname=hostname,
-        port=port,
-        username=username,
-        password=password,
-        remote_dir="/"  # Root of the user's directory in SFTP
-    )
-    
-    if home_files:
-        print("Files available in home directory:")
-        for file_path in home_files:
-            print(f"  {file_path}")
-    
-    # Try to list files in the upload directory
-    print("\nListing files in upload directory:")
-    upload_files = list_sftp_files(
-        hostname=hostname,
-        port=port,
-        username=username,
-        password=password,
-        remote_dir="/upload"  # The mounted directory in your docker-compose
-    )
+    # List files in the upload directory
+    with span('network'):
+        upload_files = list_sftp_files(
+            hostname=hostname,
+            port=port,
+            username=username,
+            password=password,
+            remote_dir="/upload"  # The mounted directory in your docker-compose
+        )
     
     if not upload_files:
         return
     
     arr = []
-
-    print("Files available in upload directory:")
-    for file_path in upload_files:
-        print(f"  {file_path}")
     
     # Fetch contents of all files
     regular_files = [f for f in upload_files if not f.endswith('(directory)')]
     if regular_files:
-        for sample_file in regular_files:
-            print(f"\nFetching contents of {sample_file}")
-            
-            contents = fetch_sftp_file_contents(
-                hostname=hostname,
-                port=port,
-                username=username,
-                password=password,
-                remote_path=sample_file
-            )
-            
-            if contents:
-                arr.append(contents)
-                # Print first 100 bytes as a preview (if it's a text file)
-                try:
-                    preview = contents[:100].decode('utf-8')
-                    print(f"\nPreview of {sample_file}:\n{preview}...")
-                except UnicodeDecodeError:
-                    print(f"\n{sample_file} is a binary file with {len(contents)} bytes")
+        with span('network'):
+            for sample_file in regular_files:
+                contents = fetch_sftp_file_contents(
+                    hostname=hostname,
+                    port=port,
+                    username=username,
+                    password=password,
+                    remote_path=sample_file
+                )
+                
+                if contents:
+                    arr.append(contents)
     else:
         print("No files found in upload directory. You may need to add some files first.")
 
+    add_metrics(files=len(arr), bytes_fetched=sum(len(content) for content in arr))
+    print(f"Fetched {len(arr)} of {len(regular_files)} file(s) from /upload")
+
     if not arr:
         return
 
-    return pl.DataFrame([dict(content=content) for content in arr]).to_pandas()
+    with span('serialize'):
+        return pl.DataFrame([dict(content=content) for content in arr]).to_pandas()
 
 
 def fetch_sftp_file_contents(hostname, port, username, password, remote_path):
@@ -99,7 +80,6 @@ def fetch_sftp_file_contents(hostname, port, username, password, remote_path):
     ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     
     try:
-        print(f"Connecting to SFTP server {hostname}:{port} with user {username}")
         # Connect to the server
         ssh.connect(hostname, port, username, password)
         
@@ -119,11 +99,9 @@ def fetch_sftp_file_contents(hostname, port, username, password, remote_path):
             return None
         
         # Read the file contents
-        print(f"Fetching contents of {remote_path}")
         with sftp.open(remote_path, 'rb') as remote_file:
             file_contents = remote_file.read()
         
-        print(f"Successfully fetched {len(file_contents)} bytes")
         return file_contents
     
     except Exception as e:
@@ -157,7 +135,6 @@ def list_sftp_files(hostname, port, username, password, remote_dir):
     ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     
     try:
-        print(f"Connecting to SFTP server {hostname}:{port} with user {username}")
         # Connect to the server
         ssh.connect(hostname, port, username, password)
         
@@ -1,19 +1,34 @@
 import polars as pl
 from typing import Dict, Any
 
+from utils.dataset_cache import DEFAULT_DATASET_CACHE_DIR, load_dataset
+from utils.instrumentation import add_metrics, instrument
+
 
 @data_loader
+@instrument(name='titanic_data_loader')
 def load_titanic_data(**kwargs: Any) -> pl.DataFrame:
     """
     Load the public Titanic dataset and return it as a Polars DataFrame.
     
+    The CSV is fetched once and kept as Parquet in the local dataset cache; later runs
+    memory-map it without touching the network.
+    
+    Args:
+        **kwargs: Additional keyword arguments
+            url: CSV to load instead of the public Titanic file
+            dataset_cache_dir: Dataset cache directory (default cache/datasets, or $DATASET_CACHE_DIR)
+            offline: Never touch the network (default $DATASET_OFFLINE)
+    
     Returns:
         pl.DataFrame: The Titanic dataset as a Polars DataFrame.
     """
-    # Default URL for the Titanic dataset
-    url = kwargs.get('url', 'https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv')
-    
-    # Load the data into a Polars DataFrame
-    df = pl.read_csv(url)
+    df, manifest = load_dataset(
+        'titanic',
+        cache_dir=kwargs.get('dataset_cache_dir', DEFAULT_DATASET_CACHE_DIR),
+        offline=kwargs.get('offline'),
+        url=kwargs.get('url'),
+    )
+    add_metrics(dataset_cache_hit=manifest['cache_hit'])
     
     return df
\ No newline at end of file
@@ -4,8 +4,8 @@ import os
 
 @sensor
 def check_condition(*args, **kwargs) -> bool:
-    hostname = "sftp"      # Use container name from docker-compose
-    port = 22              # Default SFTP port inside the container
+    hostname = os.getenv('SFTP_HOST', 'sftp')    # Container name from docker-compose
+    port = int(os.getenv('SFTP_PORT', 22))        # Default SFTP port inside the container
     username = os.getenv('SFTP_USER')
     password = os.getenv('SFTP_PASS')
 
@@ -1,44 +1,63 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.metrics import precision_recall_curve, precision_score, recall_score
 from typing import Dict, Tuple, Any, List
 
+from utils.classification_metrics import metrics_artifact, pr_curve
+from utils.figure_rendering import (
+    DEFAULT_FIGURE_CACHE_DIR,
+    DEFAULT_MAX_CURVE_POINTS,
+    LazyFigure,
+    downsample_curve,
+    render_figures,
+)
+from utils.instrumentation import instrument, span
+from utils.threshold_sweep import OBJECTIVE_F_BETA, optimal_threshold, sweep_counts
 
-@transformer
-def main(data: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-    """
-    Analyze the impact of different classification thresholds on precision and recall.
+BUSINESS_SCENARIOS = [
+    {
+        'name': 'Fraud Detection',
+        'priority': 'High Precision',
+        'explanation': 'In fraud detection, false positives can lead to legitimate transactions being blocked, '
+                      'causing customer frustration. High precision is often prioritized to minimize false alarms, '
+                      'even if it means missing some fraud cases (lower recall).',
+        'recommended_threshold': 'Higher threshold (e.g., 0.7-0.9)'
+    },
+    {
+        'name': 'Disease Screening',
+        'priority': 'High Recall',
+        'explanation': 'For medical screening tests, it\'s often better to have false positives (which can be ruled out '
+                      'with follow-up tests) than to miss actual cases of disease. High recall is prioritized to ensure '
+                      'all potential cases are identified.',
+        'recommended_threshold': 'Lower threshold (e.g., 0.2-0.4)'
+    },
+    {
+        'name': 'Content Moderation',
+        'priority': 'Balanced Approach',
+        'explanation': 'When moderating content on platforms, there\'s a tradeoff between removing harmful content '
+                      '(requiring high recall) and not incorrectly removing legitimate content (requiring high precision). '
+                      'The optimal threshold depends on platform policies.',
+        'recommended_threshold': 'Medium threshold (e.g., 0.4-0.6)'
+    }
+]
+
+FORMULA_TEXT = """
+    Precision-Recall Tradeoff Formulas:
     
-    Args:
-         Dictionary containing model predictions and true labels
-        
-    Returns:
-        Dictionary with threshold analysis results and figures
-    """
-    # Extract data from input
-    y_true = data['y_test']
-    y_prob = data['y_prob']
+    Precision = TP / (TP + FP)
+    Recall = TP / (TP + FN)
     
-    # Calculate precision-recall curve
-    precision, recall, thresholds = precision_recall_curve(y_true, y_prob)
+    Where:
+    TP = True Positives
+    FP = False Positives
+    FN = False Negatives
     
-    # Create a range of thresholds to analyze
-    threshold_range = np.linspace(0.1, 0.9, 9)
-    threshold_metrics = []
-    
-    # Calculate precision and recall at different thresholds
-    for threshold in threshold_range:
-        y_pred = (y_prob >= threshold).astype(int)
-        prec = precision_score(y_true, y_pred)
-        rec = recall_score(y_true, y_pred)
-        threshold_metrics.append({
-            'threshold': threshold,
-            'precision': prec,
-            'recall': rec
-        })
-    
-    # Create visualization of threshold impact
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+    As threshold increases:
+    - Precision typically increases (fewer false positives)
+    - Recall typically decreases (more false negatives)
+    """
+
+
+def draw_threshold_impact(fig, recall, precision, threshold_metrics: List[Dict[str, Any]], optimal: Dict[str, float]) -> None:
+    ax1, ax2 = fig.subplots(1, 2)
     
     # Plot 1: Precision-Recall curve with thresholds
     ax1.plot(recall, precision, 'b-', linewidth=2)
@@ -55,8 +74,11 @@ def main(data: Dict[str, Any], **kwargs) -> Dict[str, Any]:
                     textcoords="offset points", 
                     xytext=(0,10), 
                     ha='center')
+    ax1.plot(optimal['recall'], optimal['precision'], 'g*', markersize=14, label=f"optimal t={optimal['threshold']:.2f}")
+    ax1.legend()
     
     # Plot 2: Precision and Recall vs Threshold
+    threshold_range = [m['threshold'] for m in threshold_metrics]
     ax2.plot(threshold_range, [m['precision'] for m in threshold_metrics], 'b-', label='Precision')
     ax2.plot(threshold_range, [m['recall'] for m in threshold_metrics], 'r-', label='Recall')
     ax2.set_xlabel('Threshold', fontsize=12)
@@ -65,57 +87,14 @@ def main(data: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     ax2.grid(True, linestyle='--', alpha=0.7)
     ax2.legend()
     
-    plt.tight_layout()
-    
-    # Add business scenario examples
-    business_scenarios = [
-        {
-            'name': 'Fraud Detection',
-            'priority': 'High Precision',
-            'explanation': 'In fraud detection, false positives can lead to legitimate transactions being blocked, '
-                          'causing customer frustration. High precision is often prioritized to minimize false alarms, '
-                          'even if it means missing some fraud cases (lower recall).',
-            'recommended_threshold': 'Higher threshold (e.g., 0.7-0.9)'
-        },
-        {
-            'name': 'Disease Screening',
-            'priority': 'High Recall',
-            'explanation': 'For medical screening tests, it\'s often better to have false positives (which can be ruled out '
-                          'with follow-up tests) than to miss actual cases of disease. High recall is prioritized to ensure '
-                          'all potential cases are identified.',
-            'recommended_threshold': 'Lower threshold (e.g., 0.2-0.4)'
-        },
-        {
-            'name': 'Content Moderation',
-            'priority': 'Balanced Approach',
-            'explanation': 'When moderating content on platforms, there\'s a tradeoff between removing harmful content '
-                          '(requiring high recall) and not incorrectly removing legitimate content (requiring high precision). '
-                          'The optimal threshold depends on platform policies.',
-            'recommended_threshold': 'Medium threshold (e.g., 0.4-0.6)'
-        }
-    ]
-    
-    # Create a second figure for formulas and explanations
-    fig2, ax = plt.subplots(figsize=(10, 6))
+    fig.tight_layout()
+
+
+def draw_tradeoff_explanation(fig, formula_text: str, business_scenarios: List[Dict[str, str]]) -> None:
+    ax = fig.subplots()
     ax.axis('off')
     
     # Add mathematical formulas and explanations
-    formula_text = """
-    Precision-Recall Tradeoff Formulas:
-    
-    Precision = TP / (TP + FP)
-    Recall = TP / (TP + FN)
-    
-    Where:
-    TP = True Positives
-    FP = False Positives
-    FN = False Negatives
-    
-    As threshold increases:
-    - Precision typically increases (fewer false positives)
-    - Recall typically decreases (more false negatives)
-    """
-    
     ax.text(0.1, 0.7, formula_text, fontsize=12, verticalalignment='top')
     
     # Add business scenarios
@@ -126,13 +105,105 @@ def main(data: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         scenario_text += f"   Recommended: {scenario['recommended_threshold']}\n\n"
     
     ax.text(0.1, 0.4, scenario_text, fontsize=12, verticalalignment='top')
+
+
+@transformer
+@instrument(name='analyze_threshold_impact_dc2')
+def main(data: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    """
+    Analyze the impact of different classification thresholds on precision and recall.
+    
+    Confusion counts at every threshold (the requested ones and every distinct score, for
+    the optimum) are lookups into the shared metrics artifact, so scores are sorted at most once.
+    
+    Args:
+        data: Dictionary containing model predictions (y_prob or y_pred_proba) and true labels
+            (y_test), or the train_test_split_and_predict_dc2 output carrying a metrics_artifact
+        **kwargs: Additional keyword arguments
+            thresholds: Thresholds to report (default 0.1, 0.2, ..., 0.9)
+            beta: Weight of recall relative to precision in F-beta (default 1.0)
+            utility_weights: Value of each of tp, fp, fn and tn (default -1 per error)
+            optimize: Objective for the optimal threshold, 'f_beta' or 'utility' (default 'f_beta')
+            max_curve_points: Points drawn on the PR curve (default 2000)
+            render_formats: Also return rendered bytes, e.g. ['png'] -> threshold_impact_png, ...
+            figure_cache_dir: Keep rendered figures here across runs (default $FIGURE_CACHE_DIR)
+        
+    Returns:
+        Dictionary with threshold analysis results and figures (LazyFigures)
+    """
+    beta = kwargs.get('beta', 1.0)
+    utility_weights = kwargs.get('utility_weights')
+    
+    # Sorted-score counts shared by all dc2 metric blocks; every threshold below is a lookup
+    with span('compute'):
+        counts = metrics_artifact(data)
+    
+    # Calculate precision-recall curve
+    precision, recall, thresholds = pr_curve(counts)
+    
+    # Create a range of thresholds to analyze
+    threshold_range = np.asarray(kwargs.get('thresholds', np.linspace(0.1, 0.9, 9)), dtype=np.float64)
+    
+    # Calculate precision, recall, F-beta and utility at the requested and at all distinct thresholds
+    with span('compute'):
+        requested = sweep_counts(counts, threshold_range, beta=beta, utility_weights=utility_weights)
+        every = sweep_counts(counts, beta=beta, utility_weights=utility_weights)
+    threshold_metrics = [
+        {
+            'threshold': float(threshold),
+            'precision': float(requested['precision'][i]),
+            'recall': float(requested['recall'][i]),
+            'f_beta': float(requested['f_beta'][i]),
+            'utility': float(requested['utility'][i]),
+            'tp': int(requested['tp'][i]),
+            'fp': int(requested['fp'][i]),
+            'fn': int(requested['fn'][i]),
+        }
+        for i, threshold in enumerate(threshold_range)
+    ]
     
-    plt.tight_layout()
+    # Best threshold over every distinct score
+    objective = kwargs.get('optimize', OBJECTIVE_F_BETA)
+    optimal = optimal_threshold(every, objective=objective)
+    print(
+        f"Optimal threshold by {objective}: {optimal['threshold']:.4f} "
+        f"(precision={optimal['precision']:.4f}, recall={optimal['recall']:.4f}, "
+        f"f_beta={optimal['f_beta']:.4f}, utility={optimal['utility']:.1f})"
+    )
+    
+    # Both figures are drawn headless (Agg) only when rendered; the explanation figure
+    # doesn't depend on the data, so it is rendered once and then served from the cache
+    max_points = kwargs.get('max_curve_points', DEFAULT_MAX_CURVE_POINTS)
+    curve_recall, curve_precision = downsample_curve(recall, precision, max_points)
+    cache_dir = kwargs.get('figure_cache_dir', DEFAULT_FIGURE_CACHE_DIR)
+    figures = {
+        'threshold_impact': LazyFigure(
+            'threshold_impact',
+            draw_threshold_impact,
+            dict(
+                recall=curve_recall,
+                precision=curve_precision,
+                threshold_metrics=threshold_metrics,
+                optimal={key: optimal[key] for key in ('threshold', 'precision', 'recall')},
+            ),
+            figsize=(16, 6),
+            cache_dir=cache_dir,
+        ),
+        'tradeoff_explanation': LazyFigure(
+            'tradeoff_explanation',
+            draw_tradeoff_explanation,
+            dict(formula_text=FORMULA_TEXT, business_scenarios=BUSINESS_SCENARIOS),
+            figsize=(10, 6),
+            cache_dir=cache_dir,
+        ),
+    }
     
     # Return results
     return {
         'threshold_metrics': threshold_metrics,
+        'optimal_threshold': optimal,
         'precision_recall_curve': (precision, recall, thresholds),
-        'business_scenarios': business_scenarios,
-        'figures': [fig, fig2]
+        'business_scenarios': BUSINESS_SCENARIOS,
+        'figures': list(figures.values()),
+        **render_figures(figures, kwargs.get('render_formats', ())),
     }
\ No newline at end of file
@@ -1,8 +1,11 @@
 import polars as pl
 from typing import Any
 
+from utils.instrumentation import instrument
+
 
 @transformer
+@instrument(name='astral_solaris')
 def transform(df: pl.DataFrame, **kwargs: Any) -> pl.DataFrame:
     """
     Lowercase all column names in the input Polars DataFrame.
@@ -13,7 +16,4 @@ def transform(df: pl.DataFrame, **kwargs: Any) -> pl.DataFrame:
     Returns:
         Polars DataFrame with lowercase column names
     """
-    for i in range():
-
-        
     return df.rename({col: col.lower() for col in df.columns})
\ No newline at end of file
@@ -3,8 +3,11 @@ import polars as pl
 import plotly.express as px
 from typing import Dict, Any
 
+from utils.instrumentation import instrument
+
 
 @transformer
+@instrument(name='company_comparison_502')
 def calculate_performance_metrics(data, **kwargs) -> Dict[str, Any]:
     """
     Calculate performance metrics for stocks and create a risk vs return visualization.
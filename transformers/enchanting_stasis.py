@@ -1,68 +1,125 @@
 import polars as pl
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
 from typing import Any
 
+from utils.feature_pipeline import infer_feature_columns
+from utils.forest_search import build_preprocessor, successive_halving_search
+from utils.instrumentation import add_metrics, instrument
+from utils.model_cache import DEFAULT_MODEL_CACHE_DIR, ModelCache, estimator_spec, model_cache_key
+
 
 @transformer
+@instrument(name='enchanting_stasis')
 def transform(df: pl.DataFrame, **kwargs: Any) -> RandomForestClassifier:
     """
     Train a scikit-learn classifier to predict survival (1 or 0).
     
+    The fitted pipeline is cached under a hash of the training data, the feature spec and
+    every hyperparameter, so reruns on unchanged inputs load it instead of refitting.
+    
     Args:
         df: Input Polars DataFrame containing the training data
+        **kwargs: Additional keyword arguments
+            model_cache_dir: Model artifact directory (default cache/models, or $MODEL_CACHE_DIR)
+            use_model_cache: Set to False to always refit (default True)
+            tune: Pick forest and preprocessing parameters by successive-halving search on the
+                training split instead of using the defaults (default False)
+            forest_grid: RandomForest parameter space for tuning (default DEFAULT_FOREST_GRID)
+            preprocess_grid: Preprocessing parameter space for tuning (default DEFAULT_PREPROCESS_GRID)
+            min_trees / max_trees: Trees per forest in the first and last round (default 25 / 400)
+            cv: Cross-validation folds during tuning (default 3)
+            n_jobs: Worker processes during tuning (default -1, every core)
+            leaderboard_path: Also write the ranked tuning leaderboard to this CSV
+            feature_engine: 'polars' (default) imputes and encodes in Polars and feeds the forest
+                a sparse matrix; 'sklearn' uses the pandas ColumnTransformer
         
     Returns:
         Trained RandomForestClassifier model
     """
-    # Convert Polars DataFrame to pandas for scikit-learn compatibility
-    pandas_df = df.to_pandas()
-    
-    # Define features and target
-    X = pandas_df.drop('survived', axis=1)
-    y = pandas_df['survived']
+    # Define features and target; with the Polars engine the frame is never converted to pandas
+    engine = kwargs.get('feature_engine', 'polars')
+    X = df.drop('survived') if engine == 'polars' else df.to_pandas().drop('survived', axis=1)
+    y = df.get_column('survived').to_numpy()
     
     # Identify numerical and categorical columns
-    numerical_cols = X.select_dtypes(include=['int64', 'float64']).columns.tolist()
-    categorical_cols = X.select_dtypes(include=['object', 'category']).columns.tolist()
+    columns = infer_feature_columns(df, target='survived')
+    numerical_cols, categorical_cols = columns['numerical_cols'], columns['categorical_cols']
     
-    # Create preprocessing pipeline
-    numerical_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='median'))
-    ])
+    split = {'test_size': 0.2, 'random_state': 42}
+    cache = ModelCache(kwargs.get('model_cache_dir', DEFAULT_MODEL_CACHE_DIR))
+    use_model_cache = kwargs.get('use_model_cache', True)
     
-    categorical_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='most_frequent')),
-        ('onehot', OneHotEncoder(handle_unknown='ignore'))
-    ])
-    
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numerical_transformer, numerical_cols),
-            ('cat', categorical_transformer, categorical_cols)
-        ])
+    # Default parameters, or the winner of a search over the training split
+    preprocess_params, forest_params = {}, {'n_estimators': 100}
+    if kwargs.get('tune', False):
+        search_config = {
+            'forest_grid': kwargs.get('forest_grid'),
+            'preprocess_grid': kwargs.get('preprocess_grid'),
+            'min_trees': kwargs.get('min_trees', 25),
+            'max_trees': kwargs.get('max_trees', 400),
+            'cv': kwargs.get('cv', 3),
+            'random_state': 42,
+            'engine': engine,
+        }
+        
+        def search():
+            X_train, _, y_train, _ = train_test_split(X, y, **split)
+            return successive_halving_search(
+                X_train, y_train, numerical_cols, categorical_cols, n_jobs=kwargs.get('n_jobs', -1), **search_config,
+            ), {}
+        
+        if use_model_cache:
+            # Search results are cached like models: same data and search space, same winner
+            search_key = model_cache_key(df, {'search': search_config, 'split': split, 'target': 'survived'})
+            results, search_metadata = cache.get_or_fit(search_key, search)
+        else:
+            results, search_metadata = search()
+        
+        leaderboard = pd.DataFrame(results['leaderboard'])
+        print(f"Successive halving: {len(leaderboard)} candidates, rounds {results['rounds']}, "
+              f"{results['search_seconds']:.1f}s{' (cached)' if search_metadata.get('cache_hit') else ''}")
+        print(leaderboard.head(10).to_string(index=False))
+        if kwargs.get('leaderboard_path'):
+            leaderboard.to_csv(kwargs['leaderboard_path'], index=False)
+        add_metrics(search_candidates=len(leaderboard), search_seconds=results['search_seconds'])
+        
+        preprocess_params, forest_params = results['best']['preprocess'], results['best']['params']
     
     # Create and train the model pipeline
     model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('classifier', RandomForestClassifier(n_estimators=100, random_state=42))
+        ('preprocessor', build_preprocessor(numerical_cols, categorical_cols, engine=engine, **preprocess_params)),
+        ('classifier', RandomForestClassifier(random_state=42, **forest_params))
     ])
     
-    # Split data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    def fit():
+        # Split data into training and testing sets
+        X_train, X_test, y_train, y_test = train_test_split(X, y, **split)
+        
+        # Train the model
+        model.fit(X_train, y_train)
+        
+        # Evaluate the model
+        y_pred = model.predict(X_test)
+        return model, {'accuracy': accuracy_score(y_test, y_pred)}
+    
+    if not use_model_cache:
+        model, metadata = fit()
+        print(f"Model accuracy: {metadata['accuracy']:.4f}")
+        return model
     
-    # Train the model
-    model.fit(X_train, y_train)
+    # Same data, columns, split and hyperparameters -> same fitted model
+    spec = {'numerical_cols': numerical_cols, 'categorical_cols': categorical_cols, 'target': 'survived', 'split': split}
+    key = model_cache_key(df, spec, estimator_spec(model))
+    model, metadata = cache.get_or_fit(key, fit)
+    cache.tag('enchanting_stasis', key)
+    add_metrics(model_cache_hit=metadata['cache_hit'])
     
-    # Evaluate the model
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    print(f"Model accuracy: {accuracy:.4f}")
+    source = 'cached model' if metadata['cache_hit'] else 'trained model'
+    print(f"Model accuracy: {metadata['accuracy']:.4f} ({source} {key[:12]})")
     
     return model
\ No newline at end of file
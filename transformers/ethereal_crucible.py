@@ -3,8 +3,11 @@ import polars as pl
 import pandas as pd
 from typing import Any
 
+from utils.instrumentation import instrument, span
+
 
 @transformer
+@instrument(name='ethereal_crucible')
 def transform_csv_content_to_dataframe(df: Any, **kwargs: Any) -> pl.DataFrame:
     """
     Transform CSV content from input dataframe into a single polars dataframe.
@@ -40,7 +43,8 @@ def transform_csv_content_to_dataframe(df: Any, **kwargs: Any) -> pl.DataFrame:
             
         try:
             # Add truncate_ragged_lines=True to handle inconsistent column counts
-            row_df = pl.read_csv(csv_io, truncate_ragged_lines=True)
+            with span('parse'):
+                row_df = pl.read_csv(csv_io, truncate_ragged_lines=True)
             
             # Add to list of dataframes
             dataframes.append(row_df)
@@ -51,7 +55,8 @@ def transform_csv_content_to_dataframe(df: Any, **kwargs: Any) -> pl.DataFrame:
     
     # Concatenate all dataframes
     if dataframes:
-        result_df = pl.concat(dataframes)
+        with span('compute'):
+            result_df = pl.concat(dataframes)
         return result_df
     else:
         # Return empty dataframe if no data
@@ -1,5 +1,7 @@
 from pandas import DataFrame
-import math
+
+from utils.instrumentation import add_metrics, instrument, span
+from utils.median_imputer import DEFAULT_SAMPLE_SIZE, MODE_EXACT, column_medians, impute_medians, load_medians, save_medians
 
 if 'transformer' not in globals():
     from mage_ai.data_preparation.decorators import transformer
@@ -10,15 +12,12 @@ def select_number_columns(df: DataFrame) -> DataFrame:
     return df[['Age', 'Fare', 'Parch', 'Pclass', 'SibSp', 'Survived']]
 
 
-def fill_missing_values_with_median(df: DataFrame) -> DataFrame:
-    for col in df.columns:
-        values = sorted(df[col].dropna().tolist())
-        median_value = values[math.floor(len(values) / 2)]
-        df[[col]] = df[[col]].fillna(median_value)
-    return df
+def fill_missing_values_with_median(df: DataFrame, mode: str = MODE_EXACT) -> DataFrame:
+    return impute_medians(df, column_medians(df, mode=mode))
 
 
 @transformer
+@instrument(name='fill_in_missing_values')
 def transform_df(df: DataFrame, *args, **kwargs) -> DataFrame:
     """
     Template code for a transformer block.
@@ -26,15 +25,41 @@ def transform_df(df: DataFrame, *args, **kwargs) -> DataFrame:
     Add more parameters to this function if this block has multiple parent blocks.
     There should be one parameter for each output variable from each parent block.
 
+    Medians come from one vectorized np.partition pass over all columns (see
+    utils.median_imputer). With medians_path set, the first run saves them and later runs
+    reuse them, so inference-time imputation doesn't scan the data at all.
+
     Args:
         df (DataFrame): Data frame from parent block.
+        **kwargs: Additional keyword arguments
+            imputation_mode: 'exact' (default) or 'approximate' (median of a random sample)
+            sample_size: Rows sampled in approximate mode (default 1,000,000)
+            medians_path: JSON file to load medians from, or to save them to if missing
+            fit_medians: Recompute and overwrite medians_path even if it exists (default False)
 
     Returns:
         DataFrame: Transformed data frame
     """
-    # Specify your transformation logic here
+    df = select_number_columns(df)
+    medians_path = kwargs.get('medians_path')
+
+    medians = None
+    if medians_path and not kwargs.get('fit_medians', False):
+        medians = load_medians(medians_path)
+    fitted = medians is None
 
-    return fill_missing_values_with_median(select_number_columns(df))
+    if fitted:
+        mode = kwargs.get('imputation_mode', MODE_EXACT)
+        with span('compute'):
+            medians = column_medians(df, mode=mode, sample_size=kwargs.get('sample_size', DEFAULT_SAMPLE_SIZE))
+        if medians_path:
+            save_medians(medians_path, medians, mode=mode, rows=len(df))
+
+    missing = int(df.isna().sum().sum())
+    impute_medians(df, medians)
+    add_metrics(imputed_values=missing, medians_fitted=fitted)
+
+    return df
 
 
 @test
@@ -1,30 +1,147 @@
 import io
+import os
 import polars as pl
 import pandas as pd
 from typing import Any
-import great_expectations as ge
-from great_expectations.dataset import PandasDataset
+
+from utils.baseline_profile import DEFAULT_BASELINE_DIR, load_baseline, save_baseline, update_baseline
+from utils.data_validation import drift_passed, profile_frame, validate_frame
+from utils.instrumentation import instrument
+
+DEFAULT_BASELINE_PATH = os.path.join(DEFAULT_BASELINE_DIR, 'galvanizing_catalyst.json')
 
 
 @transformer
+@instrument(name='galvanizing_catalyst')
 def create_great_expectations_test_suite(df: Any, **kwargs: Any) -> dict:
     """
-    Create a comprehensive test suite for a Polars DataFrame using Great Expectations.
+    Create a comprehensive test suite for a Polars DataFrame.
+    
+    By default all column statistics are computed in one native Polars pass and numeric
+    columns are checked for drift against a baseline profile persisted from previous runs.
+    Set the validation_engine variable to 'great_expectations' to run the original expectation suite.
     
     Args:
         df: Input Polars DataFrame to validate
         **kwargs: Additional keyword arguments
+            validation_engine: 'profile' (default) or 'great_expectations'
+            validation_sample: Optional row count (int) or fraction (float in (0, 1]) to validate
+            baseline_path: JSON file holding the baseline profile (default baselines/ in the project
+                root, or $BASELINE_DIR)
+            update_baseline: Merge this batch into the baseline (default True). The first
+                batch always creates it; later ones are merged only if they pass the drift
+                checks, whatever the data-quality checks (nulls, duplicates, ...) say
+            update_baseline_on_failure: Also merge batches that fail the drift checks (default False)
+        
+    Returns:
+        Dictionary containing validation results
+    """
+    if not isinstance(df, (pl.DataFrame, pd.DataFrame)):
+        raise TypeError(f"Expected pl.DataFrame or pd.DataFrame, got {type(df)}")
+    
+    if kwargs.get('validation_engine', 'profile') == 'great_expectations':
+        validation_results = run_great_expectations_suite(df)
+    else:
+        if isinstance(df, pd.DataFrame):
+            df = pl.from_pandas(df)
+        
+        baseline_path = kwargs.get('baseline_path', DEFAULT_BASELINE_PATH)
+        baseline = load_baseline(baseline_path)
+        
+        # One statistics pass feeds both the validation and the baseline update
+        profile = profile_frame(
+            df,
+            sample=kwargs.get('validation_sample'),
+            seed=kwargs.get('validation_seed', 0),
+            sketch=True,
+        )
+        validation_results = validate_frame(
+            df,
+            profile=profile,
+            baseline=baseline,
+            tolerances=kwargs.get('drift_tolerances'),
+        )
+        
+        # Data-quality failures (a null, a duplicate) say nothing about the distribution
+        merge = (
+            not baseline.get('columns')
+            or drift_passed(validation_results)
+            or kwargs.get('update_baseline_on_failure', False)
+        )
+        if kwargs.get('update_baseline', True) and merge:
+            save_baseline(update_baseline(baseline, profile), baseline_path)
+    
+    # Print human-readable validation results
+    summary = {}
+    failed_tests = []
+    
+    # Fixed: Iterate over the key-value pairs of validation_results
+    for test_id, test_details in validation_results.items():
+        test_name = test_details['expectation_config']['expectation_type']
+        column_name = test_details['expectation_config']['kwargs'].get('column', '')
+        
+        success = test_details['success']
+        summary[test_id] = "PASSED" if success else "FAILED"
+        
+        element_count = test_details.get('result', {}).get('element_count', 0)
+        
+        if success:
+            if 'not_null' in test_id or 'not_blank' in test_id:
+                test_details['details'] = {'message': f"All {element_count} {column_name} values are present"}
+            elif 'in_range' in test_id or 'not_inf' in test_id:
+                test_details['details'] = {'message': f"All {element_count} {column_name} values are in valid range"}
+            elif 'string_length' in test_id:
+                test_details['details'] = {'message': f"All {element_count} {column_name} values have valid length"}
+            elif 'has_columns' in test_id:
+                test_details['details'] = {'message': f"Dataset contains all required columns"}
+            elif 'no_duplicates' in test_id:
+                test_details['details'] = {'message': f"All {element_count} rows are unique"}
+            elif 'not_empty' in test_id:
+                test_details['details'] = {'message': f"Dataset contains {element_count} rows"}
+            elif '_stats' in test_id:
+                test_details['details'] = {'message': f"Statistical checks passed for {column_name}"}
+            else:
+                test_details['details'] = {'message': f"All {element_count} {column_name} values passed"}
+            
+            print(test_name)
+            print(f"\t{test_details['details']['message']}")
+        else:
+            failed_tests.append((test_id, test_details))
+    
+    print("\n=== DATA VALIDATION SUMMARY ===")
+    print(f"Total tests: {len(validation_results)}")
+    print(f"Passed: {list(summary.values()).count('PASSED')}")
+    print(f"Failed: {list(summary.values()).count('FAILED')}")
+    
+    if failed_tests:
+        print("\n=== FAILED TESTS DETAILS ===")
+        for test_id, test in failed_tests:
+            column_name = test['expectation_config']['kwargs'].get('column', '')
+            display_name = column_name if column_name else test_id
+            print(f"❌ {display_name}")
+            if 'unexpected_count' in test.get('result', {}):
+                print(f"   - {test['result']['unexpected_count']} invalid values found")
+    
+    return validation_results
+
+
+def run_great_expectations_suite(df: Any) -> dict:
+    """
+    Run the expectation suite through Great Expectations on a pandas copy of the data.
+    
+    Args:
+        df: Input Polars or pandas DataFrame
         
     Returns:
         Dictionary containing validation results
     """
+    from great_expectations.dataset import PandasDataset
+    
     # Convert polars DataFrame to pandas for Great Expectations compatibility
     if isinstance(df, pl.DataFrame):
         pandas_df = df.to_pandas()
-    elif isinstance(df, pd.DataFrame):
-        pandas_df = df
     else:
-        raise TypeError(f"Expected pl.DataFrame or pd.DataFrame, got {type(df)}")
+        pandas_df = df
     
     # Create Great Expectations dataset
     ge_dataset = PandasDataset(pandas_df)
@@ -119,53 +236,4 @@ def create_great_expectations_test_suite(df: Any, **kwargs: Any) -> dict:
         unique_row_count
     )
     
-    # Print human-readable validation results
-    summary = {}
-    failed_tests = []
-    
-    # Fixed: Iterate over the key-value pairs of validation_results
-    for test_id, test_details in validation_results.items():
-        test_name = test_details['expectation_config']['expectation_type']
-        column_name = test_details['expectation_config']['kwargs'].get('column', '')
-        
-        success = test_details['success']
-        summary[test_id] = "PASSED" if success else "FAILED"
-        
-        element_count = test_details.get('result', {}).get('element_count', 0)
-        
-        if success:
-            if 'not_null' in test_id or 'not_blank' in test_id:
-                test_details['details'] = {'message': f"All {element_count} {column_name} values are present"}
-            elif 'in_range' in test_id or 'not_inf' in test_id:
-                test_details['details'] = {'message': f"All {element_count} {column_name} values are in valid range"}
-            elif 'string_length' in test_id:
-                test_details['details'] = {'message': f"All {element_count} {column_name} values have valid length"}
-            elif 'has_columns' in test_id:
-                test_details['details'] = {'message': f"Dataset contains all required columns"}
-            elif 'no_duplicates' in test_id:
-                test_details['details'] = {'message': f"All {element_count} rows are unique"}
-            elif 'not_empty' in test_id:
-                test_details['details'] = {'message': f"Dataset contains {element_count} rows"}
-            elif '_stats' in test_id:
-                test_details['details'] = {'message': f"Statistical checks passed for {column_name}"}
-            
-            print(test_name)
-            print(f"\t{test_details['details']['message']}")
-        else:
-            failed_tests.append((test_id, test_details))
-    
-    print("\n=== DATA VALIDATION SUMMARY ===")
-    print(f"Total tests: {len(validation_results)}")
-    print(f"Passed: {list(summary.values()).count('PASSED')}")
-    print(f"Failed: {list(summary.values()).count('FAILED')}")
-    
-    if failed_tests:
-        print("\n=== FAILED TESTS DETAILS ===")
-        for test_id, test in failed_tests:
-            column_name = test['expectation_config']['kwargs'].get('column', '')
-            display_name = column_name if column_name else test_id
-            print(f"❌ {display_name}")
-            if 'unexpected_count' in test.get('result', {}):
-                print(f"   - {test['result']['unexpected_count']} invalid values found")
-    
-    return validation_results
\ No newline at end of file
+    return validation_results
@@ -1,8 +1,11 @@
 import pandas as pd
 from typing import Any, Dict
 
+from utils.instrumentation import instrument
+
 
 @transformer
+@instrument(name='hypnotic_catalyst')
 def lowercase_column_names(**kwargs: Dict[str, Any]) -> pd.DataFrame:
     """
     Transforms all column names in a pandas DataFrame to lowercase.
@@ -3,8 +3,11 @@ import plotly.express as px
 from typing import Dict, Any
 from plotly.subplots import make_subplots 
 
+from utils.instrumentation import instrument
+
 
 @transformer
+@instrument(name='market_analysis_502')
 def analyze_market_trends(market_data, **kwargs) -> Dict[str, Any]:
     market_data = market_data.to_pandas()
     
@@ -1,33 +1,32 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from sklearn.metrics import roc_curve, precision_recall_curve, auc, roc_auc_score, average_precision_score
 from typing import Dict, Tuple, Any
 
+from utils.classification_metrics import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_BINS,
+    MODE_AUTO,
+    average_precision,
+    error_bounds,
+    metrics_artifact,
+    pr_curve,
+    roc_auc,
+    roc_curve,
+)
+from utils.figure_rendering import (
+    DEFAULT_FIGURE_CACHE_DIR,
+    DEFAULT_MAX_CURVE_POINTS,
+    LazyFigure,
+    downsample_curve,
+    render_figures,
+)
+from utils.instrumentation import instrument
 
-@transformer
-def main(results: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-    """
-    Generate ROC and Precision-Recall curves for a classification model.
-    
-    Args:
-        results: Dictionary containing model prediction results with y_test and y_pred_proba
-        
-    Returns:
-        Dictionary with AUC scores and figure objects
-    """
-    # Extract test labels and prediction probabilities
-    y_test = results['y_test']
-    y_pred_proba = results['y_pred_proba']
-    
-    # Create figure with two subplots
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
-    
-    # Generate ROC curve
-    fpr, tpr, thresholds_roc = roc_curve(y_test, y_pred_proba)
-    roc_auc = auc(fpr, tpr)
+
+def draw_roc_and_pr_curves(fig, fpr, tpr, roc_auc_value, recall, precision, avg_precision) -> None:
+    ax1, ax2 = fig.subplots(1, 2)
     
     # Plot ROC curve
-    ax1.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (AUC = {roc_auc:.3f})')
+    ax1.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (AUC = {roc_auc_value:.3f})')
     ax1.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
     ax1.set_xlim([0.0, 1.0])
     ax1.set_ylim([0.0, 1.05])
@@ -36,10 +35,6 @@ def main(results: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     ax1.set_title('Receiver Operating Characteristic (ROC) Curve')
     ax1.legend(loc="lower right")
     
-    # Generate Precision-Recall curve
-    precision, recall, thresholds_pr = precision_recall_curve(y_test, y_pred_proba)
-    avg_precision = average_precision_score(y_test, y_pred_proba)
-    
     # Plot Precision-Recall curve
     ax2.plot(recall, precision, color='green', lw=2, label=f'PR curve (AP = {avg_precision:.3f})')
     ax2.set_xlim([0.0, 1.0])
@@ -49,10 +44,10 @@ def main(results: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     ax2.set_title('Precision-Recall Curve')
     ax2.legend(loc="lower left")
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Add explanatory text to the figure
-    plt.figtext(0.5, 0.01, """
+    fig.text(0.5, 0.01, """
     ROC Curve: Shows the tradeoff between True Positive Rate (sensitivity) and False Positive Rate (1-specificity).
     - AUC (Area Under Curve): Measures the model's ability to discriminate between classes.
     - AUC of 1.0 represents a perfect model, while 0.5 represents a random classifier.
@@ -62,11 +57,61 @@ def main(results: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     - Different thresholds prioritize either precision or recall based on business needs.
     """, ha='center', fontsize=10, bbox={"facecolor":"lightgray", "alpha":0.5, "pad":5})
     
-    plt.subplots_adjust(bottom=0.3)
+    fig.subplots_adjust(bottom=0.3)
+
+
+@transformer
+@instrument(name='plot_roc_and_pr_curves_dc2')
+def main(results: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+    """
+    Generate ROC and Precision-Recall curves for a classification model.
+    
+    Args:
+        results: Dictionary containing model prediction results with y_test and y_pred_proba.
+            Outputs too large for memory can be a dict of .npy paths (labels_path, scores_path)
+            or an iterator of (y_true, y_score) batches
+        **kwargs: Additional keyword arguments
+            evaluation_mode: 'auto', 'exact' or 'histogram' (default 'auto': exact for in-memory arrays)
+            histogram_bins: Score bins in histogram mode (default 65536)
+            batch_size: Rows per batch when streaming (default 1,000,000)
+            max_curve_points: Points drawn per curve (default 2000; the returned curve data is full)
+            render_formats: Also return rendered bytes, e.g. ['png', 'svg'] -> figure_png, figure_svg
+            figure_cache_dir: Keep rendered figures here across runs (default $FIGURE_CACHE_DIR)
+        
+    Returns:
+        Dictionary with AUC scores and a LazyFigure, drawn headless (Agg) only when rendered
+    """
+    # Sorted-score counts shared by all dc2 metric blocks; no curve below re-sorts the scores
+    artifact = metrics_artifact(
+        results,
+        mode=kwargs.get('evaluation_mode', MODE_AUTO),
+        bins=kwargs.get('histogram_bins', DEFAULT_BINS),
+        batch_size=kwargs.get('batch_size', DEFAULT_BATCH_SIZE),
+    )
+    # Histogram artifacts are approximate; report the interval the exact values lie in
+    bounds = error_bounds(artifact) if 'bins' in artifact else None
+    
+    # Generate ROC and Precision-Recall curves
+    fpr, tpr, thresholds_roc = roc_curve(artifact)
+    roc_auc_value = roc_auc(artifact)
+    precision, recall, thresholds_pr = pr_curve(artifact)
+    avg_precision = average_precision(artifact)
+    
+    # Only a bounded number of points is drawn, however many thresholds the curves have
+    max_points = kwargs.get('max_curve_points', DEFAULT_MAX_CURVE_POINTS)
+    roc_x, roc_y = downsample_curve(fpr, tpr, max_points)
+    pr_x, pr_y = downsample_curve(recall, precision, max_points)
+    figure = LazyFigure(
+        'roc_and_pr_curves',
+        draw_roc_and_pr_curves,
+        dict(fpr=roc_x, tpr=roc_y, roc_auc_value=roc_auc_value, recall=pr_x, precision=pr_y, avg_precision=avg_precision),
+        figsize=(16, 6),
+        cache_dir=kwargs.get('figure_cache_dir', DEFAULT_FIGURE_CACHE_DIR),
+    )
     
     # Create a dictionary with results
     curve_results = {
-        'roc_auc': roc_auc,
+        'roc_auc': roc_auc_value,
         'average_precision': avg_precision,
         'roc_curve_data': {
             'fpr': fpr,
@@ -78,10 +123,15 @@ def main(results: Dict[str, Any], **kwargs) -> Dict[str, Any]:
             'recall': recall,
             'thresholds': thresholds_pr
         },
-        'figure': fig
+        'figure': figure,
+        **render_figures({'figure': figure}, kwargs.get('render_formats', ())),
     }
-    
-    # Display the figure
-    plt.show()
+    if bounds is not None:
+        curve_results['error_bounds'] = bounds
+        print(
+            f"Histogram evaluation over {artifact['rows']} rows ({artifact['bins']} bins): "
+            f"AUC in [{bounds['roc_auc'][0]:.5f}, {bounds['roc_auc'][1]:.5f}], "
+            f"AP in [{bounds['average_precision'][0]:.5f}, {bounds['average_precision'][1]:.5f}]"
+        )
     
     return curve_results
\ No newline at end of file
@@ -2,9 +2,13 @@ import polars as pl
 import numpy as np
 from typing import Dict, Any
 
+from utils.dtype_compaction import DEFAULT_FLOAT32_TOLERANCE, SYMBOL_ENUM, compact_frame
+from utils.instrumentation import add_metrics, instrument
+
 
 @transformer
-def main( pl.DataFrame, **kwargs) -> pl.DataFrame:
+@instrument(name='prepare_financial_data_502')
+def main(data: pl.DataFrame, **kwargs) -> pl.DataFrame:
     # Check if data is None
     if data is None:
         print("Warning: Input data is None. Returning empty DataFrame.")
@@ -18,13 +22,9 @@ def main( pl.DataFrame, **kwargs) -> pl.DataFrame:
         pl.col('date').dt.year().alias('year'),
         pl.col('date').dt.month().alias('month'),
         pl.col('date').dt.weekday().alias('dayofweek'),
-        pl.col('date').dt.month().map_dict({
-            1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'June',
-            7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'November', 12: 'December'
-        }).alias('monthname'),
-        pl.col('date').dt.weekday().map_dict({
-            0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday', 4: 'Friday', 5: 'Saturday', 6: 'Sunday'
-        }).alias('dayname')
+        # Full English names straight from the date; compacted to calendar-ordered enums below
+        pl.col('date').dt.strftime('%B').alias('monthname'),
+        pl.col('date').dt.strftime('%A').alias('dayname')
     ])
     
     # Calculate financial metrics
@@ -52,5 +52,24 @@ def main( pl.DataFrame, **kwargs) -> pl.DataFrame:
     
     # Drop rows with missing values in essential columns
     data = data.drop_nulls(subset=['open', 'high', 'low', 'close', 'volume'])
-    
-    return data
\ No newline at end of file
+
+    # Compact dtypes once all rolling calculations have run at full precision
+    if kwargs.get('compact_dtypes', True):
+        data, report = compact_frame(
+            data,
+            float32_tolerance=kwargs.get('float32_tolerance', DEFAULT_FLOAT32_TOLERANCE),
+            symbol_dtype=kwargs.get('symbol_dtype', SYMBOL_ENUM),
+        )
+        add_metrics(
+            compact_bytes_before=report['bytes_before'],
+            compact_bytes_after=report['bytes_after'],
+            compact_bytes_saved=report['bytes_saved'],
+        )
+        print(
+            f"Compacted dtypes: {report['bytes_before'] / 2 ** 20:.1f} MiB -> {report['bytes_after'] / 2 ** 20:.1f} MiB "
+            f"({report['bytes_saved'] / 2 ** 20:.1f} MiB saved)"
+        )
+        if report['kept_float64']:
+            print(f"Kept Float64 (Float32 error above tolerance): {', '.join(report['kept_float64'])}")
+
+    return data
@@ -0,0 +1,47 @@
+import polars as pl
+from typing import Any
+
+from utils.instrumentation import add_metrics, instrument, span
+from utils.model_cache import DEFAULT_MODEL_CACHE_DIR
+from utils.scoring_service import load_scoring_model, score_in_batches
+
+if 'transformer' not in globals():
+    from mage_ai.data_preparation.decorators import transformer
+
+
+@transformer
+@instrument(name='score_with_cached_model')
+def score(df: Any, **kwargs: Any) -> pl.DataFrame:
+    """
+    Score rows with a model trained by enchanting_stasis or train_test_split_and_predict_dc2.
+
+    The model is loaded from the model cache once per process (memory-mapped) and rows are
+    scored in vectorized micro-batches, so scoring cost doesn't include any training.
+
+    Args:
+        df: Polars or pandas DataFrame of raw feature rows
+        **kwargs: Additional keyword arguments
+            model_name: Training block whose latest model to use (default 'enchanting_stasis')
+            model_key: Model cache key to use instead of the tagged model
+            model_cache_dir: Model artifact directory (default cache/models, or $MODEL_CACHE_DIR)
+            batch_size: Rows scored per predict_proba call (default 50000)
+
+    Returns:
+        Input rows as a Polars DataFrame with prediction and probability columns added
+    """
+    scoring_model = load_scoring_model(
+        kwargs.get('model_name', 'enchanting_stasis'),
+        kwargs.get('model_key'),
+        kwargs.get('model_cache_dir', DEFAULT_MODEL_CACHE_DIR),
+    )
+    frame = df if isinstance(df, pl.DataFrame) else pl.from_pandas(df)
+
+    with span('compute'):
+        result = score_in_batches(scoring_model, frame, kwargs.get('batch_size', 50_000))
+    add_metrics(model_key=scoring_model.key)
+
+    print(f'Scored {frame.height} rows with model {scoring_model.key[:12]}')
+    return frame.with_columns(
+        pl.Series('prediction', result['prediction']),
+        pl.Series('probability', result['probability']),
+    )
@@ -2,8 +2,11 @@ import pandas as pd
 import io
 from typing import Any
 
+from utils.instrumentation import instrument
+
 
 @transformer
+@instrument(name='thalassic_spectral')
 def transform_stock_data(df: pd.DataFrame, **kwargs) -> pd.DataFrame:
     """
     Transform the input dataframe to create a new dataframe with stock price information.
@@ -63,50 +66,50 @@ def transform_stock_data(df: pd.DataFrame, **kwargs) -> pd.DataFrame:
             stock_price_df = df.copy()
     else:
         # Try to extract stock price data using available columns
-                try:
-                    # Create a new DataFrame with proper column headers
-                    if len(df) > 0:
-                        # Check if the first row looks like headers
-                        first_row = df.iloc[0]
-                        if any(str(val).lower() in ['date', 'symbol', 'open', 'high', 'low', 'close', 'volume'] for val in first_row):
-                            # Use first row as headers
-                            headers = [str(val).lower() for val in first_row]
-                            stock_price_df = pd.DataFrame(df.iloc[1:].values, columns=headers)
-                            
-                            # Map standard column names
-                            column_mapping = {}
-                            required_cols = ["date", "symbol", "open", "high", "low", "close", "volume"]
-                            
-                            for col in stock_price_df.columns:
-                                if 'date' in col.lower() or 'time' in col.lower():
-                                    column_mapping[col] = 'date'
-                                elif 'symbol' in col.lower() or 'ticker' in col.lower():
-                                    column_mapping[col] = 'symbol'
-                                elif 'open' in col.lower():
-                                    column_mapping[col] = 'open'
-                                elif 'high' in col.lower():
-                                    column_mapping[col] = 'high'
-                                elif 'low' in col.lower():
-                                    column_mapping[col] = 'low'
-                                elif 'close' in col.lower() or 'last' in col.lower():
-                                    column_mapping[col] = 'close'
-                                elif 'volume' in col.lower() or 'vol' in col.lower():
-                                    column_mapping[col] = 'volume'
-                            
-                            stock_price_df = stock_price_df.rename(columns=column_mapping)
-                            
-                            # Select only the required columns if they exist
-                            available_cols = [col for col in required_cols if col in stock_price_df.columns]
-                            if available_cols:
-                                stock_price_df = stock_price_df[available_cols]
-                        else:
-                            # Use existing column names
-                            stock_price_df = df.copy()
-                    else:
-                        stock_price_df = df.copy()
-                except Exception as e:
-                    print(f"Error processing DataFrame: {e}")
-                    # Return the original DataFrame if there's an error
+        try:
+            # Create a new DataFrame with proper column headers
+            if len(df) > 0:
+                # Check if the first row looks like headers
+                first_row = df.iloc[0]
+                if any(str(val).lower() in ['date', 'symbol', 'open', 'high', 'low', 'close', 'volume'] for val in first_row):
+                    # Use first row as headers
+                    headers = [str(val).lower() for val in first_row]
+                    stock_price_df = pd.DataFrame(df.iloc[1:].values, columns=headers)
+                    
+                    # Map standard column names
+                    column_mapping = {}
+                    required_cols = ["date", "symbol", "open", "high", "low", "close", "volume"]
+                    
+                    for col in stock_price_df.columns:
+                        if 'date' in col.lower() or 'time' in col.lower():
+                            column_mapping[col] = 'date'
+                        elif 'symbol' in col.lower() or 'ticker' in col.lower():
+                            column_mapping[col] = 'symbol'
+                        elif 'open' in col.lower():
+                            column_mapping[col] = 'open'
+                        elif 'high' in col.lower():
+                            column_mapping[col] = 'high'
+                        elif 'low' in col.lower():
+                            column_mapping[col] = 'low'
+                        elif 'close' in col.lower() or 'last' in col.lower():
+                            column_mapping[col] = 'close'
+                        elif 'volume' in col.lower() or 'vol' in col.lower():
+                            column_mapping[col] = 'volume'
+                    
+                    stock_price_df = stock_price_df.rename(columns=column_mapping)
+                    
+                    # Select only the required columns if they exist
+                    available_cols = [col for col in required_cols if col in stock_price_df.columns]
+                    if available_cols:
+                        stock_price_df = stock_price_df[available_cols]
+                else:
+                    # Use existing column names
                     stock_price_df = df.copy()
+            else:
+                stock_price_df = df.copy()
+        except Exception as e:
+            print(f"Error processing DataFrame: {e}")
+            # Return the original DataFrame if there's an error
+            stock_price_df = df.copy()
             
-            return stock_price_df
\ No newline at end of file
+    return stock_price_df
\ No newline at end of file
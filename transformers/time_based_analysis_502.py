@@ -2,9 +2,12 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Any
 
+from utils.instrumentation import instrument
+
 
 @transformer
-def main( pd.DataFrame, **kwargs) -> Dict[str, Any]:
+@instrument(name='time_based_analysis_502')
+def main(data: pd.DataFrame, **kwargs) -> Dict[str, Any]:
     """
     Perform time-based analysis on financial data to identify patterns and seasonality.
     
@@ -53,8 +56,9 @@ def main( pd.DataFrame, **kwargs) -> Dict[str, Any]:
     })
     
     # Day of week analysis
-    dow_returns = df.groupby('DayOfWeek')['Close'].pct_change().mean() * 100
-    dow_volatility = df.groupby('DayOfWeek')['Close'].pct_change().std() * 100
+    daily_returns = df['Close'].pct_change()
+    dow_returns = daily_returns.groupby(df['DayOfWeek']).mean() * 100
+    dow_volatility = daily_returns.groupby(df['DayOfWeek']).std() * 100
     results['day_of_week_analysis'] = pd.DataFrame({
         'Avg Return (%)': dow_returns,
         'Volatility (%)': dow_volatility
@@ -74,11 +78,10 @@ def main( pd.DataFrame, **kwargs) -> Dict[str, Any]:
     df['Death_Cross'] = (df['MA50'] < df['MA200']) & (df['MA50'].shift(1) >= df['MA200'].shift(1))
     
     # Identify seasonal patterns
-    monthly_avg_returns = df.groupby('Month')['Close'].pct_change().mean() * 100
+    monthly_avg_returns = daily_returns.groupby(df['Month']).mean() * 100
     results['seasonal_monthly_returns'] = monthly_avg_returns
     
     # Identify anomalies (returns exceeding 2 standard deviations)
-    daily_returns = df['Close'].pct_change()
     mean_return = daily_returns.mean()
     std_return = daily_returns.std()
     df['Anomaly'] = (daily_returns > (mean_return + 2 * std_return)) | (daily_returns < (mean_return - 2 * std_return))
@@ -1,43 +1,70 @@
 import numpy as np
-import pandas as pd
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 from typing import Dict, Tuple, Any
 
+from utils.classification_metrics import ARTIFACT_KEY, build_metrics_artifact
+from utils.dataset_cache import DEFAULT_DATASET_CACHE_DIR, load_dataset
+from utils.feature_pipeline import PolarsFeatureEncoder, infer_feature_columns
+from utils.instrumentation import add_metrics, instrument
+from utils.model_cache import DEFAULT_MODEL_CACHE_DIR, ModelCache, estimator_spec, model_cache_key
+
 
 @transformer
+@instrument(name='train_test_split_and_predict_dc2')
 def main(data=None, **kwargs) -> Dict[str, Any]:
     """
     Split the dataset into training and testing sets, train a logistic regression model,
     and generate predictions.
     
     Args:
-         Input data (not used in this case as we're loading data directly)
+        data: Input data (not used in this case as we're loading data directly)
         **kwargs: Additional keyword arguments
+            model_cache_dir: Model artifact directory (default cache/models, or $MODEL_CACHE_DIR)
+            use_model_cache: Set to False to always refit (default True)
+            dataset_cache_dir: Dataset cache directory (default cache/datasets, or $DATASET_CACHE_DIR)
+            offline: Never download the dataset, only read the cache (default $DATASET_OFFLINE)
         
     Returns:
-        Dict containing X_train, X_test, y_train, y_test, y_pred, and model
+        Dict containing X_train, X_test, y_train, y_test, y_pred, y_pred_proba, model and
+        metrics_artifact (sorted-score counts the dc2 metric blocks derive everything from)
     """
-    # Load the Titanic dataset
-    data = pd.read_csv('https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv')
-    
-    # Basic preprocessing
-    data = data.drop(['Name', 'Ticket', 'Cabin', 'PassengerId'], axis=1)
-    data = pd.get_dummies(data, columns=['Sex', 'Embarked'], drop_first=True)
-    data = data.fillna(data.mean())
+    # Load the Titanic dataset (fetched once, then memory-mapped from the local dataset cache)
+    data, manifest = load_dataset(
+        'titanic',
+        cache_dir=kwargs.get('dataset_cache_dir', DEFAULT_DATASET_CACHE_DIR),
+        offline=kwargs.get('offline'),
+    )
+    add_metrics(dataset_cache_hit=manifest['cache_hit'])
     
     # Define features and target
-    X = data.drop('Survived', axis=1)
-    y = data['Survived']
+    dropped_columns, dummy_columns = ['Name', 'Ticket', 'Cabin', 'PassengerId'], ['Sex', 'Embarked']
+    X = data.drop(dropped_columns + ['Survived'])
+    y = data.get_column('Survived').to_numpy()
+    numerical_columns = infer_feature_columns(X.drop(dummy_columns))['numerical_cols']
     
     # Split the dataset
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.3, random_state=42
     )
     
-    # Train a logistic regression model
-    model = LogisticRegression(random_state=42)
-    model.fit(X_train, y_train)
+    # Mean imputation and drop-first dummies are fitted on the training rows in Polars and
+    # handed to the model as a sparse matrix; the fitted encoder travels with the model
+    model = Pipeline(steps=[
+        ('preprocessor', PolarsFeatureEncoder(numerical_columns, dummy_columns, numeric_imputer='mean', drop_first=True)),
+        ('classifier', LogisticRegression(random_state=42)),
+    ])
+    
+    # Train a logistic regression model, or load it when this data and these parameters were seen before
+    if kwargs.get('use_model_cache', True):
+        key = model_cache_key((X_train, y_train), {'features': X.columns}, estimator_spec(model))
+        cache = ModelCache(kwargs.get('model_cache_dir', DEFAULT_MODEL_CACHE_DIR))
+        model, metadata = cache.get_or_fit(key, lambda: (model.fit(X_train, y_train), {}))
+        cache.tag('train_test_split_and_predict_dc2', key)
+        add_metrics(model_cache_hit=metadata['cache_hit'])
+    else:
+        model.fit(X_train, y_train)
     
     # Generate predictions
     y_pred = model.predict(X_test)
@@ -51,5 +78,6 @@ def main(data=None, **kwargs) -> Dict[str, Any]:
         'y_test': y_test,
         'y_pred': y_pred,
         'y_pred_proba': y_pred_proba,
-        'model': model
+        'model': model,
+        ARTIFACT_KEY: build_metrics_artifact(y_test, y_pred_proba, y_pred),
     }
\ No newline at end of file
@@ -2,9 +2,13 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Any, List, Tuple
 
+from utils.instrumentation import instrument
+from utils.rolling_comoments import DEFAULT_WINDOWS, rolling_market_panels
+
 
 @transformer
-def main( pd.DataFrame, **kwargs) -> Dict[str, Any]:
+@instrument(name='volatility_analysis_502')
+def main(data: pd.DataFrame, **kwargs) -> Dict[str, Any]:
     """
     Perform volatility and risk analysis on financial data.
     
@@ -18,6 +22,7 @@ def main( pd.DataFrame, **kwargs) -> Dict[str, Any]:
     risk_free_rate = kwargs.get('risk_free_rate', 0.02)  # Annual risk-free rate
     market_index = kwargs.get('market_index', 'SPY')  # Default market index
     volatility_threshold = kwargs.get('volatility_threshold', 0.02)  # 2% daily change threshold
+    rolling_windows = kwargs.get('rolling_windows', DEFAULT_WINDOWS)  # Rolling beta/correlation windows in days
     
     # Ensure data is properly formatted
     if 'date' not in data.columns:
@@ -67,6 +72,19 @@ def main( pd.DataFrame, **kwargs) -> Dict[str, Any]:
             beta = covariance / market_variance
             beta_values[ticker] = beta
     
+    # Rolling beta and correlation vs the market index for every ticker on every date
+    rolling_betas = {}
+    rolling_correlations = {}
+    if market_index in daily_returns.columns and all_tickers:
+        panels = rolling_market_panels(
+            daily_returns[all_tickers],
+            daily_returns[market_index],
+            windows=rolling_windows,
+        )
+        for window, panel in panels.items():
+            rolling_betas[window] = panel['beta']
+            rolling_correlations[window] = panel['correlation']
+    
     # Identify periods of high volatility
     high_volatility_periods = {}
     rolling_volatility = daily_returns.rolling(window=21).std() * np.sqrt(252)  # 21-day rolling annualized volatility
@@ -110,7 +128,9 @@ def main( pd.DataFrame, **kwargs) -> Dict[str, Any]:
         'beta_values': beta_values,
         'high_volatility_periods': high_volatility_periods,
         'risk_adjusted_comparison': risk_adjusted_comparison,
-        'rolling_volatility': rolling_volatility
+        'rolling_volatility': rolling_volatility,
+        'rolling_betas': rolling_betas,
+        'rolling_correlations': rolling_correlations
     }
 
 
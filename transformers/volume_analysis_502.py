@@ -2,9 +2,13 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Any
 
+from utils.correlation import correlation_frame
+from utils.instrumentation import instrument
+
 
 @transformer
-def main(financial_ pd.DataFrame, **kwargs) -> Dict[str, Any]:
+@instrument(name='volume_analysis_502')
+def main(financial_data: pd.DataFrame, **kwargs) -> Dict[str, Any]:
     """
     Analyze trading volume patterns, identify unusual volume spikes, and calculate VWAP.
     
@@ -91,6 +95,6 @@ def main(financial_ pd.DataFrame, **kwargs) -> Dict[str, Any]:
         # Create a DataFrame with normalized volumes for all companies
         if volume_by_company:
             normalized_volumes = pd.DataFrame(volume_by_company)
-            results['cross_company_volume_correlation'] = normalized_volumes.corr()
+            results['cross_company_volume_correlation'] = correlation_frame(normalized_volumes)
     
     return results
\ No newline at end of file
@@ -0,0 +1,287 @@
+import json
+import math
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+import polars as pl
+
+# Project root (the directory holding utils/), so the default doesn't depend on the working directory
+DEFAULT_BASELINE_DIR = os.getenv(
+    'BASELINE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'baselines'),
+)
+
+# Relative accuracy of the quantile sketch: any reported quantile is within 1% of a true value
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+SKETCH_MIN_VALUE = 1e-9
+# Keeps bucket indexes for values >= SKETCH_MIN_VALUE positive, so the sign can encode negatives
+SKETCH_INDEX_OFFSET = 2000
+
+DRIFT_QUANTILES = (0.05, 0.5, 0.95)
+DEFAULT_TOLERANCES = {
+    # Allowed overshoot of the baseline min/max, as a fraction of the baseline range
+    'range': 0.1,
+    # Allowed distance of the batch mean from the baseline mean, in baseline standard deviations
+    'mean_std': 0.5,
+    # Allowed increase of the null rate over the baseline null rate (absolute)
+    'null_rate': 0.05,
+    # Allowed shift of the 5th/50th/95th percentiles, as a fraction of the baseline interquartile range
+    'quantile': 0.25,
+}
+
+
+def sketch_expressions(name: str, prefix: Optional[str] = None) -> List[pl.Expr]:
+    """
+    Aggregations that summarize a numeric column into mergeable statistics.
+
+    They are meant to be added to the single select in data_validation.profile_frame:
+    finite count, sum, sum of squares, finite min/max and a log-bucketed quantile sketch
+    (DDSketch-style: bucket i holds values in (gamma^(i-1), gamma^i]). Output names are
+    prefix + stat (default '<name>__').
+    """
+    prefix = f'{name}__' if prefix is None else prefix
+    value = pl.col(name).cast(pl.Float64)
+    finite = value.filter(value.is_finite())
+    bucket = (
+        pl.when(finite.abs() < SKETCH_MIN_VALUE)
+        .then(0)
+        .otherwise(finite.sign() * ((finite.abs().log() / math.log(SKETCH_GAMMA)).ceil() + SKETCH_INDEX_OFFSET))
+        .cast(pl.Int64)
+    )
+
+    return [
+        finite.count().alias(f'{prefix}finite_count'),
+        finite.sum().alias(f'{prefix}sum'),
+        (finite * finite).sum().alias(f'{prefix}sum_squares'),
+        finite.min().alias(f'{prefix}finite_min'),
+        finite.max().alias(f'{prefix}finite_max'),
+        bucket.alias('bucket').value_counts().implode().alias(f'{prefix}sketch'),
+    ]
+
+
+def column_summary(stats: Dict[str, Any], row_count: int) -> Dict[str, Any]:
+    """
+    Convert profile_frame column stats (collected with sketch=True) into a mergeable summary.
+    """
+    sketch = {}
+    for item in stats.get('sketch') or []:
+        key, count = list(item.values())
+        sketch[str(key)] = sketch.get(str(key), 0) + int(count)
+
+    return dict(
+        rows=row_count,
+        null_count=stats['null_count'],
+        count=stats['finite_count'],
+        sum=stats['sum'] or 0.0,
+        sum_squares=stats['sum_squares'] or 0.0,
+        min=stats['finite_min'],
+        max=stats['finite_max'],
+        sketch=sketch,
+    )
+
+
+def merge_summaries(left: Optional[Dict[str, Any]], right: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge two column summaries; the result equals the summary of the concatenated data.
+    """
+    if not left:
+        return dict(right, sketch=dict(right['sketch']))
+
+    sketch = dict(left['sketch'])
+    for key, count in right['sketch'].items():
+        sketch[key] = sketch.get(key, 0) + count
+
+    return dict(
+        rows=left['rows'] + right['rows'],
+        null_count=left['null_count'] + right['null_count'],
+        count=left['count'] + right['count'],
+        sum=left['sum'] + right['sum'],
+        sum_squares=left['sum_squares'] + right['sum_squares'],
+        min=_optional(min, left['min'], right['min']),
+        max=_optional(max, left['max'], right['max']),
+        sketch=sketch,
+    )
+
+
+def sketch_quantiles(sketch: Dict[str, int], quantiles: Iterable[float]) -> List[Optional[float]]:
+    """
+    Approximate quantiles from a sketch in O(buckets).
+    """
+    if not sketch:
+        return [None for _ in quantiles]
+
+    points = sorted((_bucket_value(int(key)), count) for key, count in sketch.items())
+    total = sum(count for _, count in points)
+
+    values = []
+    for q in quantiles:
+        rank = q * (total - 1)
+        seen = 0
+        for value, count in points:
+            seen += count
+            if seen > rank:
+                values.append(value)
+                break
+        else:
+            values.append(points[-1][0])
+
+    return values
+
+
+def summary_mean_std(summary: Dict[str, Any]):
+    count = summary['count']
+    if not count:
+        return None, None
+    mean = summary['sum'] / count
+    variance = max(summary['sum_squares'] / count - mean * mean, 0.0)
+    return mean, math.sqrt(variance)
+
+
+def update_baseline(baseline: Dict[str, Any], profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge a batch profile into the baseline.
+
+    Args:
+        baseline: Existing baseline ({'batches': int, 'columns': {name: summary}})
+        profile: Result of profile_frame(..., sketch=True)
+
+    Returns:
+        New baseline dictionary
+    """
+    columns = dict(baseline.get('columns', {}))
+    for name, stats in profile['columns'].items():
+        if stats['kind'] == 'numeric' and 'sketch' in stats:
+            columns[name] = merge_summaries(columns.get(name), column_summary(stats, profile['profiled_rows']))
+
+    return dict(batches=baseline.get('batches', 0) + 1, columns=columns)
+
+
+def compare_to_baseline(
+    summary: Optional[Dict[str, Any]],
+    stats: Dict[str, Any],
+    rows: int,
+    tolerances: Optional[Dict[str, float]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Check one numeric column of a batch against its baseline summary.
+
+    Only the already-collected batch statistics and the baseline summary are used, so the
+    cost is O(sketch buckets) per column regardless of the batch size.
+
+    Args:
+        summary: Baseline summary for the column, or None on the first run
+        stats: profile_frame column stats (collected with sketch=True)
+        rows: Number of profiled rows in the batch
+        tolerances: Overrides for DEFAULT_TOLERANCES
+
+    Returns:
+        Dictionary mapping check suffix ('in_range', 'stats', 'null_rate', 'quantiles') to
+        {'success', 'kwargs', 'result'}
+    """
+    tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    batch = column_summary(stats, rows)
+    batch_mean, _ = summary_mean_std(batch)
+
+    if not summary or not summary['count']:
+        note = dict(baseline=None, message='No baseline yet; this batch initializes it')
+        return {
+            'in_range': _check(True, dict(min_value=None, max_value=None), dict(note, observed_min=batch['min'], observed_max=batch['max'])),
+            'stats': _check(True, dict(min_value=None, max_value=None), dict(note, observed_value=batch_mean)),
+            'null_rate': _check(True, dict(max_value=None), dict(note, observed_value=_rate(batch['null_count'], rows))),
+        }
+
+    checks = {}
+
+    span = summary['max'] - summary['min']
+    low = summary['min'] - tolerances['range'] * span
+    high = summary['max'] + tolerances['range'] * span
+    in_range = batch['min'] is None or (batch['min'] >= low and batch['max'] <= high)
+    checks['in_range'] = _check(
+        in_range,
+        dict(min_value=low, max_value=high),
+        dict(observed_min=batch['min'], observed_max=batch['max']),
+    )
+
+    mean, std = summary_mean_std(summary)
+    allowed = tolerances['mean_std'] * std
+    checks['stats'] = _check(
+        batch_mean is None or abs(batch_mean - mean) <= allowed,
+        dict(min_value=mean - allowed, max_value=mean + allowed),
+        dict(observed_value=batch_mean, baseline_mean=mean, baseline_std=std),
+    )
+
+    baseline_null_rate = _rate(summary['null_count'], summary['rows'])
+    null_rate = _rate(batch['null_count'], rows)
+    checks['null_rate'] = _check(
+        null_rate <= baseline_null_rate + tolerances['null_rate'],
+        dict(max_value=baseline_null_rate + tolerances['null_rate']),
+        dict(observed_value=null_rate, baseline_value=baseline_null_rate),
+    )
+
+    if batch['sketch']:
+        p25, p75 = sketch_quantiles(summary['sketch'], (0.25, 0.75))
+        scale = (p75 - p25) or abs(mean) or 1.0
+        expected = sketch_quantiles(summary['sketch'], DRIFT_QUANTILES)
+        observed = sketch_quantiles(batch['sketch'], DRIFT_QUANTILES)
+        shifts = [abs(o - e) / scale for o, e in zip(observed, expected)]
+        checks['quantiles'] = _check(
+            max(shifts) <= tolerances['quantile'],
+            dict(quantiles=list(DRIFT_QUANTILES), max_shift=tolerances['quantile']),
+            dict(observed_value=observed, baseline_value=expected, shift=shifts),
+        )
+
+    return checks
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(baseline: Dict[str, Any], path: str) -> None:
+    """
+    Write the baseline atomically so a crash never leaves a truncated file behind.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # A unique temporary file per writer, so concurrent runs never replace each other's partial file
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp', dir=directory or '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(baseline, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _bucket_value(key: int) -> float:
+    if key == 0:
+        return 0.0
+    index = abs(key) - SKETCH_INDEX_OFFSET
+    value = 2 * SKETCH_GAMMA ** index / (SKETCH_GAMMA + 1)
+    return value if key > 0 else -value
+
+
+def _check(success: bool, kwargs: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(success=bool(success), kwargs=kwargs, result=result)
+
+
+def _rate(count: int, total: int) -> float:
+    return count / total if total else 0.0
+
+
+def _optional(fn, a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return fn(a, b)
@@ -0,0 +1,359 @@
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.threshold_sweep import counts_at, cumulative_counts, precision_recall_curve
+
+ARTIFACT_KEY = 'metrics_artifact'
+DEFAULT_THRESHOLD = 0.5
+
+MODE_AUTO = 'auto'
+MODE_EXACT = 'exact'
+MODE_HISTOGRAM = 'histogram'
+
+# 2**16 bins keep AUC/AP within ~1e-4 of exact on typical score distributions in 1 MiB
+DEFAULT_BINS = 65_536
+DEFAULT_BATCH_SIZE = 1_000_000
+
+
+def build_metrics_artifact(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    y_pred: Optional[np.ndarray] = None,
+    sample_weight: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Summarize one model output into the sorted-score counts every dc2 metric is derived from.
+
+    Scores are sorted once (see threshold_sweep.cumulative_counts). The hard predictions'
+    confusion matrix costs one extra bincount pass; without y_pred it is read off the counts
+    at a 0.5 threshold. The artifact holds O(distinct scores) values, not O(n).
+
+    Args:
+        y_true: Binary true labels (1 is positive)
+        y_score: Predicted probabilities of the positive class
+        y_pred: Hard predictions; derived from y_score >= 0.5 when None
+        sample_weight: Optional per-sample weights
+
+    Returns:
+        Dictionary with thresholds, tp, fp, positives and negatives (cumulative_counts) plus
+        confusion, the 2x2 [[tn, fp], [fn, tp]] matrix of the hard predictions
+    """
+    artifact = cumulative_counts(y_true, y_score, sample_weight=sample_weight)
+
+    if y_pred is None:
+        at = counts_at(artifact, [DEFAULT_THRESHOLD])
+        confusion = np.array([[at['tn'][0], at['fp'][0]], [at['fn'][0], at['tp'][0]]])
+    else:
+        cells = 2 * (np.asarray(y_true).ravel() == 1) + (np.asarray(y_pred).ravel() == 1)
+        weights = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float64).ravel()
+        confusion = np.bincount(cells, weights=weights, minlength=4).reshape(2, 2)
+
+    artifact['confusion'] = confusion
+    return artifact
+
+
+class HistogramAccumulator:
+    """
+    Fixed-resolution score histograms per class, fed one (labels, scores) batch at a time.
+
+    Memory is O(bins) however many rows stream through. Thresholds are the bin edges, so
+    confusion counts at an edge are exact; only the order of rows inside a bin is lost,
+    which error_bounds turns into a guaranteed interval for AUC and AP.
+
+        accumulator = HistogramAccumulator()
+        for y_true, y_score in batches:
+            accumulator.update(y_true, y_score)
+        artifact = accumulator.artifact()
+
+    Args:
+        bins: Number of equal-width score bins
+        score_range: (low, high) range of the scores; values outside are clipped into it
+    """
+
+    def __init__(self, bins: int = DEFAULT_BINS, score_range: Tuple[float, float] = (0.0, 1.0)):
+        if bins < 1:
+            raise ValueError(f'bins must be positive, got {bins}')
+        self.bins = bins
+        self.low, self.high = map(float, score_range)
+        self.positive = np.zeros(bins, dtype=np.float64)
+        self.negative = np.zeros(bins, dtype=np.float64)
+        self.confusion = np.zeros(4, dtype=np.float64)
+        self.has_predictions = False
+        self.rows = 0
+
+    def update(
+        self,
+        y_true: np.ndarray,
+        y_score: np.ndarray,
+        y_pred: Optional[np.ndarray] = None,
+        sample_weight: Optional[np.ndarray] = None,
+    ) -> None:
+        positive = np.asarray(y_true).ravel() == 1
+        score = np.asarray(y_score, dtype=np.float64).ravel()
+        weight = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float64).ravel()
+
+        index = ((score - self.low) * (self.bins / (self.high - self.low))).astype(np.int64)
+        np.clip(index, 0, self.bins - 1, out=index)
+        # One bincount over (class, bin) pairs instead of one per class
+        counts = np.bincount(index + positive * self.bins, weights=weight, minlength=2 * self.bins)
+        self.negative += counts[:self.bins]
+        self.positive += counts[self.bins:]
+
+        if y_pred is not None:
+            cells = 2 * positive + (np.asarray(y_pred).ravel() == 1)
+            self.confusion += np.bincount(cells, weights=weight, minlength=4)
+            self.has_predictions = True
+        self.rows += score.size
+
+    def artifact(self) -> Dict[str, Any]:
+        """
+        Metrics artifact over the accumulated histograms, usable with every function here.
+        """
+        occupied = np.flatnonzero((self.positive + self.negative) > 0)[::-1]
+        edges = self.low + (self.high - self.low) * occupied / self.bins
+        tp = np.cumsum(self.positive[occupied])
+        fp = np.cumsum(self.negative[occupied])
+        if np.all(self.positive == np.round(self.positive)) and np.all(self.negative == np.round(self.negative)):
+            tp, fp = tp.astype(np.int64), fp.astype(np.int64)
+
+        artifact = dict(
+            thresholds=edges,
+            tp=tp,
+            fp=fp,
+            positives=tp[-1] if tp.size else 0,
+            negatives=fp[-1] if fp.size else 0,
+            bins=self.bins,
+            rows=self.rows,
+        )
+        if self.has_predictions:
+            artifact['confusion'] = self.confusion.astype(tp.dtype).reshape(2, 2)
+        else:
+            at = counts_at(artifact, [DEFAULT_THRESHOLD])
+            artifact['confusion'] = np.array([[at['tn'][0], at['fp'][0]], [at['fn'][0], at['tp'][0]]])
+        return artifact
+
+
+def iter_batches(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    y_pred: Optional[np.ndarray] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Tuple[np.ndarray, ...]]:
+    """
+    Slice (possibly memory-mapped) arrays into (y_true, y_score[, y_pred]) batches.
+    """
+    for start in range(0, len(y_score), batch_size):
+        stop = start + batch_size
+        if y_pred is None:
+            yield np.asarray(y_true[start:stop]), np.asarray(y_score[start:stop])
+        else:
+            yield np.asarray(y_true[start:stop]), np.asarray(y_score[start:stop]), np.asarray(y_pred[start:stop])
+
+
+def load_memmaps(labels_path: str, scores_path: str, predictions_path: Optional[str] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Open .npy label, score and (optionally) prediction files memory-mapped, without reading them.
+    """
+    arrays = [np.load(labels_path, mmap_mode='r'), np.load(scores_path, mmap_mode='r')]
+    if predictions_path:
+        arrays.append(np.load(predictions_path, mmap_mode='r'))
+    if len({len(array) for array in arrays}) != 1:
+        raise ValueError(f'Label, score and prediction files have different lengths: {[len(a) for a in arrays]}')
+    return tuple(arrays)
+
+
+def evaluate_stream(
+    batches: Iterable[Sequence[np.ndarray]],
+    bins: int = DEFAULT_BINS,
+    score_range: Tuple[float, float] = (0.0, 1.0),
+) -> Dict[str, Any]:
+    """
+    Histogram metrics artifact from (y_true, y_score[, y_pred[, sample_weight]]) batches.
+    """
+    accumulator = HistogramAccumulator(bins=bins, score_range=score_range)
+    for batch in batches:
+        accumulator.update(*batch)
+    return accumulator.artifact()
+
+
+def metrics_artifact(
+    data: Any,
+    mode: str = MODE_AUTO,
+    bins: int = DEFAULT_BINS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Return the metrics artifact attached to a dc2 block input, building it if it's missing.
+
+    Accepts the shapes the dc2 blocks receive: the train_test_split_and_predict_dc2 output
+    dict (y_test, y_pred, y_pred_proba or y_prob), a (X_train, X_test, y_train, y_test,
+    y_pred, y_pred_proba) tuple, a (y_true, y_pred, y_pred_proba) tuple, or an artifact.
+    For outputs too large for memory it also accepts a dict of .npy paths (labels_path,
+    scores_path, optional predictions_path) or an iterator of (y_true, y_score[, y_pred])
+    batches.
+
+    Modes:
+        exact: Sort every score (build_metrics_artifact); needs the arrays in memory.
+        histogram: Stream through HistogramAccumulator in O(bins) memory; curves, AUC and AP
+            are approximate (see error_bounds).
+        auto: exact for in-memory arrays, histogram for memory-mapped files and iterators.
+
+    Args:
+        data: Upstream block output
+        mode: 'auto', 'exact' or 'histogram'
+        bins: Histogram resolution
+        batch_size: Rows per batch when streaming over arrays or memory-mapped files
+
+    Returns:
+        Metrics artifact (see build_metrics_artifact)
+    """
+    if mode not in (MODE_AUTO, MODE_EXACT, MODE_HISTOGRAM):
+        raise ValueError(f"mode must be '{MODE_AUTO}', '{MODE_EXACT}' or '{MODE_HISTOGRAM}', got {mode!r}")
+
+    if isinstance(data, dict) and 'confusion' in data and 'thresholds' in data:
+        return data
+    if isinstance(data, dict) and data.get(ARTIFACT_KEY) is not None and mode != MODE_HISTOGRAM:
+        return data[ARTIFACT_KEY]
+
+    if isinstance(data, dict) and 'scores_path' in data:
+        arrays = load_memmaps(data['labels_path'], data['scores_path'], data.get('predictions_path'))
+        if mode == MODE_EXACT:
+            return build_metrics_artifact(arrays[0], arrays[1], *arrays[2:])
+        return evaluate_stream(iter_batches(*arrays, batch_size=batch_size), bins=bins)
+
+    if isinstance(data, dict):
+        y_true = data['y_test']
+        y_score = data['y_pred_proba'] if 'y_pred_proba' in data else data['y_prob']
+        y_pred = data.get('y_pred')
+    elif isinstance(data, (tuple, list)):
+        if len(data) == 6:
+            _, _, _, y_true, y_pred, y_score = data
+        elif len(data) == 3:
+            y_true, y_pred, y_score = data
+        else:
+            raise ValueError(f'Expected a 3- or 6-tuple of model outputs, got {len(data)} items')
+    elif isinstance(data, Iterator):
+        if mode == MODE_EXACT:
+            batches = [tuple(np.asarray(array) for array in batch) for batch in data]
+            y_true, y_score, *rest = (np.concatenate(arrays) for arrays in zip(*batches))
+            return build_metrics_artifact(y_true, y_score, *rest[:1])
+        return evaluate_stream(data, bins=bins)
+    else:
+        raise TypeError(f'Cannot derive classification metrics from {type(data).__name__}')
+
+    if mode == MODE_HISTOGRAM or (mode == MODE_AUTO and isinstance(y_score, np.memmap)):
+        return evaluate_stream(iter_batches(y_true, y_score, y_pred, batch_size=batch_size), bins=bins)
+    return build_metrics_artifact(y_true, y_score, y_pred)
+
+
+def confusion_matrix(artifact: Dict[str, Any]) -> np.ndarray:
+    """
+    sklearn.metrics.confusion_matrix of the hard predictions: [[tn, fp], [fn, tp]].
+    """
+    return artifact['confusion']
+
+
+def classification_scores(artifact: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Accuracy, precision, recall and F1 of the hard predictions (zero_division=0).
+    """
+    (tn, fp), (fn, tp) = artifact['confusion'].astype(np.float64).tolist()
+    total = tn + fp + fn + tp
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+
+    return {
+        'accuracy': (tp + tn) / total if total else 0.0,
+        'precision': precision,
+        'recall': recall,
+        'f1_score': 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0,
+    }
+
+
+def roc_curve(artifact: Dict[str, Any], drop_intermediate: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    sklearn.metrics.roc_curve from the artifact: (fpr, tpr, thresholds).
+    """
+    tp, fp, thresholds = artifact['tp'], artifact['fp'], artifact['thresholds']
+
+    if drop_intermediate and len(tp) > 2:
+        # Keep only the corners; points on a straight segment add nothing to the curve
+        keep = np.flatnonzero(np.r_[True, np.logical_or(np.diff(fp, 2), np.diff(tp, 2)), True])
+        tp, fp, thresholds = tp[keep], fp[keep], thresholds[keep]
+
+    tp = np.r_[0, tp].astype(np.float64)
+    fp = np.r_[0, fp].astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fpr = fp / fp[-1] if fp[-1] > 0 else np.full_like(fp, np.nan)
+        tpr = tp / tp[-1] if tp[-1] > 0 else np.full_like(tp, np.nan)
+
+    return fpr, tpr, np.r_[np.inf, thresholds]
+
+
+def roc_auc(artifact: Dict[str, Any]) -> float:
+    """
+    Area under the ROC curve (sklearn.metrics.roc_auc_score for binary labels).
+    """
+    if not artifact['positives'] or not artifact['negatives']:
+        raise ValueError('ROC AUC is undefined when only one class is present in y_true')
+    fpr, tpr, _ = roc_curve(artifact, drop_intermediate=False)
+    return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2)
+
+
+def pr_curve(artifact: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    sklearn.metrics.precision_recall_curve from the artifact: (precision, recall, thresholds).
+    """
+    curve = precision_recall_curve(artifact)
+    return curve['precision'], curve['recall'], curve['thresholds']
+
+
+def average_precision(artifact: Dict[str, Any]) -> float:
+    """
+    sklearn.metrics.average_precision_score: sum over thresholds of (R_n - R_n-1) * P_n.
+    """
+    precision, recall, _ = pr_curve(artifact)
+    return float(-np.sum(np.diff(recall) * precision[:-1]))
+
+
+def error_bounds(artifact: Dict[str, Any]) -> Dict[str, Tuple[float, float]]:
+    """
+    Interval guaranteed to contain the exact AUC and AP, whatever the order inside each bin.
+
+    A histogram artifact loses the order of rows that share a bin (an exact artifact only
+    that of tied scores). AUC is bounded by ranking each bin's positives entirely above or
+    below its negatives, AP likewise, using the closed form
+    sum_{k=1..p} (a + k) / (c + k) = p - (c - a) * (digamma(c + p + 1) - digamma(c + 1)).
+
+    Returns:
+        Dictionary with roc_auc and average_precision (low, high) tuples
+    """
+    from scipy.special import digamma
+
+    tp, fp = artifact['tp'].astype(np.float64), artifact['fp'].astype(np.float64)
+    positives, negatives = float(artifact['positives']), float(artifact['negatives'])
+    if not positives or not negatives:
+        raise ValueError('AUC and AP bounds are undefined when only one class is present in y_true')
+
+    p = np.diff(np.r_[0.0, tp])
+    n = np.diff(np.r_[0.0, fp])
+    above_tp, above_fp = tp - p, fp - n
+
+    estimate = roc_auc(artifact)
+    slack = float(np.sum(p * n)) / (2 * positives * negatives)
+
+    def precision_sum(k: np.ndarray, a: np.ndarray, c: np.ndarray) -> np.ndarray:
+        # Sum of the precisions seen as k positives are ranked one by one after c rows (a positive)
+        return k - (c - a) * (digamma(c + k + 1) - digamma(c + 1))
+
+    has_positives = p > 0
+    k, a, f, q = p[has_positives], above_tp[has_positives], above_fp[has_positives], n[has_positives]
+    # Best case ranks a bin's positives before its negatives, worst case after them
+    best = float(np.sum(precision_sum(k, a, a + f))) / positives
+    worst = float(np.sum(precision_sum(k, a, a + f + q))) / positives
+
+    return {
+        'roc_auc': (max(estimate - slack, 0.0), min(estimate + slack, 1.0)),
+        'average_precision': (worst, best),
+    }
@@ -0,0 +1,97 @@
+import hashlib
+import json
+from typing import Any
+
+
+def content_hash(*parts: Any) -> str:
+    """
+    Compute a stable SHA-256 hex digest over one or more inputs.
+
+    DataFrames (pandas or polars), NumPy arrays, bytes, strings and JSON-serializable
+    containers are hashed by content, so two runs over identical data produce the same key.
+
+    Args:
+        *parts: Objects to include in the hash, in order
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+def _update(digest, obj: Any) -> None:
+    digest.update(type(obj).__name__.encode('utf-8'))
+
+    if obj is None:
+        digest.update(b'None')
+        return
+
+    if isinstance(obj, bytes):
+        digest.update(obj)
+        return
+
+    if isinstance(obj, str):
+        digest.update(obj.encode('utf-8'))
+        return
+
+    module = type(obj).__module__.split('.')[0]
+
+    if module == 'polars':
+        import polars as pl
+
+        if isinstance(obj, pl.DataFrame):
+            digest.update(json.dumps([(name, str(dtype)) for name, dtype in obj.schema.items()]).encode('utf-8'))
+            digest.update(obj.hash_rows(seed=0).to_numpy().tobytes())
+            return
+        if isinstance(obj, pl.Series):
+            digest.update(f'{obj.name}:{obj.dtype}'.encode('utf-8'))
+            digest.update(obj.hash(seed=0).to_numpy().tobytes())
+            return
+
+    if module == 'pandas':
+        import pandas as pd
+
+        if isinstance(obj, pd.DataFrame):
+            digest.update(json.dumps([(str(c), str(t)) for c, t in obj.dtypes.items()]).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+            return
+        if isinstance(obj, (pd.Series, pd.Index)):
+            digest.update(f'{obj.name}:{obj.dtype}'.encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+            return
+
+    if module == 'numpy':
+        import numpy as np
+
+        if isinstance(obj, np.ndarray):
+            digest.update(f'{obj.dtype.str}:{obj.shape}'.encode('utf-8'))
+            if obj.dtype.hasobject:
+                digest.update(repr(obj.tolist()).encode('utf-8'))
+            else:
+                digest.update(np.ascontiguousarray(obj).tobytes())
+            return
+
+    if isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            _update(digest, str(key))
+            _update(digest, obj[key])
+        return
+
+    if isinstance(obj, (list, tuple)):
+        digest.update(str(len(obj)).encode('utf-8'))
+        for item in obj:
+            _update(digest, item)
+        return
+
+    if isinstance(obj, (set, frozenset)):
+        _update(digest, sorted(obj, key=repr))
+        return
+
+    if hasattr(obj, 'to_plotly_json'):
+        digest.update(obj.to_json().encode('utf-8'))
+        return
+
+    digest.update(json.dumps(obj, sort_keys=True, default=repr).encode('utf-8'))
@@ -0,0 +1,321 @@
+from typing import Any, Dict, Optional, Union
+
+import polars as pl
+
+from utils.baseline_profile import compare_to_baseline, sketch_expressions
+
+FINITE_BOUND = 1e308
+
+
+def profile_frame(
+    df: pl.DataFrame,
+    sample: Optional[Union[int, float]] = None,
+    seed: int = 0,
+    sketch: bool = False,
+) -> Dict[str, Any]:
+    """
+    Compute per-column statistics for a Polars DataFrame in a single native pass.
+
+    All aggregations are collected into one select, so Polars scans each column once
+    (in parallel across columns) instead of once per expectation.
+
+    Args:
+        df: Frame to profile
+        sample: Optional number of rows (int) or fraction (float in (0, 1]) to profile instead of the full frame
+        seed: Random seed for sampling
+        sketch: Also collect mergeable sums and quantile sketches for numeric columns (see baseline_profile)
+
+    Returns:
+        Dictionary with row_count, profiled_rows, sampled, duplicate_count and per-column stats
+    """
+    row_count = df.height
+    profiled = _sample(df, sample, seed)
+
+    expressions = []
+    if profiled.width:
+        expressions.append(pl.struct(pl.all()).hash(seed=0).n_unique().alias('__unique_rows__'))
+
+    # Aliases are '<column index>::<stat>'; column names can't be used as prefixes because
+    # a column 'a' would also match the stats of a column 'a__b'
+    kinds = {}
+    for index, (name, dtype) in enumerate(profiled.schema.items()):
+        kind = _column_kind(dtype)
+        kinds[name] = kind
+        col = pl.col(name)
+        prefix = f'{index}::'
+
+        expressions.append(col.null_count().alias(f'{prefix}null_count'))
+
+        if kind == 'numeric':
+            expressions.extend([
+                col.min().cast(pl.Float64).alias(f'{prefix}min'),
+                col.max().cast(pl.Float64).alias(f'{prefix}max'),
+                col.mean().cast(pl.Float64).alias(f'{prefix}mean'),
+            ])
+            if dtype.is_float():
+                expressions.extend([
+                    col.is_infinite().sum().alias(f'{prefix}inf_count'),
+                    col.is_nan().sum().alias(f'{prefix}nan_count'),
+                ])
+            if sketch:
+                expressions.extend(sketch_expressions(name, prefix))
+        elif kind == 'temporal':
+            expressions.extend([
+                col.min().cast(pl.Utf8).alias(f'{prefix}min'),
+                col.max().cast(pl.Utf8).alias(f'{prefix}max'),
+            ])
+        elif kind == 'string':
+            lengths = col.cast(pl.Utf8).str.len_chars()
+            expressions.extend([
+                lengths.min().alias(f'{prefix}min_length'),
+                lengths.max().alias(f'{prefix}max_length'),
+                (col.cast(pl.Utf8).str.strip_chars().str.len_chars() == 0).sum().alias(f'{prefix}blank_count'),
+            ])
+
+    row = profiled.select(expressions).row(0, named=True) if expressions else {}
+
+    stats_by_index: Dict[int, Dict[str, Any]] = {}
+    for key, value in row.items():
+        if '::' in key:
+            index, stat = key.split('::', 1)
+            stats_by_index.setdefault(int(index), {})[stat] = value
+
+    columns = {}
+    for index, (name, kind) in enumerate(kinds.items()):
+        stats = stats_by_index.get(index, {})
+        stats['kind'] = kind
+        stats['dtype'] = str(profiled.schema[name])
+        stats.setdefault('inf_count', 0)
+        stats.setdefault('nan_count', 0)
+        columns[name] = stats
+
+    profiled_rows = profiled.height
+    unique_rows = row.get('__unique_rows__', profiled_rows)
+
+    return dict(
+        row_count=row_count,
+        column_count=df.width,
+        profiled_rows=profiled_rows,
+        sampled=profiled_rows != row_count,
+        duplicate_count=profiled_rows - unique_rows,
+        columns=columns,
+    )
+
+
+def validate_frame(
+    df: Any,
+    sample: Optional[Union[int, float]] = None,
+    seed: int = 0,
+    profile: Optional[Dict[str, Any]] = None,
+    baseline: Optional[Dict[str, Any]] = None,
+    tolerances: Optional[Dict[str, float]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Validate a DataFrame from a single statistics pass.
+
+    Produces the same test ids and result shape as the Great Expectations suite in
+    galvanizing_catalyst ('success', 'expectation_config' and 'result'), so existing
+    summaries keep working.
+
+    Without a baseline, range and mean bounds come from the batch itself (as before). With a
+    baseline (see baseline_profile), numeric columns are checked for drift against previous
+    runs instead, and null-rate and quantile checks are added.
+
+    Args:
+        df: Polars or pandas DataFrame
+        sample: Optional number of rows (int) or fraction (float in (0, 1]) to validate
+        seed: Random seed for sampling
+        profile: Precomputed result of profile_frame, to avoid a second pass
+        baseline: Persisted baseline profile; an empty dict means this is the first run
+        tolerances: Drift tolerance overrides, see baseline_profile.DEFAULT_TOLERANCES
+
+    Returns:
+        Dictionary mapping test id to result
+    """
+    if not isinstance(df, pl.DataFrame):
+        df = pl.from_pandas(df)
+    if profile is None:
+        profile = profile_frame(df, sample=sample, seed=seed, sketch=baseline is not None)
+
+    rows = profile['profiled_rows']
+    results = {}
+
+    drift = {}
+    if baseline is not None:
+        for column, stats in profile['columns'].items():
+            if stats['kind'] == 'numeric':
+                drift[column] = compare_to_baseline(
+                    baseline.get('columns', {}).get(column), stats, rows, tolerances=tolerances,
+                )
+
+    results['not_empty'] = _result(
+        'expect_table_row_count_to_be_between',
+        profile['row_count'] >= 1,
+        dict(min_value=1, max_value=None),
+        dict(observed_value=profile['row_count'], element_count=profile['row_count']),
+    )
+    results['has_columns'] = _result(
+        'expect_table_column_count_to_be_between',
+        profile['column_count'] >= 1,
+        dict(min_value=1, max_value=None),
+        dict(observed_value=profile['column_count']),
+    )
+
+    for column, stats in profile['columns'].items():
+        kind = stats['kind']
+
+        results[f'{column}_not_null'] = _unexpected_result(
+            'expect_column_values_to_not_be_null', column, rows, stats['null_count'],
+        )
+
+        if kind == 'numeric':
+            if column in drift:
+                results[f'{column}_in_range'] = _drift_result(
+                    'expect_column_values_to_be_between', column, rows, drift[column]['in_range'],
+                )
+            else:
+                results[f'{column}_in_range'] = _result(
+                    'expect_column_values_to_be_between',
+                    True,
+                    dict(column=column, min_value=stats['min'], max_value=stats['max']),
+                    dict(element_count=rows, unexpected_count=0, observed_min=stats['min'], observed_max=stats['max']),
+                )
+            results[f'{column}_not_inf'] = _unexpected_result(
+                'expect_column_values_to_be_between', column, rows, stats['inf_count'],
+                min_value=-FINITE_BOUND, max_value=FINITE_BOUND,
+            )
+        elif kind == 'temporal':
+            results[f'{column}_valid_dates'] = _unexpected_result(
+                'expect_column_values_to_be_dateutil_parseable', column, rows, 0,
+            )
+        elif kind == 'boolean':
+            results[f'{column}_boolean'] = _unexpected_result(
+                'expect_column_values_to_be_in_set', column, rows, 0, value_set=[True, False, 0, 1],
+            )
+        elif kind == 'string':
+            results[f'{column}_not_blank'] = _unexpected_result(
+                'expect_column_values_to_not_be_null', column, rows, stats['null_count'] + stats['blank_count'],
+            )
+            results[f'{column}_string_length'] = _result(
+                'expect_column_value_lengths_to_be_between',
+                True,
+                dict(column=column, min_value=0, max_value=None),
+                dict(
+                    element_count=rows,
+                    unexpected_count=0,
+                    observed_min_length=stats['min_length'],
+                    observed_max_length=stats['max_length'],
+                ),
+            )
+
+    for column, stats in profile['columns'].items():
+        if stats['kind'] != 'numeric':
+            continue
+        if column in drift:
+            results[f'{column}_stats'] = _drift_result(
+                'expect_column_mean_to_be_between', column, rows, drift[column]['stats'],
+            )
+            results[f'{column}_null_rate'] = _drift_result(
+                'expect_column_null_rate_to_be_at_most', column, rows, drift[column]['null_rate'],
+            )
+            if 'quantiles' in drift[column]:
+                results[f'{column}_quantiles'] = _drift_result(
+                    'expect_column_quantile_values_to_be_near_baseline', column, rows, drift[column]['quantiles'],
+                )
+            continue
+
+        mean = stats['mean']
+        results[f'{column}_stats'] = _result(
+            'expect_column_mean_to_be_between',
+            mean is not None and stats['nan_count'] == 0 and stats['inf_count'] == 0,
+            dict(
+                column=column,
+                min_value=None if mean is None else mean * 0.5,
+                max_value=None if mean is None else mean * 1.5,
+            ),
+            dict(observed_value=mean, element_count=rows),
+        )
+
+    results['no_duplicates'] = _result(
+        'expect_table_row_count_to_equal',
+        profile['duplicate_count'] == 0,
+        dict(value=rows - profile['duplicate_count']),
+        dict(observed_value=rows, element_count=rows, unexpected_count=profile['duplicate_count']),
+    )
+
+    if profile['sampled']:
+        for result in results.values():
+            result['result']['sampled'] = True
+            result['result']['profiled_rows'] = rows
+
+    return results
+
+
+def _sample(df: pl.DataFrame, sample: Optional[Union[int, float]], seed: int) -> pl.DataFrame:
+    if not sample:
+        return df
+    if isinstance(sample, float):
+        # Floats are always fractions; 1.0 means every row
+        if not 0 < sample <= 1:
+            raise ValueError(f'A sample fraction must be in (0, 1], got {sample}; pass a row count as an int')
+        return df if sample == 1 else df.sample(fraction=sample, seed=seed)
+    if not isinstance(sample, int):
+        raise TypeError(f'sample must be a row count (int) or a fraction (float), got {type(sample).__name__}')
+    if sample >= df.height:
+        return df
+    return df.sample(n=sample, seed=seed)
+
+
+def _column_kind(dtype: pl.DataType) -> str:
+    if dtype == pl.Boolean:
+        return 'boolean'
+    if dtype.is_numeric():
+        return 'numeric'
+    if dtype.is_temporal():
+        return 'temporal'
+    if dtype == pl.Utf8 or dtype == pl.Categorical or dtype == pl.Enum:
+        return 'string'
+    return 'other'
+
+
+def _result(expectation_type: str, success: bool, kwargs: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'success': bool(success),
+        'expectation_config': {
+            'expectation_type': expectation_type,
+            'kwargs': kwargs,
+        },
+        'result': result,
+    }
+
+
+def _drift_result(expectation_type: str, column: str, rows: int, check: Dict[str, Any]) -> Dict[str, Any]:
+    result = _result(
+        expectation_type,
+        check['success'],
+        dict(column=column, **check['kwargs']),
+        dict(element_count=rows, **check['result']),
+    )
+    result['meta'] = {'drift': True}
+    return result
+
+
+def drift_passed(results: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Whether every baseline drift check in validate_frame results passed, ignoring the
+    data-quality checks (nulls, duplicates, ...).
+    """
+    return all(result['success'] for result in results.values() if result.get('meta', {}).get('drift'))
+
+
+def _unexpected_result(expectation_type: str, column: str, rows: int, unexpected: int, **kwargs) -> Dict[str, Any]:
+    return _result(
+        expectation_type,
+        unexpected == 0,
+        dict(column=column, **kwargs),
+        dict(
+            element_count=rows,
+            unexpected_count=unexpected,
+            unexpected_percent=(100.0 * unexpected / rows) if rows else 0.0,
+        ),
+    )
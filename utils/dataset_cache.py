@@ -0,0 +1,246 @@
+"""
+Local Parquet store for the public datasets the ML pipelines load.
+
+    python -m utils.dataset_cache titanic breast_cancer
+
+fetches the named datasets once (run it on a networked machine, then copy cache/datasets
+into an air-gapped environment). Blocks read them back memory-mapped and, with
+DATASET_OFFLINE=1 or offline=True, never touch the network.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import polars as pl
+
+DEFAULT_DATASET_CACHE_DIR = os.getenv('DATASET_CACHE_DIR', os.path.join('cache', 'datasets'))
+
+TITANIC_URL = 'https://raw.githubusercontent.com/datasciencedojo/datasets/master/titanic.csv'
+
+
+def offline_default() -> bool:
+    return os.getenv('DATASET_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+def file_checksum(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    Directory of Parquet datasets, each with a JSON manifest.
+
+    Layout:
+        <name>.parquet   The dataset, written once per fetch
+        <name>.json      Source, SHA-256 of the Parquet file, row count and caller metadata
+
+    Parquet files are written to a temporary file and renamed into place. A file whose
+    checksum no longer matches its manifest is treated as missing and fetched again (or,
+    offline, reported as an error). Loads compare the file's size and mtime with the
+    manifest and only re-hash it when those changed (e.g. after copying the cache), so a
+    cache hit costs O(1) rather than O(file size).
+
+    Args:
+        directory: Cache root
+        offline: Never fetch; a missing dataset raises FileNotFoundError (default $DATASET_OFFLINE)
+        verify: Check the Parquet file against its manifest on every load (default True)
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_DATASET_CACHE_DIR,
+        offline: Optional[bool] = None,
+        verify: bool = True,
+    ):
+        self.directory = directory
+        self.offline = offline_default() if offline is None else offline
+        self.verify = verify
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f'{name}.parquet')
+
+    def manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, f'{name}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def is_valid(self, name: str) -> bool:
+        manifest = self.manifest(name)
+        path = self.path(name)
+        if manifest is None or not os.path.exists(path):
+            return False
+        if not self.verify:
+            return True
+
+        stat = os.stat(path)
+        if stat.st_size == manifest.get('size') and stat.st_mtime_ns == manifest.get('mtime_ns'):
+            return True
+        if file_checksum(path) != manifest['sha256']:
+            return False
+        # Same content with a new mtime (copied or touched): remember it so the next load is cheap
+        try:
+            self._write_manifest(name, dict(manifest, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+        except OSError:
+            pass
+        return True
+
+    def save(self, name: str, df: pl.DataFrame, source: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store df under name; returns the Parquet path.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        _write_atomic(path, df.write_parquet)
+
+        stat = os.stat(path)
+        manifest = dict(
+            metadata or {},
+            source=source,
+            sha256=file_checksum(path),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            rows=df.height,
+            columns=df.columns,
+            fetched_at=time.time(),
+        )
+        self._write_manifest(name, manifest)
+        return path
+
+    def _write_manifest(self, name: str, manifest: Dict[str, Any]) -> None:
+        payload = json.dumps(manifest, indent=2).encode('utf-8')
+        _write_atomic(os.path.join(self.directory, f'{name}.json'), lambda f: f.write(payload))
+
+    def get_or_fetch(
+        self,
+        name: str,
+        fetch: Callable[[], Tuple[pl.DataFrame, Dict[str, Any]]],
+        source: str,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Make sure name is cached, calling fetch() -> (df, metadata) only on a miss.
+
+        Returns:
+            Tuple of (Parquet path, manifest); manifest['cache_hit'] tells which path was taken
+        """
+        if self.is_valid(name):
+            return self.path(name), dict(self.manifest(name), cache_hit=True)
+        if self.offline:
+            raise FileNotFoundError(
+                f"Dataset '{name}' is not in {self.directory} (or fails its checksum) and offline mode is on; "
+                f'run `python -m utils.dataset_cache {name}` where the network is available and copy the cache over'
+            )
+
+        df, metadata = fetch()
+        self.save(name, df, source, metadata)
+        return self.path(name), dict(self.manifest(name), cache_hit=False)
+
+
+def _write_atomic(path: str, write: Callable[[Any], Any]) -> None:
+    # A unique temporary file per writer, so concurrent fetches never replace each other's partial file
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def fetch_titanic() -> Tuple[pl.DataFrame, Dict[str, Any]]:
+    return pl.read_csv(TITANIC_URL), {}
+
+
+def fetch_breast_cancer() -> Tuple[pl.DataFrame, Dict[str, Any]]:
+    from sklearn.datasets import load_breast_cancer
+
+    cancer = load_breast_cancer()
+    df = pl.DataFrame(cancer.data, schema=list(cancer.feature_names)).with_columns(
+        pl.Series('target', cancer.target)
+    )
+    metadata = {
+        'target_column': 'target',
+        'target_names': cancer.target_names.tolist(),
+        'description': cancer.DESCR.split('Description')[0].strip(),
+    }
+    return df, metadata
+
+
+DATASETS: Dict[str, Tuple[Callable[[], Tuple[pl.DataFrame, Dict[str, Any]]], str]] = {
+    'titanic': (fetch_titanic, TITANIC_URL),
+    'breast_cancer': (fetch_breast_cancer, 'sklearn.datasets.load_breast_cancer'),
+}
+
+
+def load_dataset(
+    name: str,
+    backend: str = 'polars',
+    cache_dir: str = DEFAULT_DATASET_CACHE_DIR,
+    offline: Optional[bool] = None,
+    url: Optional[str] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Load a dataset from the local cache, fetching it first if needed (and allowed).
+
+    Args:
+        name: A key of DATASETS, or any name when url is given
+        backend: 'polars' or 'pandas'; both read the Parquet file memory-mapped
+        cache_dir: Dataset cache directory (default cache/datasets, or $DATASET_CACHE_DIR)
+        offline: Never fetch (default $DATASET_OFFLINE)
+        url: CSV to fetch instead of the registered source; cached under its own name
+
+    Returns:
+        Tuple of (DataFrame, manifest)
+    """
+    if backend not in ('polars', 'pandas'):
+        raise ValueError(f"backend must be 'polars' or 'pandas', got {backend!r}")
+
+    if url is not None and (name not in DATASETS or url != DATASETS[name][1]):
+        # A different source is a different dataset; don't let it shadow the registered one
+        name = f'{name}-{hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]}'
+        fetch, source = (lambda: (pl.read_csv(url), {})), url
+    elif name in DATASETS:
+        fetch, source = DATASETS[name]
+    else:
+        raise KeyError(f"Unknown dataset '{name}'; expected one of {sorted(DATASETS)} or a url")
+
+    path, manifest = DatasetCache(cache_dir, offline).get_or_fetch(name, fetch, source)
+    if backend == 'pandas':
+        import pandas as pd
+
+        return pd.read_parquet(path, memory_map=True), manifest
+    return pl.read_parquet(path, memory_map=True), manifest
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='*', default=sorted(DATASETS), help='Datasets to fetch (default all)')
+    parser.add_argument('--cache-dir', default=DEFAULT_DATASET_CACHE_DIR)
+    parser.add_argument('--refresh', action='store_true', help='Fetch again even if cached')
+    args = parser.parse_args(argv)
+
+    cache = DatasetCache(args.cache_dir, offline=False)
+    for name in args.names:
+        fetch, source = DATASETS[name]
+        if args.refresh or not cache.is_valid(name):
+            df, metadata = fetch()
+            cache.save(name, df, source, metadata)
+        manifest = cache.manifest(name)
+        print(f"{name}: {manifest['rows']} rows, sha256 {manifest['sha256'][:12]} -> {cache.path(name)}")
+
+
+if __name__ == '__main__':
+    main()
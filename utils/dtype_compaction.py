@@ -0,0 +1,154 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import polars as pl
+
+MONTH_NAMES = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+)
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+MONTH_ENUM = pl.Enum(list(MONTH_NAMES))
+DAY_ENUM = pl.Enum(list(DAY_NAMES))
+
+# Calendar fields and the narrowest integer type that holds every value they can take
+CALENDAR_DTYPES = {
+    'year': pl.Int16,
+    'quarter': pl.Int8,
+    'month': pl.Int8,
+    'week': pl.Int8,
+    'day': pl.Int8,
+    'dayofweek': pl.Int8,
+    'weekday': pl.Int8,
+    'dayofyear': pl.Int16,
+}
+NAME_DTYPES = {
+    'monthname': MONTH_ENUM,
+    'dayname': DAY_ENUM,
+}
+
+INTEGER_RANGES = {
+    pl.Int8: (-2 ** 7, 2 ** 7 - 1),
+    pl.Int16: (-2 ** 15, 2 ** 15 - 1),
+}
+
+SYMBOL_ENUM = 'enum'
+SYMBOL_CATEGORICAL = 'categorical'
+
+# Float32 keeps ~7 significant digits; its rounding error alone is below 6e-8 relative
+DEFAULT_FLOAT32_TOLERANCE = 1e-6
+
+
+def float32_errors(df: pl.DataFrame, columns: Iterable[str]) -> Dict[str, float]:
+    """
+    Compute the largest relative error each float column would incur when stored as Float32.
+
+    Zeros, nulls and NaNs round-trip exactly and are ignored; values that overflow Float32
+    give an infinite error.
+
+    Args:
+        df: Input DataFrame
+        columns: Float64 columns to check
+
+    Returns:
+        Dictionary mapping column name to its maximum relative error
+    """
+    columns = list(columns)
+    if not columns or df.height == 0:
+        return {column: 0.0 for column in columns}
+
+    errors = df.select([
+        pl.when(pl.col(column) != 0)
+        .then((pl.col(column).cast(pl.Float32).cast(pl.Float64) - pl.col(column)).abs() / pl.col(column).abs())
+        .fill_nan(None)
+        .max()
+        .alias(column)
+        for column in columns
+    ]).row(0, named=True)
+
+    return {column: float(error or 0.0) for column, error in errors.items()}
+
+
+def compact_frame(
+    df: pl.DataFrame,
+    float32_tolerance: Optional[float] = DEFAULT_FLOAT32_TOLERANCE,
+    symbol_column: str = 'symbol',
+    symbol_dtype: str = SYMBOL_ENUM,
+    exclude: Iterable[str] = (),
+) -> Tuple[pl.DataFrame, Dict[str, Any]]:
+    """
+    Shrink a stock frame to the narrowest dtypes that represent it without loss.
+
+    - symbol becomes an Enum over the symbols present (or a Categorical, whose categories
+      can grow across frames, with symbol_dtype='categorical')
+    - monthname and dayname become Enums in calendar order, so they also sort correctly
+    - calendar fields (year, month, dayofweek, ...) become Int8/Int16 when their values fit
+    - Float64 columns become Float32 when no value moves by more than float32_tolerance
+      (relative); columns that need full precision are kept and listed in the report
+
+    All casts are done in a single pass over the frame.
+
+    Args:
+        df: Input DataFrame
+        float32_tolerance: Largest relative error accepted for Float32, or None to keep Float64
+        symbol_column: Column holding the ticker symbol
+        symbol_dtype: 'enum' or 'categorical'
+        exclude: Columns to leave untouched
+
+    Returns:
+        Tuple of (compacted DataFrame, report) where report holds bytes_before, bytes_after,
+        bytes_saved, ratio, per-column dtype changes and the float columns kept as Float64
+    """
+    if symbol_dtype not in (SYMBOL_ENUM, SYMBOL_CATEGORICAL):
+        raise ValueError(f"symbol_dtype must be '{SYMBOL_ENUM}' or '{SYMBOL_CATEGORICAL}', got {symbol_dtype!r}")
+
+    exclude = set(exclude)
+    schema = {column: dtype for column, dtype in df.schema.items() if column not in exclude}
+    casts: Dict[str, pl.DataType] = {}
+
+    if schema.get(symbol_column) == pl.Utf8:
+        if symbol_dtype == SYMBOL_ENUM:
+            symbols = df.get_column(symbol_column).drop_nulls().unique().sort().to_list()
+            casts[symbol_column] = pl.Enum(symbols)
+        else:
+            casts[symbol_column] = pl.Categorical
+
+    for column, dtype in NAME_DTYPES.items():
+        if schema.get(column) == pl.Utf8:
+            casts[column] = dtype
+
+    calendar = [column for column in CALENDAR_DTYPES if column in schema and schema[column].is_integer()]
+    if calendar and df.height:
+        bounds = df.select(
+            [pl.col(column).min().alias(f'{column}_min') for column in calendar]
+            + [pl.col(column).max().alias(f'{column}_max') for column in calendar]
+        ).row(0, named=True)
+        for column in calendar:
+            low, high = INTEGER_RANGES[CALENDAR_DTYPES[column]]
+            minimum, maximum = bounds[f'{column}_min'], bounds[f'{column}_max']
+            if minimum is None or (low <= minimum and maximum <= high):
+                casts[column] = CALENDAR_DTYPES[column]
+
+    kept_float64 = {}
+    if float32_tolerance is not None:
+        floats = [column for column, dtype in schema.items() if dtype == pl.Float64]
+        for column, error in float32_errors(df, floats).items():
+            if error <= float32_tolerance:
+                casts[column] = pl.Float32
+            else:
+                kept_float64[column] = error
+
+    bytes_before = df.estimated_size()
+    if casts:
+        df = df.with_columns([pl.col(column).cast(dtype) for column, dtype in casts.items()])
+    bytes_after = df.estimated_size()
+
+    report = dict(
+        bytes_before=bytes_before,
+        bytes_after=bytes_after,
+        bytes_saved=bytes_before - bytes_after,
+        ratio=bytes_after / bytes_before if bytes_before else 1.0,
+        casts={column: f'{schema[column]} -> {df.schema[column]}' for column in casts},
+        kept_float64=kept_float64,
+    )
+    return df, report
@@ -0,0 +1,249 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import polars as pl
+from sklearn.base import BaseEstimator, TransformerMixin
+
+ENCODING_ONEHOT = 'onehot'
+ENCODING_ORDINAL = 'ordinal'
+
+NUMERIC_IMPUTERS = ('median', 'mean')
+
+
+def as_polars(X: Any) -> pl.DataFrame:
+    """
+    Polars view of X: Polars frames pass through, pandas frames convert (NaN becomes null).
+    """
+    if isinstance(X, pl.DataFrame):
+        return X
+    if isinstance(X, pl.LazyFrame):
+        return X.collect()
+    return pl.from_pandas(X) if hasattr(X, 'columns') else pl.DataFrame(X)
+
+
+class PolarsFeatureEncoder(TransformerMixin, BaseEstimator):
+    """
+    Imputation plus one-hot or ordinal encoding computed natively in Polars.
+
+    A drop-in replacement for the SimpleImputer + OneHotEncoder ColumnTransformer: numerical
+    columns are filled with their training median (or mean), categorical columns with their
+    most frequent value, then encoded. One-hot output is built directly as a CSR matrix
+    (one stored value per categorical column per row, none for numeric zeros), so wide
+    categoricals never become dense dummy columns. Like ColumnTransformer, output that is
+    at least sparse_threshold dense is returned as an ndarray instead, since tree models fit
+    much faster on dense input. Ordinal output is always a dense float matrix.
+
+    The fitted state is plain data (see to_state / from_state), so it can be stored in JSON
+    metadata and reapplied without the training frame. Unknown categories encode as all
+    zeros (one-hot) or -1 (ordinal), or as the infrequent column when min_frequency is set.
+
+    Args:
+        numerical_cols: Columns imputed with numeric_imputer and passed through as floats
+        categorical_cols: Columns imputed with their most frequent value and encoded
+        numeric_imputer: 'median' or 'mean'
+        encoding: 'onehot' (CSR output) or 'ordinal' (dense output)
+        min_frequency: Fold categories rarer than this (a fraction of rows if < 1, else a
+            count) into one infrequent category per column
+        drop_first: Drop each column's first category, like pd.get_dummies(drop_first=True)
+        sparse_threshold: Return one-hot output as CSR only when its density is below this
+            (default 0.3, as in ColumnTransformer; 1.0 always returns CSR)
+    """
+
+    def __init__(
+        self,
+        numerical_cols: Sequence[str] = (),
+        categorical_cols: Sequence[str] = (),
+        numeric_imputer: str = 'median',
+        encoding: str = ENCODING_ONEHOT,
+        min_frequency: Optional[float] = None,
+        drop_first: bool = False,
+        sparse_threshold: float = 0.3,
+    ):
+        self.numerical_cols = numerical_cols
+        self.categorical_cols = categorical_cols
+        self.numeric_imputer = numeric_imputer
+        self.encoding = encoding
+        self.min_frequency = min_frequency
+        self.drop_first = drop_first
+        self.sparse_threshold = sparse_threshold
+
+    def fit(self, X: Any, y: Any = None) -> 'PolarsFeatureEncoder':
+        if self.numeric_imputer not in NUMERIC_IMPUTERS:
+            raise ValueError(f'numeric_imputer must be one of {NUMERIC_IMPUTERS}, got {self.numeric_imputer!r}')
+        if self.encoding not in (ENCODING_ONEHOT, ENCODING_ORDINAL):
+            raise ValueError(f"encoding must be '{ENCODING_ONEHOT}' or '{ENCODING_ORDINAL}', got {self.encoding!r}")
+
+        frame = as_polars(X)
+        numerical_cols, categorical_cols = list(self.numerical_cols), list(self.categorical_cols)
+
+        # Every numeric fill value in one select
+        numerical = {}
+        if numerical_cols:
+            values = pl.col(numerical_cols).cast(pl.Float64).fill_nan(None)
+            stats = frame.select(values.median() if self.numeric_imputer == 'median' else values.mean()).row(0)
+            # An all-missing column has no statistic; keep it (as zeros) so the output width is stable
+            numerical = {column: 0.0 if value is None else float(value) for column, value in zip(numerical_cols, stats)}
+
+        categorical = {}
+        for column in categorical_cols:
+            counts = frame.get_column(column).cast(pl.String).value_counts(sort=True, name='count')
+            observed = counts.filter(pl.col(column).is_not_null())
+            if observed.height == 0:
+                categorical[column] = {'fill': None, 'categories': [], 'infrequent': []}
+                continue
+
+            # Most frequent value, ties to the smallest like SimpleImputer(strategy='most_frequent')
+            top = observed.get_column('count').max()
+            fill = observed.filter(pl.col('count') == top).get_column(column).min()
+            missing = frame.get_column(column).null_count()
+
+            observed = observed.with_columns(
+                pl.when(pl.col(column) == fill).then(pl.col('count') + missing).otherwise(pl.col('count')).alias('count')
+            ).sort(column)
+            infrequent = []
+            if self.min_frequency is not None:
+                threshold = self.min_frequency * frame.height if self.min_frequency < 1 else self.min_frequency
+                infrequent = observed.filter(pl.col('count') < threshold).get_column(column).to_list()
+                observed = observed.filter(pl.col('count') >= threshold)
+            categorical[column] = {
+                'fill': fill,
+                'categories': observed.get_column(column).to_list(),
+                'infrequent': infrequent,
+            }
+
+        self._set_state({
+            'numerical': numerical,
+            'categorical': categorical,
+            'encoding': self.encoding,
+            'drop_first': self.drop_first,
+        })
+        return self
+
+    def transform(self, X: Any):
+        """
+        Encode X with the fitted state.
+
+        Fitted columns absent from X (e.g. fields left out of a scoring request) are treated
+        as all missing and imputed.
+
+        Returns:
+            scipy.sparse.csr_matrix (sparse one-hot) or float64 ndarray, columns in
+            get_feature_names_out() order
+        """
+        frame = as_polars(X)
+        state = self.state_
+        n_rows = frame.height
+
+        absent = [column for column in (*state['numerical'], *state['categorical']) if column not in frame.columns]
+        if absent:
+            frame = frame.with_columns(pl.lit(None).alias(column) for column in absent)
+
+        numerical_cols = list(state['numerical'])
+        numeric = np.empty((n_rows, 0))
+        if numerical_cols:
+            numeric = frame.select(
+                pl.col(column).cast(pl.Float64).fill_nan(None).fill_null(fill)
+                for column, fill in state['numerical'].items()
+            ).to_numpy()
+
+        codes = np.empty((n_rows, 0), dtype=np.int32)
+        if state['categorical']:
+            codes = frame.select(self._code_expression(column) for column in state['categorical']).to_numpy()
+
+        if state['encoding'] == ENCODING_ORDINAL:
+            return np.hstack([numeric, codes.astype(np.float64)])
+
+        from scipy import sparse
+
+        widths = [self._width(column) for column in state['categorical']]
+        offsets = len(numerical_cols) + np.r_[0, np.cumsum(widths)[:-1]].astype(np.int64)
+
+        # Row-major boolean masking keeps each row's entries together and in column order
+        data = np.hstack([numeric, np.ones(codes.shape)])
+        indices = np.hstack([np.broadcast_to(np.arange(len(numerical_cols)), numeric.shape), codes + offsets])
+        stored = np.hstack([numeric != 0, codes >= 0])
+        indptr = np.r_[0, np.cumsum(stored.sum(axis=1))]
+        matrix = sparse.csr_matrix(
+            (data[stored], indices[stored], indptr),
+            shape=(n_rows, len(numerical_cols) + sum(widths)),
+        )
+        if matrix.nnz >= self.sparse_threshold * max(1, matrix.shape[0] * matrix.shape[1]):
+            return matrix.toarray()
+        return matrix
+
+    def get_feature_names_out(self, input_features: Any = None) -> np.ndarray:
+        names: List[str] = list(self.state_['numerical'])
+        for column, spec in self.state_['categorical'].items():
+            if self.state_['encoding'] == ENCODING_ORDINAL:
+                names.append(column)
+                continue
+            categories = spec['categories'][1:] if self.state_['drop_first'] else spec['categories']
+            names.extend(f'{column}_{category}' for category in categories)
+            if spec['infrequent']:
+                names.append(f'{column}_infrequent')
+        return np.array(names, dtype=object)
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        JSON-serializable fitted state.
+        """
+        return self.state_
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], sparse_threshold: float = 0.3) -> 'PolarsFeatureEncoder':
+        """
+        Rebuild a fitted encoder from to_state() output, without refitting.
+        """
+        encoder = cls(
+            list(state['numerical']),
+            list(state['categorical']),
+            encoding=state['encoding'],
+            drop_first=state['drop_first'],
+            sparse_threshold=sparse_threshold,
+        )
+        encoder._set_state(state)
+        return encoder
+
+    def _set_state(self, state: Dict[str, Any]) -> None:
+        self.state_ = state
+        self.n_features_out_ = len(self.get_feature_names_out())
+
+    def _width(self, column: str) -> int:
+        spec = self.state_['categorical'][column]
+        return len(spec['categories']) - int(self.state_['drop_first'] and bool(spec['categories'])) + int(bool(spec['infrequent']))
+
+    def _code_expression(self, column: str) -> pl.Expr:
+        spec = self.state_['categorical'][column]
+        categories, infrequent = spec['categories'], spec['infrequent']
+
+        # Category -> output slot within the column; infrequent (and unseen) values share the last slot
+        first = int(self.state_['drop_first'] and self.state_['encoding'] == ENCODING_ONEHOT)
+        mapping = {category: index - first for index, category in enumerate(categories)}
+        other = len(categories) - first if infrequent else -1
+        mapping.update({category: other for category in infrequent})
+
+        values = pl.col(column).cast(pl.String)
+        if spec['fill'] is not None:
+            values = values.fill_null(spec['fill'])
+        return (
+            values
+            .replace_strict(list(mapping), list(mapping.values()), default=other, return_dtype=pl.Int64)
+            .fill_null(other)
+            .alias(column)
+        )
+
+
+def infer_feature_columns(frame: Any, target: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Split a frame's columns into numerical and categorical feature columns by dtype.
+    """
+    schema = as_polars(frame.head(0) if hasattr(frame, 'head') else frame).schema
+    numerical, categorical = [], []
+    for column, dtype in schema.items():
+        if column == target:
+            continue
+        if dtype.is_numeric():
+            numerical.append(column)
+        elif dtype in (pl.String, pl.Categorical) or isinstance(dtype, pl.Enum):
+            categorical.append(column)
+    return {'numerical_cols': numerical, 'categorical_cols': categorical}
@@ -0,0 +1,179 @@
+import inspect
+import io
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from utils.content_hash import content_hash
+
+FORMATS = ('png', 'svg')
+DEFAULT_DPI = 100
+DEFAULT_MAX_CURVE_POINTS = 2000
+DEFAULT_FIGURE_CACHE_DIR = os.getenv('FIGURE_CACHE_DIR')
+
+# Rendered bytes by (figure key, format, dpi), most recently used last
+MEMORY_CACHE_ENTRIES = 64
+_RENDERED: 'OrderedDict[Tuple[str, str, int], bytes]' = OrderedDict()
+
+
+@contextmanager
+def agg_figure(figsize: Tuple[float, float]) -> Iterator[Any]:
+    """
+    A matplotlib Figure on its own Agg canvas, cleared when the block exits.
+
+    The figure is never registered with pyplot, so no global figure state (and no GUI
+    backend) is involved and nothing outlives the with block.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    try:
+        yield fig
+    finally:
+        fig.clear()
+
+
+def downsample_curve(x: np.ndarray, y: np.ndarray, max_points: int = DEFAULT_MAX_CURVE_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    At most max_points points of a curve, spaced evenly along its length.
+
+    Spacing by arc length (on axes scaled to [0, 1]) rather than by index keeps the corners
+    of step-shaped ROC and PR curves, where thousands of thresholds may share one segment.
+    The first and last points are always kept.
+
+    Args:
+        x: Curve x coordinates, in drawing order
+        y: Curve y coordinates
+        max_points: Point budget (at least 2)
+
+    Returns:
+        Tuple of downsampled (x, y)
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(x) <= max_points:
+        return x, y
+
+    spans = [np.ptp(values) or 1.0 for values in (x, y)]
+    length = np.r_[0, np.cumsum(np.hypot(np.diff(x) / spans[0], np.diff(y) / spans[1]))]
+    index = np.searchsorted(length, np.linspace(0, length[-1], max(2, max_points) - 1))
+    index = np.unique(np.r_[index.clip(0, len(x) - 1), len(x) - 1])
+    return x[index], y[index]
+
+
+class LazyFigure:
+    """
+    A figure that is only drawn when its bytes are requested.
+
+    draw(fig, **inputs) populates a fresh Agg figure; render() saves it as PNG or SVG and
+    clears it immediately, so no live matplotlib objects are kept between runs. Rendered
+    bytes are cached by a hash of the name, size, drawing code and inputs: in process (a
+    small LRU) and, with cache_dir, on disk, so rerunning a block on unchanged inputs
+    renders nothing.
+
+    Args:
+        name: Figure name, part of the cache key
+        draw: Function drawing onto the figure it is given
+        inputs: Keyword arguments for draw (arrays, numbers, strings, containers)
+        figsize: Figure size in inches
+        cache_dir: Directory for rendered files (default $FIGURE_CACHE_DIR; None keeps them in memory only)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        draw: Callable[..., None],
+        inputs: Optional[Dict[str, Any]] = None,
+        figsize: Tuple[float, float] = (10, 6),
+        cache_dir: Optional[str] = DEFAULT_FIGURE_CACHE_DIR,
+    ):
+        self.name = name
+        self.draw = draw
+        self.inputs = inputs or {}
+        self.figsize = figsize
+        self.cache_dir = cache_dir
+        self.key = content_hash('figure', name, list(figsize), _source(draw), self.inputs)
+
+    def render(self, format: str = 'png', dpi: int = DEFAULT_DPI) -> bytes:
+        """
+        PNG or SVG bytes of the figure, from the cache when possible.
+        """
+        if format not in FORMATS:
+            raise ValueError(f'format must be one of {FORMATS}, got {format!r}')
+
+        cache_key = (self.key, format, dpi)
+        if cache_key in _RENDERED:
+            _RENDERED.move_to_end(cache_key)
+            return _RENDERED[cache_key]
+
+        path = self._path(format, dpi)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+        else:
+            buffer = io.BytesIO()
+            with agg_figure(self.figsize) as fig:
+                self.draw(fig, **self.inputs)
+                fig.savefig(buffer, format=format, dpi=dpi, bbox_inches='tight')
+            data = buffer.getvalue()
+            if path:
+                _write_atomic(path, data)
+
+        _RENDERED[cache_key] = data
+        while len(_RENDERED) > MEMORY_CACHE_ENTRIES:
+            _RENDERED.popitem(last=False)
+        return data
+
+    def savefig(self, fname: Any, format: Optional[str] = None, dpi: int = DEFAULT_DPI, **kwargs: Any) -> None:
+        """
+        Write the rendered figure to a path or binary file, like Figure.savefig.
+        """
+        if format is None:
+            format = os.path.splitext(fname)[1].lstrip('.').lower() if isinstance(fname, str) else 'png'
+        data = self.render(format or 'png', dpi)
+        if isinstance(fname, str):
+            with open(fname, 'wb') as f:
+                f.write(data)
+        else:
+            fname.write(data)
+
+    def _repr_png_(self) -> bytes:
+        return self.render('png')
+
+    def _path(self, format: str, dpi: int) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, self.key[:2], f'{self.key}-{dpi}.{format}')
+
+    def __repr__(self) -> str:
+        return f'LazyFigure({self.name!r}, key={self.key[:12]})'
+
+
+def render_figures(figures: Dict[str, LazyFigure], formats: Any = ()) -> Dict[str, bytes]:
+    """
+    Eagerly render figures, e.g. for a block's render_formats kwarg.
+
+    Returns:
+        Dictionary like {'figure_png': b'...'} with one entry per figure and format
+    """
+    return {f'{name}_{format}': figure.render(format) for name, figure in figures.items() for format in formats}
+
+
+def _source(draw: Callable[..., None]) -> str:
+    # Editing the drawing code must invalidate cached renders
+    try:
+        return inspect.getsource(draw)
+    except (OSError, TypeError):
+        return f'{getattr(draw, "__module__", "")}.{getattr(draw, "__qualname__", repr(draw))}'
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
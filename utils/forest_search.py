@@ -0,0 +1,274 @@
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_FOREST_GRID = {
+    'max_depth': [None, 8, 16],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': ['sqrt', 0.5],
+}
+DEFAULT_PREPROCESS_GRID = {
+    'numeric_imputer': ['median', 'mean'],
+    'onehot_min_frequency': [None, 0.05],
+}
+
+# Fold arrays of the current pool's worker process: {(preprocess_id, fold): (X_train, y_train, X_val, y_val)}
+_WORKER_FOLDS: Dict[Tuple[int, int], Tuple[Any, np.ndarray, Any, np.ndarray]] = {}
+
+
+def build_preprocessor(
+    numerical_cols: Sequence[str],
+    categorical_cols: Sequence[str],
+    numeric_imputer: str = 'median',
+    onehot_min_frequency: Optional[float] = None,
+    engine: str = 'polars',
+):
+    """
+    Median/mode imputation plus one-hot encoding, the enchanting_stasis preprocessing.
+
+    Args:
+        numerical_cols: Columns imputed with numeric_imputer
+        categorical_cols: Columns imputed with their most frequent value and one-hot encoded
+        numeric_imputer: Imputation strategy for numerical columns ('median' or 'mean')
+        onehot_min_frequency: Fold categories rarer than this into one infrequent column
+        engine: 'polars' for a PolarsFeatureEncoder (sparse output, no pandas round-trip) or
+            'sklearn' for the equivalent SimpleImputer/OneHotEncoder ColumnTransformer
+
+    Returns:
+        Unfitted transformer
+    """
+    if engine == 'polars':
+        from utils.feature_pipeline import PolarsFeatureEncoder
+
+        return PolarsFeatureEncoder(
+            list(numerical_cols),
+            list(categorical_cols),
+            numeric_imputer=numeric_imputer,
+            min_frequency=onehot_min_frequency,
+        )
+    if engine != 'sklearn':
+        raise ValueError(f"engine must be 'polars' or 'sklearn', got {engine!r}")
+
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    numerical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy=numeric_imputer))
+    ])
+
+    onehot = OneHotEncoder(handle_unknown='ignore')
+    if onehot_min_frequency is not None:
+        onehot = OneHotEncoder(handle_unknown='infrequent_if_exist', min_frequency=onehot_min_frequency)
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('onehot', onehot)
+    ])
+
+    return ColumnTransformer(
+        transformers=[
+            ('num', numerical_transformer, list(numerical_cols)),
+            ('cat', categorical_transformer, list(categorical_cols))
+        ])
+
+
+def grid(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Every combination of a {name: values} search space.
+    """
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def successive_halving_search(
+    X,
+    y,
+    numerical_cols: Sequence[str],
+    categorical_cols: Sequence[str],
+    forest_grid: Optional[Dict[str, Sequence[Any]]] = None,
+    preprocess_grid: Optional[Dict[str, Sequence[Any]]] = None,
+    min_trees: int = 25,
+    max_trees: int = 400,
+    eta: int = 3,
+    cv: int = 3,
+    n_jobs: int = -1,
+    random_state: int = 42,
+    engine: str = 'polars',
+) -> Dict[str, Any]:
+    """
+    Successive-halving search over RandomForest and preprocessing parameters, with trees as budget.
+
+    Every candidate starts with min_trees trees per fold; after each round the best 1/eta
+    (by mean validation accuracy) survive and grow eta times as many trees, up to max_trees.
+    A lone survivor skips straight to max_trees, so the winner is always scored (and
+    reported) with the full budget. Forests are warm-started, so a round only fits the trees
+    it adds. Each preprocessing config is fitted once per fold and the transformed folds are
+    shipped to every worker once, so the preprocessor is never refit per candidate.
+
+    Pool workers are not pinned to candidates, so each fold's forest is pickled to its worker
+    and back every round: the IPC per round is about (surviving candidates x cv) forests of
+    that round's size. Forests of eliminated candidates are dropped and the last round's are
+    not sent back.
+
+    Args:
+        X: Polars or pandas DataFrame of features
+        y: Target
+        numerical_cols: Numerical feature columns
+        categorical_cols: Categorical feature columns
+        forest_grid: RandomForestClassifier parameter space (default DEFAULT_FOREST_GRID)
+        preprocess_grid: build_preprocessor parameter space (default DEFAULT_PREPROCESS_GRID)
+        min_trees: Trees per forest in the first round
+        max_trees: Trees per forest in the last round
+        eta: Elimination factor; 1/eta of the candidates survive each round
+        cv: Stratified cross-validation folds
+        n_jobs: Worker processes; -1 uses every core
+        random_state: Seed for the folds and the forests
+        engine: build_preprocessor engine
+
+    Returns:
+        Dictionary with best (params of the top candidate), leaderboard (one entry per
+        candidate, ranked), rounds and search_seconds
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    start = time.perf_counter()
+    forest_candidates = grid(DEFAULT_FOREST_GRID if forest_grid is None else forest_grid)
+    preprocess_candidates = grid(DEFAULT_PREPROCESS_GRID if preprocess_grid is None else preprocess_grid)
+    y = np.asarray(y)
+
+    # Fit each preprocessing config once per fold, on that fold's training rows only
+    folds = {}
+    splits = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state).split(X, y))
+    for preprocess_id, preprocess in enumerate(preprocess_candidates):
+        for fold, (train_index, val_index) in enumerate(splits):
+            preprocessor = build_preprocessor(numerical_cols, categorical_cols, engine=engine, **preprocess)
+            X_train = preprocessor.fit_transform(_take_rows(X, train_index))
+            X_val = preprocessor.transform(_take_rows(X, val_index))
+            folds[(preprocess_id, fold)] = (X_train, y[train_index], X_val, y[val_index])
+    preprocess_seconds = time.perf_counter() - start
+
+    candidates = []
+    for preprocess_id, preprocess in enumerate(preprocess_candidates):
+        for params in forest_candidates:
+            candidates.append(dict(
+                id=len(candidates),
+                preprocess_id=preprocess_id,
+                preprocess=preprocess,
+                params=params,
+                forests={},
+                fit_seconds=0.0,
+            ))
+
+    rounds = []
+    n_rounds = max(1, math.ceil(math.log(max_trees / min_trees, eta)) + 1)
+    workers = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    alive = candidates
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folds,)) as pool:
+        for round_index in range(n_rounds):
+            trees = max_trees if len(alive) == 1 else min(max_trees, min_trees * eta ** round_index)
+            last = round_index == n_rounds - 1 or trees == max_trees
+            futures = {
+                (candidate['id'], fold): pool.submit(
+                    _fit_fold,
+                    candidate['forests'].get(fold),
+                    candidate['params'],
+                    candidate['preprocess_id'],
+                    fold,
+                    trees,
+                    random_state,
+                    not last,
+                )
+                for candidate in alive
+                for fold in range(cv)
+            }
+
+            for candidate in alive:
+                scores = []
+                for fold in range(cv):
+                    forest, score, seconds = futures[(candidate['id'], fold)].result()
+                    candidate['forests'][fold] = forest
+                    candidate['fit_seconds'] += seconds
+                    scores.append(score)
+                candidate.update(
+                    n_estimators=trees,
+                    mean_score=float(np.mean(scores)),
+                    std_score=float(np.std(scores)),
+                    rounds=round_index + 1,
+                )
+
+            alive = sorted(alive, key=lambda c: -c['mean_score'])
+            rounds.append(dict(round=round_index + 1, n_estimators=trees, candidates=len(alive)))
+            if last:
+                break
+
+            # Only survivors keep their forests; the rest are freed before the next round
+            survivors = alive[:max(1, math.ceil(len(alive) / eta))]
+            for candidate in alive[len(survivors):]:
+                candidate['forests'] = {}
+            alive = survivors
+
+    # Candidates that reached later rounds rank above those eliminated earlier
+    ranked = sorted(candidates, key=lambda c: (-c['rounds'], -c['mean_score'], c['fit_seconds']))
+    leaderboard = [
+        dict(
+            rank=rank,
+            mean_score=candidate['mean_score'],
+            std_score=candidate['std_score'],
+            n_estimators=candidate['n_estimators'],
+            rounds=candidate['rounds'],
+            fit_seconds=candidate['fit_seconds'],
+            **{f'preprocess__{name}': value for name, value in candidate['preprocess'].items()},
+            **{f'forest__{name}': value for name, value in candidate['params'].items()},
+        )
+        for rank, candidate in enumerate(ranked, start=1)
+    ]
+    best = ranked[0]
+
+    return dict(
+        best=dict(preprocess=best['preprocess'], params=dict(best['params'], n_estimators=best['n_estimators'])),
+        leaderboard=leaderboard,
+        rounds=rounds,
+        preprocess_seconds=preprocess_seconds,
+        search_seconds=time.perf_counter() - start,
+    )
+
+
+def _take_rows(X, index: np.ndarray):
+    return X.iloc[index] if hasattr(X, 'iloc') else X[index]
+
+
+def _init_worker(folds: Dict[Tuple[int, int], Tuple[Any, np.ndarray, Any, np.ndarray]]) -> None:
+    _WORKER_FOLDS.clear()
+    _WORKER_FOLDS.update(folds)
+
+
+def _fit_fold(
+    forest,
+    params: Dict[str, Any],
+    preprocess_id: int,
+    fold: int,
+    trees: int,
+    random_state: int,
+    return_forest: bool = True,
+):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X_train, y_train, X_val, y_val = _WORKER_FOLDS[(preprocess_id, fold)]
+    if forest is None:
+        # One core per forest; the pool already spreads candidates over every core
+        forest = RandomForestClassifier(warm_start=True, random_state=random_state, n_jobs=1, **params)
+
+    start = time.perf_counter()
+    forest.set_params(n_estimators=trees)
+    forest.fit(X_train, y_train)
+    seconds = time.perf_counter() - start
+
+    score = float(np.mean(forest.predict(X_val) == y_val))
+    # The last round's forests are never grown again; don't pickle them back
+    return (forest if return_forest else None), score, seconds
@@ -0,0 +1,244 @@
+"""
+Per-block timing, memory and row-count instrumentation.
+
+Stack @instrument under a Mage block decorator, naming the block (Mage executes block code
+without a source file, so the name can't be derived from it):
+
+    @transformer
+    @instrument(name='ethereal_crucible')
+    def transform(df, **kwargs):
+        with span('compute'):
+            ...
+
+Each run appends one JSON line to BLOCK_METRICS_PATH (default metrics/block_metrics.jsonl)
+and/or rewrites a Prometheus text file per block in BLOCK_METRICS_PROMETHEUS_DIR (default
+metrics/prometheus, for node_exporter's textfile collector). BLOCK_METRICS_FORMAT selects
+'jsonl' (default), 'prometheus', 'both' or 'off'.
+"""
+import functools
+import inspect
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+DEFAULT_METRICS_PATH = os.path.join('metrics', 'block_metrics.jsonl')
+DEFAULT_PROMETHEUS_DIR = os.path.join('metrics', 'prometheus')
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+_current_record: ContextVar[Optional[Dict[str, Any]]] = ContextVar('block_metrics_record', default=None)
+
+
+def instrument(fn: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
+    """
+    Record wall time, CPU time, peak RSS, input/output rows and bytes, and spans of a block.
+
+    Args:
+        fn: Block function (when used as a bare decorator)
+        name: Block name; defaults to the source file name, or the function name
+    """
+    if fn is None:
+        return functools.partial(instrument, name=name)
+
+    block_name = name or _block_name(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        record = dict(
+            block=kwargs.get('block_uuid') or block_name,
+            pipeline=kwargs.get('pipeline_uuid'),
+            started_at=time.time(),
+            spans={},
+        )
+        record['input_rows'], record['input_bytes'] = _measure_safely(args, record)
+        token = _current_record.set(record)
+
+        rss_before = _peak_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        status = 'ok'
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except BaseException as err:
+            status = 'error'
+            record['error'] = type(err).__name__
+            raise
+        finally:
+            record['wall_seconds'] = time.perf_counter() - wall_start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            record['peak_rss_bytes'] = _peak_rss()
+            record['peak_rss_growth_bytes'] = record['peak_rss_bytes'] - rss_before
+            record['output_rows'], record['output_bytes'] = _measure_safely(result, record)
+            record['status'] = status
+            _current_record.reset(token)
+            emit(record)
+
+    return wrapper
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a sub-phase (network, parse, compute, serialize, ...) of the running block.
+
+    Repeated spans with the same name accumulate. Outside an instrumented block this is a no-op.
+    """
+    record = _current_record.get()
+    if record is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['spans'][name] = record['spans'].get(name, 0.0) + time.perf_counter() - start
+
+
+def add_metrics(**values: Any) -> None:
+    """
+    Attach extra values (e.g. files=12, rows_skipped=3) to the running block's record.
+    """
+    record = _current_record.get()
+    if record is not None:
+        record.setdefault('extra', {}).update(values)
+
+
+def measure(obj: Any, depth: int = 0) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Rows and in-memory bytes of a block input or output, without copying or deep inspection.
+
+    Frames, arrays and Arrow tables are measured directly; dicts, lists and tuples are
+    summed over their items. Returns (None, None) for anything else.
+    """
+    if obj is None or depth > 3:
+        return None, None
+
+    if hasattr(obj, 'estimated_size') and hasattr(obj, 'height'):
+        return obj.height, int(obj.estimated_size())
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'shape'):
+        # Only DataFrame and Series take index=; pd.Index.memory_usage() doesn't
+        pandas = sys.modules.get('pandas')
+        if pandas is not None and isinstance(obj, (pandas.DataFrame, pandas.Series)):
+            usage = obj.memory_usage(index=True)
+        else:
+            usage = obj.memory_usage()
+        return obj.shape[0], int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(obj, 'num_rows') and hasattr(obj, 'nbytes'):
+        return obj.num_rows, int(obj.nbytes)
+    if hasattr(obj, 'nbytes') and hasattr(obj, 'shape'):
+        return (obj.shape[0] if obj.shape else 1), int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray, str)):
+        return None, len(obj)
+
+    if isinstance(obj, dict):
+        items = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        items = obj
+    else:
+        return None, None
+
+    rows = size = None
+    for item in items:
+        item_rows, item_bytes = measure(item, depth + 1)
+        if item_rows is not None:
+            rows = (rows or 0) + item_rows
+        if item_bytes is not None:
+            size = (size or 0) + item_bytes
+    return rows, size
+
+
+def emit(record: Dict[str, Any]) -> None:
+    output_format = os.getenv('BLOCK_METRICS_FORMAT', 'jsonl')
+    if output_format == 'off':
+        return
+
+    try:
+        if output_format in ('jsonl', 'both'):
+            write_jsonl(record, os.getenv('BLOCK_METRICS_PATH', DEFAULT_METRICS_PATH))
+        if output_format in ('prometheus', 'both'):
+            write_prometheus(record, os.getenv('BLOCK_METRICS_PROMETHEUS_DIR', DEFAULT_PROMETHEUS_DIR))
+    except Exception as err:
+        # Metrics must never fail a block
+        print(f'Could not write block metrics: {err}')
+
+
+def write_jsonl(record: Dict[str, Any], path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # One write per line keeps concurrent appends from interleaving
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, default=str) + '\n')
+
+
+def write_prometheus(record: Dict[str, Any], directory: str) -> None:
+    """
+    Atomically rewrite the block's .prom file with the metrics of its latest run.
+    """
+    os.makedirs(directory, exist_ok=True)
+    labels = f'block="{_escape(record["block"])}",pipeline="{_escape(record.get("pipeline") or "")}"'
+    status_labels = f'{labels},status="{record["status"]}"'
+
+    lines = []
+    for metric, key, help_text in (
+        ('mage_block_wall_seconds', 'wall_seconds', 'Wall time of the latest run'),
+        ('mage_block_cpu_seconds', 'cpu_seconds', 'CPU time of the latest run'),
+        ('mage_block_peak_rss_bytes', 'peak_rss_bytes', 'Peak resident set size of the process'),
+        ('mage_block_input_rows', 'input_rows', 'Rows received from upstream blocks'),
+        ('mage_block_input_bytes', 'input_bytes', 'In-memory bytes received from upstream blocks'),
+        ('mage_block_output_rows', 'output_rows', 'Rows returned'),
+        ('mage_block_output_bytes', 'output_bytes', 'In-memory bytes returned'),
+    ):
+        if record.get(key) is not None:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} gauge')
+            lines.append(f'{metric}{{{status_labels}}} {record[key]}')
+
+    if record['spans']:
+        lines.append('# HELP mage_block_span_seconds Time spent in each sub-phase of the latest run')
+        lines.append('# TYPE mage_block_span_seconds gauge')
+        for name, seconds in record['spans'].items():
+            lines.append(f'mage_block_span_seconds{{{labels},span="{_escape(name)}"}} {seconds}')
+
+    lines.append('# TYPE mage_block_last_run_timestamp_seconds gauge')
+    lines.append(f'mage_block_last_run_timestamp_seconds{{{status_labels}}} {record["started_at"]}')
+
+    path = os.path.join(directory, f'{record["block"]}.prom')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
+
+
+def _measure_safely(obj: Any, record: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
+    # A value measure() can't handle must not replace the block's result or error
+    try:
+        return measure(obj)
+    except Exception as err:
+        record['measure_error'] = f'{type(err).__name__}: {err}'
+        return None, None
+
+
+def _block_name(fn: Callable) -> str:
+    try:
+        stem = os.path.splitext(os.path.basename(inspect.getfile(fn)))[0]
+    except (TypeError, OSError):
+        stem = ''
+    return stem if stem and not stem.startswith('<') else fn.__name__
+
+
+def _peak_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,122 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List
+
+# SQLite's default limit on bound parameters per statement is 999 on older builds
+QUERY_CHUNK_SIZE = 900
+
+
+class KnownFilesStore:
+    """
+    Append-only, indexed record of filenames that were already processed.
+
+    Backed by SQLite in WAL mode: writes cost O(new files) and are committed atomically, a
+    crash mid-write never corrupts previously committed state, and readers in other processes
+    (sensors, watchers) can read concurrently with a writer.
+
+    Args:
+        path: SQLite database file
+        timeout: Seconds to wait for a lock held by another process
+    """
+
+    def __init__(self, path: str = 'known_files.sqlite3', timeout: float = 30.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS known_files ('
+            'filename TEXT PRIMARY KEY, '
+            'first_seen REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+
+    def filter_new(self, filenames: Iterable[str]) -> List[str]:
+        """
+        Return the filenames that are not in the store, in input order, via primary-key lookups.
+        """
+        filenames = list(dict.fromkeys(filenames))
+        with self._lock:
+            return self._filter_new_unlocked(filenames)
+
+    def add_many(self, filenames: Iterable[str]) -> List[str]:
+        """
+        Record filenames in one atomic transaction.
+
+        Returns:
+            The filenames that were not known before
+        """
+        filenames = list(dict.fromkeys(filenames))
+        if not filenames:
+            return []
+
+        now = time.time()
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                new_files = self._filter_new_unlocked(filenames)
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO known_files (filename, first_seen) VALUES (?, ?)',
+                    [(filename, now) for filename in new_files],
+                )
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+        return new_files
+
+    def import_json(self, path: str) -> int:
+        """
+        One-time migration from the legacy known_files.json list.
+
+        Returns:
+            Number of filenames added
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return len(self.add_many(json.load(f)))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM known_files').fetchone()[0]
+
+    def __contains__(self, filename: str) -> bool:
+        with self._lock:
+            row = self._connection.execute('SELECT 1 FROM known_files WHERE filename = ?', (filename,)).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connection.execute('SELECT filename FROM known_files ORDER BY filename').fetchall()
+        return iter(row[0] for row in rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> 'KnownFilesStore':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _filter_new_unlocked(self, filenames: List[str]) -> List[str]:
+        known = set()
+        for start in range(0, len(filenames), QUERY_CHUNK_SIZE):
+            chunk = filenames[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._connection.execute(
+                f'SELECT filename FROM known_files WHERE filename IN ({placeholders})',
+                chunk,
+            )
+            known.update(row[0] for row in rows)
+        return [filename for filename in filenames if filename not in known]
@@ -0,0 +1,177 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.content_hash import content_hash
+
+DEFAULT_MODEL_CACHE_DIR = os.getenv('MODEL_CACHE_DIR', os.path.join('cache', 'models'))
+
+
+def estimator_spec(estimator: Any) -> Dict[str, Any]:
+    """
+    Describe an unfitted scikit-learn estimator by class and every (nested) hyperparameter.
+
+    Nested estimators are replaced by their class names; their own parameters already appear
+    as 'step__param' keys in get_params(deep=True), so the spec pins the whole pipeline.
+
+    Args:
+        estimator: Estimator or Pipeline
+
+    Returns:
+        JSON-serializable dictionary suitable for model_cache_key
+    """
+    params = {}
+    for name, value in estimator.get_params(deep=True).items():
+        if hasattr(value, 'get_params'):
+            value = f'{type(value).__module__}.{type(value).__name__}'
+        elif isinstance(value, list):
+            # Pipeline steps and ColumnTransformer transformers: keep names, columns and classes
+            value = [
+                [f'{type(item).__module__}.{type(item).__name__}' if hasattr(item, 'get_params') else item for item in entry]
+                if isinstance(entry, tuple) else entry
+                for entry in value
+            ]
+        params[name] = value
+    return {'class': f'{type(estimator).__module__}.{type(estimator).__name__}', 'params': params}
+
+
+def model_cache_key(data: Any, spec: Any, params: Any = None) -> str:
+    """
+    Content-addressed key for a trained model.
+
+    Args:
+        data: Training data (DataFrames and arrays are hashed by content)
+        spec: Feature and preprocessing specification
+        params: Hyperparameters, e.g. estimator_spec(model)
+
+    Returns:
+        Hex digest that changes whenever the data, spec, params or scikit-learn version does
+    """
+    import sklearn
+
+    return content_hash('model', sklearn.__version__, data, spec, params)
+
+
+class ModelCache:
+    """
+    Directory of joblib model artifacts keyed by model_cache_key.
+
+    Layout:
+        <key[:2]>/<key>.joblib   Uncompressed joblib dump, so NumPy arrays load memory-mapped
+        <key[:2]>/<key>.json     Metadata (fit time, metrics, anything the caller records)
+        tags/<name>.json         Latest key published under a model name (see tag/resolve)
+
+    Artifacts are written to a temporary file and renamed into place, so a crashed or
+    concurrent run never leaves a partial model behind.
+
+    Args:
+        directory: Cache root
+        mmap_mode: Passed to joblib.load; 'r' maps fitted arrays read-only instead of copying
+    """
+
+    def __init__(self, directory: str = DEFAULT_MODEL_CACHE_DIR, mmap_mode: Optional[str] = 'r'):
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.joblib')
+
+    def load(self, key: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        Return (model, metadata) for key, or None on a miss or an unreadable artifact.
+        """
+        import joblib
+
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+        except Exception as err:
+            print(f'Ignoring unreadable model artifact {path}: {err}')
+            return None
+
+        metadata = {}
+        metadata_path = path[:-len('.joblib')] + '.json'
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        return model, metadata
+
+    def save(self, key: str, model: Any, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store a model (and JSON metadata) under key; returns the artifact path.
+        """
+        import joblib
+
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        metadata = dict(metadata or {}, key=key, created_at=time.time())
+        metadata_path = path[:-len('.joblib')] + '.json'
+        _atomic_write(metadata_path, lambda f: f.write(json.dumps(metadata, indent=2, default=str).encode('utf-8')))
+        _atomic_write(path, lambda f: joblib.dump(model, f))
+        return path
+
+    def tag(self, name: str, key: str) -> None:
+        """
+        Publish key as the current model for name, e.g. the block that trained it.
+        """
+        path = os.path.join(self.directory, 'tags', f'{name}.json')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps({'key': key, 'tagged_at': time.time()}).encode('utf-8')
+        _atomic_write(path, lambda f: f.write(payload))
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Key last tagged under name, or None.
+        """
+        path = os.path.join(self.directory, 'tags', f'{name}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)['key']
+
+    def get_or_fit(
+        self,
+        key: str,
+        fit: Callable[[], Tuple[Any, Dict[str, Any]]],
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Load the model for key, or call fit() -> (model, metadata) and store its result.
+
+        Returns:
+            Tuple of (model, metadata); metadata['cache_hit'] tells which path was taken
+        """
+        cached = self.load(key)
+        if cached is not None:
+            model, metadata = cached
+            return model, dict(metadata, cache_hit=True)
+
+        start = time.perf_counter()
+        model, metadata = fit()
+        metadata = dict(metadata or {}, fit_seconds=time.perf_counter() - start)
+        self.save(key, model, metadata)
+
+        # Reload so the caller gets the same memory-mapped model a cache hit would
+        cached = self.load(key)
+        if cached is not None:
+            model = cached[0]
+        return model, dict(metadata, key=key, cache_hit=False)
+
+
+def _atomic_write(path: str, write: Callable[[Any], Any]) -> None:
+    # A unique temporary file per writer, so concurrent runs never replace each other's partial file
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,115 @@
+from typing import Callable, Iterable, List, Optional, Set
+
+
+def symbols_from_filenames(filenames: Iterable[str]) -> List[str]:
+    """
+    Map uploaded filenames (e.g. 'aapl.csv') to unique symbols, keeping first-seen order.
+    """
+    seen = set()
+    symbols = []
+    for filename in filenames:
+        symbol = filename.split('/')[-1].split('.')[0]
+        key = symbol.upper()
+        if symbol and key not in seen:
+            seen.add(key)
+            symbols.append(symbol)
+    return symbols
+
+
+def shard_symbols(
+    symbols: List[str],
+    shards: int = 1,
+    max_symbols_per_run: Optional[int] = None,
+) -> List[List[str]]:
+    """
+    Split symbols into contiguous, evenly sized batches.
+
+    Args:
+        symbols: Symbols to split
+        shards: Number of batches to produce
+        max_symbols_per_run: Upper bound on batch size; adds batches when exceeded
+
+    Returns:
+        List of non-empty symbol lists
+    """
+    if not symbols:
+        return []
+
+    shards = max(1, shards)
+    if max_symbols_per_run:
+        shards = max(shards, -(-len(symbols) // max_symbols_per_run))
+    shards = min(shards, len(symbols))
+
+    size, remainder = divmod(len(symbols), shards)
+    batches = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < remainder else 0)
+        batches.append(symbols[start:end])
+        start = end
+    return batches
+
+
+def active_run_symbols(pipeline_uuid: str) -> Set[str]:
+    """
+    Symbols carried by runs of the pipeline that are queued or still running.
+
+    Reads the 'symbols' (batched) and 'symbol' (single) runtime variables of each active run.
+    """
+    from mage_ai.orchestration.db.models.schedules import PipelineRun
+
+    runs = PipelineRun.query.filter(
+        PipelineRun.pipeline_uuid == pipeline_uuid,
+        PipelineRun.status.in_([
+            PipelineRun.PipelineRunStatus.INITIAL,
+            PipelineRun.PipelineRunStatus.RUNNING,
+        ]),
+    ).all()
+
+    symbols = set()
+    for run in runs:
+        variables = run.variables or {}
+        if variables.get('symbol'):
+            symbols.add(str(variables['symbol']).upper())
+        for symbol in variables.get('symbols') or []:
+            symbols.add(str(symbol).upper())
+    return symbols
+
+
+def trigger_symbol_batches(
+    pipeline_uuid: str,
+    symbols: List[str],
+    trigger: Callable,
+    shards: int = 1,
+    max_symbols_per_run: Optional[int] = None,
+    dedupe_active: bool = True,
+    **trigger_kwargs,
+) -> List[List[str]]:
+    """
+    Coalesce symbols into one (or a few sharded) pipeline runs that carry a symbol list.
+
+    Args:
+        pipeline_uuid: Pipeline to trigger
+        symbols: Symbols to process
+        trigger: trigger_pipeline (or a compatible stand-in)
+        shards: Number of runs to spread the symbols over
+        max_symbols_per_run: Upper bound on symbols per run
+        dedupe_active: Skip symbols already carried by a queued or running run
+        **trigger_kwargs: Passed through to trigger (check_status, poll_interval, ...)
+
+    Returns:
+        The symbol list of each triggered run
+    """
+    if dedupe_active and symbols:
+        active = active_run_symbols(pipeline_uuid)
+        skipped = [symbol for symbol in symbols if symbol.upper() in active]
+        if skipped:
+            print(f'Skipping {len(skipped)} symbol(s) already queued or running: {", ".join(skipped)}')
+        symbols = [symbol for symbol in symbols if symbol.upper() not in active]
+
+    batches = shard_symbols(symbols, shards=shards, max_symbols_per_run=max_symbols_per_run)
+    for batch in batches:
+        trigger(pipeline_uuid, variables={'symbols': batch}, **trigger_kwargs)
+        print(f'Triggered {pipeline_uuid} for {len(batch)} symbol(s)')
+
+    return batches
@@ -0,0 +1,598 @@
+"""
+Change-data-capture reader for a PostgreSQL logical replication slot (pgoutput).
+
+Run as a service that writes each micro-batch of changes to Parquet:
+
+    python -m utils.postgres_cdc --output-dir cdc --tables public.account_holdings
+"""
+import argparse
+import json
+import os
+import struct
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.postgres_copy import quote_identifier
+
+DEFAULT_SOURCE_CONFIG = os.path.join('data_loaders', 'delightful_pine.yaml')
+DEFAULT_SLOT_NAME = 'mage_cdc'
+DEFAULT_PUBLICATION_NAME = 'mage_cdc'
+DEFAULT_CHECKPOINT_PATH = os.path.join('checkpoints', 'delightful_pine.json')
+
+OPERATION_COLUMN = '_op'
+LSN_COLUMN = '_lsn'
+COMMIT_TIME_COLUMN = '_commit_time'
+UNCHANGED_COLUMN = '_unchanged'
+
+# Placeholder for an unchanged TOASTed value ('u'), which pgoutput does not resend; unlike
+# None it must never be written as NULL
+UNCHANGED_TOAST = object()
+
+# Microseconds between the Unix epoch and the PostgreSQL epoch (2000-01-01)
+POSTGRES_EPOCH_OFFSET_US = 946_684_800_000_000
+
+# Arrow types for the text representation of common PostgreSQL type OIDs; others stay strings
+ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(),
+    21: pa.int16(),
+    23: pa.int32(),
+    700: pa.float32(),
+    701: pa.float64(),
+    1082: pa.date32(),
+    1114: pa.timestamp('us'),
+    1184: pa.timestamp('us', tz='UTC'),
+}
+NUMERIC_OID = 1700
+
+
+def lsn_to_int(lsn: str) -> int:
+    high, low = lsn.split('/')
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def lsn_to_str(lsn: int) -> str:
+    return f'{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}'
+
+
+class PgOutputDecoder:
+    """
+    Decode pgoutput (protocol version 1) messages into per-table change batches.
+
+    Changes are buffered per relation as text columns and only become visible to
+    take_batches() once their transaction has committed, so a batch never holds part
+    of a transaction.
+
+    An UPDATE that leaves a large (TOASTed) value alone doesn't resend it. Such values are
+    filled from the previous image of the same key in the batch when there is one;
+    otherwise they stay null and their column names are listed in the row's _unchanged
+    column, meaning "keep the current value", not NULL.
+
+    Args:
+        tables: Optional 'schema.table' names to keep; other relations are ignored
+    """
+
+    def __init__(self, tables: Optional[Iterable[str]] = None):
+        self.tables = set(tables) if tables else None
+        self.relations: Dict[int, Dict[str, Any]] = {}
+        self.last_commit_lsn = 0
+        self.committed_rows = 0
+        self._transaction: Dict[int, List] = {}
+        self._committed: Dict[int, Dict[str, List]] = {}
+        self._transaction_lsn = 0
+        self._commit_time = 0
+        # Latest values per key of every relation in the current batch, for unchanged TOAST values
+        self._images: Dict[int, Dict[tuple, List]] = {}
+
+    def decode(self, payload: bytes) -> Optional[str]:
+        """
+        Decode one message; returns its type character ('B', 'C', 'I', ...).
+        """
+        kind = chr(payload[0])
+        handler = getattr(self, f'_decode_{kind}', None)
+        if handler is not None:
+            handler(memoryview(payload)[1:])
+        return kind
+
+    def take_batches(self) -> Dict[str, pa.RecordBatch]:
+        """
+        Return the committed changes as one Arrow record batch per table and reset them.
+
+        Each batch has the table's columns plus _op ('I', 'U' or 'D'), _lsn (end LSN of the
+        transaction's commit, as checkpointed), _commit_time and _unchanged (columns not sent
+        for the row, see the class docstring).
+        """
+        batches = {}
+        for oid, columns in self._committed.items():
+            relation = self.relations[oid]
+            arrays = [pa.array(columns[OPERATION_COLUMN], pa.string())]
+            arrays.append(pa.array(columns[LSN_COLUMN], pa.uint64()))
+            commit_times = pa.array(columns[COMMIT_TIME_COLUMN], pa.int64())
+            arrays.append(pc.add(commit_times, POSTGRES_EPOCH_OFFSET_US).cast(pa.timestamp('us', tz='UTC')))
+            arrays.append(pa.array(columns[UNCHANGED_COLUMN], pa.list_(pa.string())))
+            names = [OPERATION_COLUMN, LSN_COLUMN, COMMIT_TIME_COLUMN, UNCHANGED_COLUMN]
+
+            for index, column in enumerate(relation['columns']):
+                arrays.append(_typed_array(column, columns['values'][index]))
+                names.append(column['name'])
+
+            batches[relation['qualified_name']] = pa.RecordBatch.from_arrays(arrays, names=names)
+
+        self._committed = {}
+        self._images = {}
+        self.committed_rows = 0
+        return batches
+
+    def _decode_B(self, body: memoryview) -> None:
+        self._transaction_lsn, self._commit_time = struct.unpack_from('>Qq', body)
+        self._transaction = {}
+
+    def _decode_C(self, body: memoryview) -> None:
+        _, _, end_lsn, _ = struct.unpack_from('>bQQq', body)
+        for oid, rows in self._transaction.items():
+            columns = self._committed.setdefault(oid, self._empty_columns(oid))
+            names = [column['name'] for column in self.relations[oid]['columns']]
+            for operation, values in rows:
+                columns[OPERATION_COLUMN].append(operation)
+                columns[LSN_COLUMN].append(end_lsn)
+                columns[COMMIT_TIME_COLUMN].append(self._commit_time)
+                columns[UNCHANGED_COLUMN].append([
+                    name for name, value in zip(names, values) if value is UNCHANGED_TOAST
+                ])
+                for index, value in enumerate(values):
+                    columns['values'][index].append(None if value is UNCHANGED_TOAST else value)
+                self.committed_rows += 1
+        self._transaction = {}
+        self.last_commit_lsn = end_lsn
+
+    def _decode_R(self, body: memoryview) -> None:
+        oid, = struct.unpack_from('>I', body)
+        offset = 4
+        namespace, offset = _read_string(body, offset)
+        name, offset = _read_string(body, offset)
+        offset += 1  # replica identity setting
+        column_count, = struct.unpack_from('>h', body, offset)
+        offset += 2
+
+        columns = []
+        for _ in range(column_count):
+            flags = body[offset]
+            column_name, offset = _read_string(body, offset + 1)
+            type_oid, type_modifier = struct.unpack_from('>Ii', body, offset)
+            offset += 8
+            columns.append(dict(name=column_name, type_oid=type_oid, type_modifier=type_modifier, key=bool(flags & 1)))
+
+        # pgoutput sends an empty namespace for pg_catalog
+        qualified_name = f'{namespace or "pg_catalog"}.{name}'
+        previous = self.relations.get(oid)
+        if previous and [c['name'] for c in previous['columns']] != [c['name'] for c in columns]:
+            if oid in self._committed or oid in self._transaction:
+                raise RuntimeError(f'Schema of {qualified_name} changed inside a batch; flush before DDL')
+        self.relations[oid] = dict(qualified_name=qualified_name, columns=columns)
+
+    def _decode_I(self, body: memoryview) -> None:
+        oid, = struct.unpack_from('>I', body)
+        # body[4] is 'N' (new tuple)
+        values, _ = _read_tuple(body, 5)
+        self._add_change(oid, 'I', values)
+
+    def _decode_U(self, body: memoryview) -> None:
+        oid, = struct.unpack_from('>I', body)
+        offset = 4
+        if chr(body[offset]) in ('K', 'O'):
+            _, offset = _read_tuple(body, offset + 1)
+        values, _ = _read_tuple(body, offset + 1)
+        self._add_change(oid, 'U', values)
+
+    def _decode_D(self, body: memoryview) -> None:
+        oid, = struct.unpack_from('>I', body)
+        # Only the key (or full old row with REPLICA IDENTITY FULL) is sent; other columns are null
+        values, _ = _read_tuple(body, 5)
+        self._add_change(oid, 'D', values)
+
+    def _add_change(self, oid: int, operation: str, values: List[Optional[str]]) -> None:
+        relation = self.relations.get(oid)
+        if relation is None or (self.tables is not None and relation['qualified_name'] not in self.tables):
+            return
+
+        images = self._images.setdefault(oid, {})
+        key = tuple(value for value, column in zip(values, relation['columns']) if column['key'])
+        if operation == 'D':
+            images.pop(key, None)
+        else:
+            previous = images.get(key)
+            if previous is not None:
+                values = [old if value is UNCHANGED_TOAST else value for value, old in zip(values, previous)]
+            images[key] = values
+        self._transaction.setdefault(oid, []).append((operation, values))
+
+    def _empty_columns(self, oid: int) -> Dict[str, List]:
+        return {
+            OPERATION_COLUMN: [],
+            LSN_COLUMN: [],
+            COMMIT_TIME_COLUMN: [],
+            UNCHANGED_COLUMN: [],
+            'values': [[] for _ in self.relations[oid]['columns']],
+        }
+
+
+class LogicalReplicationReader:
+    """
+    Consume a pgoutput replication slot and hand off committed changes in micro-batches.
+
+    A batch is flushed once it holds max_batch_rows committed rows, max_batch_seconds have
+    passed, or the stream has been idle for idle_timeout seconds. The checkpoint LSN is
+    written atomically and confirmed to the server only once the changes are stored, so a
+    crash replays the unconfirmed changes instead of losing them (at-least-once delivery).
+    With confirm=True (the default) that is when the handler returns, so the handler must
+    store each batch durably; with confirm=False nothing is confirmed until the caller
+    passes the returned LSN to confirm_lsn() after storing the changes itself.
+
+    Args:
+        connect: Function returning a psycopg2 LogicalReplicationConnection
+        slot_name: Replication slot, created on first use
+        publication_name: Publication the slot streams
+        checkpoint_path: JSON file holding the last confirmed LSN
+        tables: Optional 'schema.table' names to keep
+        max_batch_rows: Committed rows per micro-batch
+        max_batch_seconds: Maximum age of a non-empty micro-batch
+        idle_timeout: Seconds without messages after which read_available() returns
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        slot_name: str = DEFAULT_SLOT_NAME,
+        publication_name: str = DEFAULT_PUBLICATION_NAME,
+        checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+        tables: Optional[Sequence[str]] = None,
+        max_batch_rows: int = 50_000,
+        max_batch_seconds: float = 5.0,
+        idle_timeout: float = 2.0,
+    ):
+        self.connect = connect
+        self.slot_name = slot_name
+        self.publication_name = publication_name
+        self.checkpoint_path = checkpoint_path
+        self.tables = list(tables) if tables else None
+        self.max_batch_rows = max_batch_rows
+        self.max_batch_seconds = max_batch_seconds
+        self.idle_timeout = idle_timeout
+        self.stats = dict(messages=0, batches=0, rows=0, skipped_transactions=0)
+
+    def read_available(self, handler: Callable[[Dict[str, pa.RecordBatch], int], Any], confirm: bool = True) -> int:
+        """
+        Stream changes until the slot is idle, calling handler(batches, lsn) per micro-batch.
+
+        Args:
+            handler: Called with each micro-batch and its commit LSN
+            confirm: Checkpoint and confirm each micro-batch once handler returns
+
+        Returns:
+            The LSN everything read so far is covered by (checkpointed only if confirm)
+        """
+        from psycopg2 import errors
+
+        checkpoint = load_checkpoint(self.checkpoint_path)
+        handed_off = False
+        decoder = PgOutputDecoder(self.tables)
+        connection = self.connect()
+        cursor = connection.cursor()
+        try:
+            try:
+                cursor.create_replication_slot(self.slot_name, output_plugin='pgoutput')
+            except errors.DuplicateObject:
+                pass
+
+            cursor.start_replication(
+                slot_name=self.slot_name,
+                decode=False,
+                start_lsn=checkpoint,
+                options={'proto_version': '1', 'publication_names': self.publication_name},
+            )
+            if checkpoint:
+                # Tell the server about an LSN confirmed with confirm_lsn() since the last run
+                cursor.send_feedback(flush_lsn=checkpoint)
+
+            batch_started = None
+            last_message = time.monotonic()
+            while True:
+                message = cursor.read_message()
+                now = time.monotonic()
+
+                if message is not None:
+                    last_message = now
+                    self.stats['messages'] += 1
+                    kind = decoder.decode(message.payload)
+                    if kind == 'C' and decoder.last_commit_lsn <= checkpoint:
+                        # Replayed transaction that was already handed off before a restart
+                        decoder.take_batches()
+                        self.stats['skipped_transactions'] += 1
+                        continue
+                    if kind == 'C' and decoder.committed_rows and batch_started is None:
+                        batch_started = now
+                elif now - last_message >= self.idle_timeout:
+                    break
+                else:
+                    _wait_readable(connection, min(self.idle_timeout, 0.5))
+
+                due = decoder.committed_rows >= self.max_batch_rows or (
+                    batch_started is not None and now - batch_started >= self.max_batch_seconds
+                )
+                if due:
+                    checkpoint = self._flush(decoder, cursor, handler, confirm)
+                    handed_off = True
+                    batch_started = None
+
+            if decoder.committed_rows:
+                checkpoint = self._flush(decoder, cursor, handler, confirm)
+            elif decoder.last_commit_lsn > checkpoint:
+                # Only filtered-out or empty transactions since the last batch. Unless there is
+                # unconfirmed data before them, advance so the server can recycle WAL
+                checkpoint = decoder.last_commit_lsn
+                if confirm or not handed_off:
+                    save_checkpoint(checkpoint, self.checkpoint_path)
+                    cursor.send_feedback(flush_lsn=checkpoint)
+        finally:
+            cursor.close()
+            connection.close()
+
+        return checkpoint
+
+    def _flush(self, decoder: PgOutputDecoder, cursor: Any, handler: Callable, confirm: bool) -> int:
+        lsn = decoder.last_commit_lsn
+        batches = decoder.take_batches()
+        handler(batches, lsn)
+
+        if confirm:
+            save_checkpoint(lsn, self.checkpoint_path)
+            cursor.send_feedback(flush_lsn=lsn)
+        self.stats['batches'] += 1
+        self.stats['rows'] += sum(batch.num_rows for batch in batches.values())
+        return lsn
+
+
+def replication_connection_factory(config: Dict[str, Any]) -> Callable[[], Any]:
+    """
+    Return a function opening a logical replication connection for a Mage source config.
+    """
+    import psycopg2
+    from psycopg2.extras import LogicalReplicationConnection
+
+    def connect():
+        return psycopg2.connect(
+            host=config['host'],
+            port=config.get('port', 5432),
+            dbname=config['database'],
+            user=config['username'],
+            password=config['password'],
+            connection_factory=LogicalReplicationConnection,
+        )
+
+    return connect
+
+
+def ensure_publication(connect: Callable[[], Any], publication_name: str, tables: Sequence[str]) -> None:
+    """
+    Create the publication for the given 'schema.table' names if it does not exist.
+    """
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_publication WHERE pubname = %s', (publication_name,))
+            if cursor.fetchone() is None:
+                table_list = ', '.join(
+                    '.'.join(quote_identifier(part) for part in table.split('.', 1)) for table in tables
+                )
+                cursor.execute(f'CREATE PUBLICATION {quote_identifier(publication_name)} FOR TABLE {table_list}')
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def compact_changes(batch: pa.Table, keys: Sequence[str]) -> pa.Table:
+    """
+    Keep only the last change per key, so applying a batch touches each row once.
+
+    Unchanged TOAST values (listed in _unchanged) are first taken from the latest earlier
+    change of the same key that did carry the column; columns still listed afterwards must
+    be left as they are by whatever applies the batch.
+    """
+    import polars as pl
+
+    df = pl.from_arrow(batch)
+    keys = list(keys)
+    if UNCHANGED_COLUMN in df.columns and df.get_column(UNCHANGED_COLUMN).list.len().sum():
+        df = df.with_row_index('__row__')
+        resolved = []
+        for column in df.columns:
+            if column in keys or column.startswith('_'):
+                continue
+            unchanged = pl.col(UNCHANGED_COLUMN).list.contains(column)
+            # Row that last carried a value (possibly a real NULL) for this column, per key
+            source = pl.when(~unchanged).then(pl.col('__row__')).forward_fill().over(keys)
+            df = df.with_columns(
+                pl.when(unchanged & source.is_not_null())
+                .then(pl.col(column).gather(source.fill_null(0)))
+                .otherwise(pl.col(column))
+                .alias(column),
+                pl.when(unchanged & source.is_not_null()).then(pl.lit(column)).alias(f'__resolved_{column}'),
+            )
+            resolved.append(f'__resolved_{column}')
+        if resolved:
+            df = df.with_columns(
+                pl.col(UNCHANGED_COLUMN).list.set_difference(pl.concat_list(resolved).list.drop_nulls())
+            )
+        df = df.drop(['__row__'] + resolved)
+    return df.unique(subset=keys, keep='last', maintain_order=True).to_arrow()
+
+
+def load_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return lsn_to_int(json.load(f)['lsn'])
+
+
+def confirm_lsn(lsn: int, checkpoint_path: str = DEFAULT_CHECKPOINT_PATH) -> None:
+    """
+    Mark the changes up to lsn as stored, after read_available(..., confirm=False).
+
+    The server is told on the next read, after which it may discard the WAL. Never moves the
+    checkpoint backwards.
+    """
+    if lsn > load_checkpoint(checkpoint_path):
+        save_checkpoint(lsn, checkpoint_path)
+
+
+def confirm_changes(changes: Dict[str, Any], checkpoint_path: str = DEFAULT_CHECKPOINT_PATH) -> Optional[int]:
+    """
+    confirm_lsn() for the largest _lsn of a loader's changes, once they are stored.
+
+    Args:
+        changes: Dictionary mapping 'schema.table' to a Polars DataFrame of changes
+        checkpoint_path: JSON file holding the last confirmed LSN
+
+    Returns:
+        The confirmed LSN, or None if there were no changes
+    """
+    lsns = [frame.get_column(LSN_COLUMN).max() for frame in changes.values() if frame.height]
+    if not lsns:
+        return None
+    lsn = int(max(lsns))
+    confirm_lsn(lsn, checkpoint_path)
+    return lsn
+
+
+def save_checkpoint(lsn: int, path: str) -> None:
+    """
+    Write the checkpoint atomically so a crash never leaves a truncated file behind.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'lsn': lsn_to_str(lsn), 'updated_at': time.time()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_string(body: memoryview, offset: int):
+    end = offset
+    while body[end] != 0:
+        end += 1
+    return bytes(body[offset:end]).decode('utf-8'), end + 1
+
+
+def _read_tuple(body: memoryview, offset: int):
+    column_count, = struct.unpack_from('>h', body, offset)
+    offset += 2
+    values = []
+    for _ in range(column_count):
+        kind = chr(body[offset])
+        offset += 1
+        if kind == 't':
+            length, = struct.unpack_from('>i', body, offset)
+            offset += 4
+            values.append(bytes(body[offset:offset + length]).decode('utf-8'))
+            offset += length
+        elif kind == 'u':
+            values.append(UNCHANGED_TOAST)
+        else:
+            # 'n' is NULL
+            values.append(None)
+    return values, offset
+
+
+def _typed_array(column: Dict[str, Any], values: List[Optional[str]]) -> pa.Array:
+    # The Arrow type depends only on the column's PostgreSQL type, never on the values, so
+    # every micro-batch of a table has the same schema
+    type_oid, type_modifier = column['type_oid'], column['type_modifier']
+    strings = pa.array(values, pa.string())
+    if type_oid == 16:
+        return pc.equal(strings, 't')
+    if type_oid == NUMERIC_OID and type_modifier >= 4:
+        precision, scale = (type_modifier - 4) >> 16, (type_modifier - 4) & 0xFFFF
+        target = pa.decimal128(precision, scale) if precision <= 38 else None
+    elif type_oid == 1184:
+        # '2024-01-02 03:04:05+00' -> '+00:00', which Arrow's parser accepts
+        strings = pc.replace_substring_regex(strings, r'([+-]\d\d)$', r'\1:00')
+        target = ARROW_TYPES[type_oid]
+    else:
+        target = ARROW_TYPES.get(type_oid)
+
+    if target is None:
+        return strings
+    try:
+        return strings.cast(target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        pass
+
+    # Values Arrow can't parse (e.g. 'infinity' timestamps or 'NaN' numerics) become null
+    typed = []
+    for value in strings.to_pylist():
+        try:
+            typed.append(None if value is None else pa.array([value], pa.string()).cast(target)[0].as_py())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            typed.append(None)
+    array = pa.array(typed, target)
+    print(f"{array.null_count - strings.null_count} value(s) of {column['name']} could not be read as {target}; set to null")
+    return array
+
+
+def _wait_readable(connection: Any, timeout: float) -> None:
+    import select
+
+    select.select([connection], [], [], timeout)
+
+
+def main() -> None:
+    import pyarrow.parquet as pq
+
+    from utils.postgres_copy import connection_factory, load_destination_config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', default=DEFAULT_SOURCE_CONFIG)
+    parser.add_argument('--tables', nargs='+', required=True, help='schema.table names to capture')
+    parser.add_argument('--output-dir', default='cdc')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument('--max-batch-rows', type=int, default=50_000)
+    parser.add_argument('--max-batch-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    config = load_destination_config(args.config)
+    slot_name = config.get('replication_slot') or DEFAULT_SLOT_NAME
+    publication_name = config.get('publication_name') or DEFAULT_PUBLICATION_NAME
+
+    ensure_publication(connection_factory(config), publication_name, args.tables)
+    reader = LogicalReplicationReader(
+        replication_connection_factory(config),
+        slot_name=slot_name,
+        publication_name=publication_name,
+        checkpoint_path=args.checkpoint,
+        tables=args.tables,
+        max_batch_rows=args.max_batch_rows,
+        max_batch_seconds=args.max_batch_seconds,
+        idle_timeout=float('inf'),
+    )
+
+    def write_batches(batches: Dict[str, pa.RecordBatch], lsn: int) -> None:
+        for table, batch in batches.items():
+            directory = os.path.join(args.output_dir, table)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'{lsn:020d}.parquet')
+            pq.write_table(pa.Table.from_batches([batch]), f'{path}.tmp')
+            os.replace(f'{path}.tmp', path)
+            print(f'{table}: {batch.num_rows} change(s) up to {lsn_to_str(lsn)}')
+
+    reader.read_available(write_batches)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import polars as pl
+
+DEFAULT_DESTINATION_CONFIG = os.path.join('data_exporters', 'sublime_silence.yaml')
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def load_destination_config(path: str = DEFAULT_DESTINATION_CONFIG) -> Dict[str, Any]:
+    """
+    Read the connection settings of a Mage PostgreSQL source or destination file (config: {...}).
+    """
+    import yaml
+
+    with open(path) as f:
+        return yaml.safe_load(f)['config']
+
+
+def connection_factory(config: Dict[str, Any]) -> Callable[[], Any]:
+    """
+    Return a function opening a new psycopg2 connection for the destination config.
+    """
+    import psycopg2
+
+    def connect():
+        return psycopg2.connect(
+            host=config['host'],
+            port=config.get('port', 5432),
+            dbname=config['database'],
+            user=config['username'],
+            password=config['password'],
+        )
+
+    return connect
+
+
+def to_polars(data: Any) -> pl.DataFrame:
+    if isinstance(data, pl.DataFrame):
+        return data
+    if isinstance(data, pl.LazyFrame):
+        return data.collect()
+
+    import pandas as pd
+    import pyarrow as pa
+
+    if isinstance(data, pd.DataFrame):
+        return pl.from_pandas(data)
+    if isinstance(data, (pa.Table, pa.RecordBatch)):
+        return pl.from_arrow(data)
+    raise TypeError(f'Expected a Polars, pandas or Arrow table, got {type(data)}')
+
+
+def iter_frame_chunks(
+    df: pl.DataFrame,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> Iterator[pl.DataFrame]:
+    """
+    Yield zero-copy slices of df holding at most chunk_rows rows and about chunk_bytes bytes.
+    """
+    if df.height == 0:
+        return
+
+    bytes_per_row = max(1.0, df.estimated_size() / df.height)
+    rows = max(1, min(chunk_rows, int(chunk_bytes / bytes_per_row)))
+    for offset in range(0, df.height, rows):
+        yield df.slice(offset, rows)
+
+
+def encode_csv(chunk: pl.DataFrame) -> bytes:
+    """
+    Encode a chunk for COPY ... (FORMAT csv) with Polars' native writer.
+
+    Nulls are written as unquoted empty fields, which COPY reads as NULL, while empty
+    strings are quoted and stay empty strings.
+    """
+    buffer = io.BytesIO()
+    chunk.write_csv(buffer, include_header=False, null_value='')
+    return buffer.getvalue()
+
+
+def postgres_type(dtype: Any) -> str:
+    """
+    PostgreSQL column type for a Polars dtype.
+    """
+    base = dtype.base_type() if hasattr(dtype, 'base_type') else dtype
+    if base == pl.Datetime:
+        return 'timestamptz' if getattr(dtype, 'time_zone', None) else 'timestamp'
+
+    types = {
+        pl.Int8: 'smallint',
+        pl.Int16: 'smallint',
+        pl.Int32: 'integer',
+        pl.Int64: 'bigint',
+        pl.UInt8: 'smallint',
+        pl.UInt16: 'integer',
+        pl.UInt32: 'bigint',
+        pl.UInt64: 'numeric',
+        pl.Float32: 'real',
+        pl.Float64: 'double precision',
+        pl.Boolean: 'boolean',
+        pl.Utf8: 'text',
+        pl.Categorical: 'text',
+        pl.Date: 'date',
+        pl.Time: 'time',
+        pl.Decimal: 'numeric',
+    }
+    if hasattr(pl, 'Enum'):
+        types[pl.Enum] = 'text'
+
+    for polars_type, pg_type in types.items():
+        if base == polars_type:
+            return pg_type
+    raise ValueError(f'No PostgreSQL type mapping for Polars dtype {dtype}')
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def copy_upsert(
+    data: Any,
+    table: str,
+    unique_columns: Sequence[str],
+    connect: Callable[[], Any],
+    schema: str = 'public',
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    workers: int = 4,
+    create_table: bool = True,
+    update_columns: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Bulk load a frame into PostgreSQL with COPY and upsert it into the target table.
+
+    The frame is cut into bounded chunks that workers stream with COPY FROM STDIN into an
+    unlogged staging table, each worker on its own connection. A single set-based
+    INSERT ... ON CONFLICT then moves the staged rows into the target, so readers of the
+    target only ever see the complete batch.
+
+    Args:
+        data: Polars, pandas or Arrow table
+        table: Target table
+        unique_columns: Conflict key; the target needs a unique index on these columns
+        connect: Function returning a new DB-API connection with psycopg2's copy_expert
+        schema: Schema of the target and staging tables
+        chunk_rows: Maximum rows per COPY chunk
+        chunk_bytes: Approximate maximum in-memory size of a chunk
+        workers: Concurrent COPY connections
+        create_table: Create the target (primary key on unique_columns) when missing
+        update_columns: Columns overwritten on conflict; defaults to every non-key column
+
+    Returns:
+        Dictionary with rows, chunks, bytes, copy_seconds and upsert_seconds
+    """
+    df = to_polars(data)
+    unique_columns = list(unique_columns)
+    missing = [column for column in unique_columns if column not in df.columns]
+    if missing:
+        raise ValueError(f'Unique columns not in frame: {", ".join(missing)}')
+
+    # Keep the last occurrence of each key; ON CONFLICT can't touch the same row twice
+    df = df.unique(subset=unique_columns, keep='last', maintain_order=True)
+
+    columns = df.columns
+    if update_columns is None:
+        update_columns = [column for column in columns if column not in unique_columns]
+
+    target = f'{quote_identifier(schema)}.{quote_identifier(table)}'
+    staging_name = f'{table}__staging_{uuid.uuid4().hex[:8]}'
+    staging = f'{quote_identifier(schema)}.{quote_identifier(staging_name)}'
+    column_list = ', '.join(quote_identifier(column) for column in columns)
+    column_definitions = ', '.join(
+        f'{quote_identifier(column)} {postgres_type(dtype)}' for column, dtype in zip(columns, df.dtypes)
+    )
+    key_list = ', '.join(quote_identifier(column) for column in unique_columns)
+
+    stats = dict(rows=df.height, chunks=0, bytes=0, copy_seconds=0.0, upsert_seconds=0.0)
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            if create_table:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {target} ({column_definitions}, PRIMARY KEY ({key_list}))'
+                )
+            cursor.execute(f'CREATE UNLOGGED TABLE {staging} ({column_definitions})')
+        connection.commit()
+
+        try:
+            start = time.perf_counter()
+            chunks = iter_frame_chunks(df, chunk_rows=chunk_rows, chunk_bytes=chunk_bytes)
+            copied = _parallel_copy(chunks, f'COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)', connect, workers)
+            stats['chunks'] = len(copied)
+            stats['bytes'] = sum(copied)
+            stats['copy_seconds'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            if update_columns:
+                assignments = ', '.join(
+                    f'{quote_identifier(column)} = EXCLUDED.{quote_identifier(column)}' for column in update_columns
+                )
+                conflict_action = f'DO UPDATE SET {assignments}'
+            else:
+                conflict_action = 'DO NOTHING'
+
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {staging}')
+                cursor.execute(
+                    f'INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {staging} '
+                    f'ON CONFLICT ({key_list}) {conflict_action}'
+                )
+                cursor.execute(f'DROP TABLE {staging}')
+            connection.commit()
+            stats['upsert_seconds'] = time.perf_counter() - start
+        except BaseException:
+            connection.rollback()
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {staging}')
+            connection.commit()
+            raise
+    finally:
+        connection.close()
+
+    return stats
+
+
+def _parallel_copy(
+    chunks: Iterator[pl.DataFrame],
+    copy_sql: str,
+    connect: Callable[[], Any],
+    workers: int,
+) -> List[int]:
+    """
+    COPY chunks on up to workers connections; at most 2 * workers chunks are held in memory.
+    """
+    workers = max(1, workers)
+    slots = threading.BoundedSemaphore(2 * workers)
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+    errors = []
+
+    def copy_chunk(chunk: pl.DataFrame) -> int:
+        try:
+            if not hasattr(local, 'connection'):
+                local.connection = connect()
+                with connections_lock:
+                    connections.append(local.connection)
+
+            payload = encode_csv(chunk)
+            with local.connection.cursor() as cursor:
+                cursor.copy_expert(copy_sql, io.BytesIO(payload))
+            local.connection.commit()
+            return len(payload)
+        except BaseException as err:
+            errors.append(err)
+            raise
+        finally:
+            slots.release()
+
+    futures = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pg-copy') as executor:
+            for chunk in chunks:
+                slots.acquire()
+                if errors:
+                    slots.release()
+                    break
+                futures.append(executor.submit(copy_chunk, chunk))
+        return [future.result() for future in futures]
+    finally:
+        for connection in connections:
+            connection.close()
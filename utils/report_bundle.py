@@ -0,0 +1,332 @@
+import html
+import importlib.util
+import json
+import os
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from utils.content_hash import content_hash
+
+MANIFEST_FILENAME = 'manifest.json'
+PLOTLY_JS_FILENAME = 'plotly.min.js'
+
+
+class ReportBundle:
+    """
+    Self-contained report bundle written to a subdirectory of output_dir named after its title.
+
+    Each bundle owns its subdirectory, so several reports can share one output_dir without
+    treating each other's files as stale.
+
+    Layout (under <output_dir>/<title slug>/):
+        index.html          Report page stitched together from cached section fragments
+        plotly.min.js       Plotly runtime shared by every interactive chart
+        sections/*.html     One HTML fragment per artifact
+        png/*.png           Static renders of every figure
+        tables/*.parquet    Summary tables and arrays
+        manifest.json       Artifact name -> input hash and written files
+
+    Every artifact is keyed by a content hash of its inputs. On rerun, artifacts whose hash
+    matches the manifest (and whose files still exist) are not serialized or rendered again.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        title: str = 'Report',
+        png: bool = True,
+        max_workers: Optional[int] = None,
+        png_scale: float = 1.0,
+    ):
+        self.output_dir = os.path.join(output_dir, _slug(title) or 'report')
+        self.title = title
+        self.png = png
+        self.max_workers = max_workers
+        self.png_scale = png_scale
+
+        self._artifacts: List[Dict[str, Any]] = []
+        self._manifest = self._load_manifest()
+
+    def add(self, name: str, artifact: Any, inputs: Any = None) -> None:
+        """
+        Register an artifact for the bundle.
+
+        Args:
+            name: Unique artifact name, e.g. 'price_volume_charts/AAPL'
+            artifact: Plotly figure (or its dict form), matplotlib figure, LazyFigure, DataFrame or array
+            inputs: Data the artifact was built from; defaults to the artifact itself
+        """
+        kind = _artifact_kind(artifact)
+        if kind is None:
+            print(f'Skipping report artifact {name}: unsupported type {type(artifact).__name__}')
+            return
+
+        if inputs is None:
+            inputs = artifact.key if kind == 'rendered' else artifact
+        key = content_hash(kind, name, inputs)
+        self._artifacts.append(dict(name=name, kind=kind, artifact=artifact, hash=key))
+
+    def add_all(self, results: Dict[str, Any], inputs: Optional[Dict[str, Any]] = None, prefix: str = '') -> None:
+        """
+        Register every artifact in a (possibly nested) block output dictionary.
+
+        Args:
+            results: Block output, e.g. {'correlation_heatmap': fig, 'price_volume_charts': {'AAPL': fig}}
+            inputs: Optional inputs per artifact name, using the same '/'-joined names
+            prefix: Name prefix used while recursing
+        """
+        inputs = inputs or {}
+        for key, value in results.items():
+            name = f'{prefix}{key}'
+            if isinstance(value, dict) and _artifact_kind(value) is None:
+                self.add_all(value, inputs=inputs, prefix=f'{name}/')
+            else:
+                self.add(name, value, inputs=inputs.get(name))
+
+    def write(self) -> Dict[str, Any]:
+        """
+        Write all stale artifacts, render PNGs in a process pool and rebuild index.html.
+
+        Returns:
+            Dictionary with the bundle path, written and skipped artifact names
+        """
+        for subdir in ['sections', 'png', 'tables']:
+            os.makedirs(os.path.join(self.output_dir, subdir), exist_ok=True)
+
+        js_path = os.path.join(self.output_dir, PLOTLY_JS_FILENAME)
+        if any(a['kind'] == 'plotly' for a in self._artifacts) and not os.path.exists(js_path):
+            from plotly.offline import get_plotlyjs
+
+            with open(js_path, 'w') as f:
+                f.write(get_plotlyjs())
+
+        previous = self._manifest.get('artifacts', {})
+        artifacts = {}
+        written = []
+        skipped = []
+        png_jobs = []
+
+        plotly_png = self.png and importlib.util.find_spec('kaleido') is not None
+        if self.png and not plotly_png:
+            print('kaleido is not installed; skipping PNG renders of Plotly figures')
+
+        for item in self._artifacts:
+            name = item['name']
+            files = _artifact_files(name, item['kind'], item['hash'], plotly_png)
+            cached = previous.get(name)
+
+            if cached and cached['hash'] == item['hash'] and all(
+                os.path.exists(os.path.join(self.output_dir, path)) for path in files.values()
+            ):
+                artifacts[name] = cached
+                skipped.append(name)
+                continue
+
+            self._write_artifact(item, files, png_jobs)
+            artifacts[name] = dict(hash=item['hash'], kind=item['kind'], files=files)
+            written.append(name)
+
+        if png_jobs:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(fn, *job_args) for fn, job_args in png_jobs]
+                for future in futures:
+                    error = future.result()
+                    if error:
+                        print(error)
+
+        self._remove_stale_files(previous, artifacts)
+        self._manifest = dict(title=self.title, artifacts=artifacts)
+        with open(os.path.join(self.output_dir, MANIFEST_FILENAME), 'w') as f:
+            json.dump(self._manifest, f, indent=2)
+
+        self._write_index(artifacts)
+
+        return dict(
+            path=os.path.join(self.output_dir, 'index.html'),
+            written=written,
+            skipped=skipped,
+        )
+
+    def _write_artifact(self, item: Dict[str, Any], files: Dict[str, str], png_jobs: List) -> None:
+        kind = item['kind']
+        artifact = item['artifact']
+
+        if kind == 'plotly':
+            fig = _to_plotly_figure(artifact)
+            fragment = fig.to_html(full_html=False, include_plotlyjs=False)
+            self._write_text(files['html'], fragment)
+            if 'png' in files:
+                png_jobs.append((
+                    _render_plotly_png,
+                    (fig.to_json(), os.path.join(self.output_dir, files['png']), self.png_scale),
+                ))
+
+        elif kind == 'rendered':
+            # LazyFigure: reuse its (possibly cached) bytes instead of pickling it to a worker
+            self._write_text(files['html'], f'<img src="{files["png"]}" alt="{html.escape(item["name"])}">')
+            with open(os.path.join(self.output_dir, files['png']), 'wb') as f:
+                f.write(artifact.render('png'))
+
+        elif kind == 'matplotlib':
+            self._write_text(files['html'], f'<img src="{files["png"]}" alt="{html.escape(item["name"])}">')
+            png_jobs.append((
+                _render_matplotlib_png,
+                (pickle.dumps(artifact), os.path.join(self.output_dir, files['png'])),
+            ))
+
+        elif kind == 'table':
+            df = _to_pandas_table(artifact)
+            df.to_parquet(os.path.join(self.output_dir, files['parquet']))
+            self._write_text(files['html'], df.to_html(border=0, classes='table', max_rows=200))
+
+    def _write_text(self, path: str, text: str) -> None:
+        with open(os.path.join(self.output_dir, path), 'w') as f:
+            f.write(text)
+
+    def _write_index(self, artifacts: Dict[str, Any]) -> None:
+        parts = [
+            '<!DOCTYPE html>',
+            '<html><head><meta charset="utf-8">',
+            f'<title>{html.escape(self.title)}</title>',
+        ]
+        if any(a['kind'] == 'plotly' for a in artifacts.values()):
+            parts.append(f'<script src="{PLOTLY_JS_FILENAME}"></script>')
+        parts.append('</head><body>')
+        parts.append(f'<h1>{html.escape(self.title)}</h1>')
+
+        for name, meta in artifacts.items():
+            parts.append(f'<section id="{_slug(name)}"><h2>{html.escape(name)}</h2>')
+            with open(os.path.join(self.output_dir, meta['files']['html'])) as f:
+                parts.append(f.read())
+            links = [
+                f'<a href="{path}">{label}</a>'
+                for label, path in meta['files'].items() if label != 'html'
+            ]
+            if links:
+                parts.append(f'<p>{" | ".join(links)}</p>')
+            parts.append('</section>')
+
+        parts.append('</body></html>')
+        self._write_text('index.html', '\n'.join(parts))
+
+    def _remove_stale_files(self, previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+        keep = set(path for meta in current.values() for path in meta['files'].values())
+        for meta in previous.values():
+            for path in meta.get('files', {}).values():
+                full_path = os.path.join(self.output_dir, path)
+                if path not in keep and os.path.exists(full_path):
+                    os.remove(full_path)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.output_dir, MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+
+
+def write_report_bundle(
+    results: Dict[str, Any],
+    output_dir: str,
+    inputs: Optional[Dict[str, Any]] = None,
+    title: str = 'Report',
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Write a block output dictionary as a report bundle.
+
+    Args:
+        results: Block output containing figures and tables
+        output_dir: Report directory; the bundle is written to a subdirectory named after title
+        inputs: Optional inputs per artifact name used as cache keys
+        title: Report title
+
+    Returns:
+        Dictionary with the bundle path, written and skipped artifact names
+    """
+    bundle = ReportBundle(output_dir, title=title, **kwargs)
+    bundle.add_all(results, inputs=inputs)
+    return bundle.write()
+
+
+def _artifact_kind(artifact: Any) -> Optional[str]:
+    if hasattr(artifact, 'to_plotly_json'):
+        return 'plotly'
+    if isinstance(artifact, dict) and 'data' in artifact and 'layout' in artifact:
+        return 'plotly'
+    if hasattr(artifact, 'render') and hasattr(artifact, 'key'):
+        return 'rendered'
+    if hasattr(artifact, 'savefig'):
+        return 'matplotlib'
+
+    module = type(artifact).__module__.split('.')[0]
+    if module in ('pandas', 'polars') and hasattr(artifact, 'columns'):
+        return 'table'
+    if module == 'numpy' and getattr(artifact, 'ndim', 0) in (1, 2):
+        return 'table'
+
+    return None
+
+
+def _artifact_files(name: str, kind: str, key: str, plotly_png: bool) -> Dict[str, str]:
+    stem = f'{_slug(name)}-{key[:16]}'
+    files = dict(html=f'sections/{stem}.html')
+    if kind == 'table':
+        files['parquet'] = f'tables/{stem}.parquet'
+    elif kind in ('matplotlib', 'rendered') or plotly_png:
+        files['png'] = f'png/{stem}.png'
+    return files
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')
+
+
+def _to_plotly_figure(artifact: Any):
+    import plotly.graph_objects as go
+
+    if isinstance(artifact, dict):
+        return go.Figure(artifact)
+    return artifact
+
+
+def _to_pandas_table(artifact: Any):
+    import pandas as pd
+
+    module = type(artifact).__module__.split('.')[0]
+    if module == 'polars':
+        return artifact.to_pandas()
+    if module == 'numpy':
+        df = pd.DataFrame(artifact)
+    else:
+        df = artifact.copy()
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def _render_plotly_png(fig_json: str, path: str, scale: float) -> Optional[str]:
+    try:
+        import plotly.io as pio
+
+        pio.from_json(fig_json).write_image(path, format='png', scale=scale)
+    except Exception as err:
+        return f'Error rendering PNG {path}: {err}'
+
+
+def _render_matplotlib_png(fig_pickle: bytes, path: str) -> Optional[str]:
+    try:
+        import matplotlib
+
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        fig = pickle.loads(fig_pickle)
+        fig.savefig(path, format='png', bbox_inches='tight')
+        plt.close(fig)
+    except Exception as err:
+        return f'Error rendering PNG {path}: {err}'
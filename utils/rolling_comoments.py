@@ -0,0 +1,112 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = (60, 120, 252)
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sliding-window sums along axis 0 from one cumulative sum: S[t] - S[t - window].
+    """
+    cumulative = np.cumsum(values, axis=0)
+    sums = cumulative.copy()
+    sums[window:] -= cumulative[:-window]
+    return sums
+
+
+def rolling_beta_correlation(
+    returns: np.ndarray,
+    market: np.ndarray,
+    window: int,
+    min_periods: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling beta and correlation of every column against a market series in O(T * N).
+
+    Each co-moment (count, sum x, sum y, sum x^2, sum y^2, sum xy) is turned into a
+    sliding-window sum with a single cumulative sum, so the cost does not depend on the
+    window length. Observations where either the ticker or the market is missing are
+    masked out pairwise, matching pandas' rolling cov/corr semantics.
+
+    Args:
+        returns: T x N array of ticker returns (NaN for missing)
+        market: Length-T array of market returns (NaN for missing)
+        window: Window length in rows
+        min_periods: Minimum valid observations per window, defaults to window
+
+    Returns:
+        Tuple of (beta, correlation), both T x N with NaN where the window is incomplete
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    if x.ndim == 1:
+        x = x[:, None]
+    y = np.asarray(market, dtype=np.float64).reshape(-1, 1)
+    min_periods = window if min_periods is None else min_periods
+
+    valid = ~np.isnan(x) & ~np.isnan(y)
+
+    # Center before accumulating so long cumulative sums don't cancel catastrophically
+    x = x - np.nanmean(x, axis=0)
+    y = y - np.nanmean(y)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+
+    n = _window_sums(valid.astype(np.float64), window)
+    sum_x = _window_sums(x, window)
+    sum_y = _window_sums(y, window)
+    sum_xx = _window_sums(x * x, window)
+    sum_yy = _window_sums(y * y, window)
+    sum_xy = _window_sums(x * y, window)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x * sum_x / n
+        var_y = sum_yy - sum_y * sum_y / n
+
+        # Clamp tiny negative variances produced by floating point error
+        var_x = np.maximum(var_x, 0.0)
+        var_y = np.maximum(var_y, 0.0)
+
+        beta = cov / var_y
+        corr = cov / np.sqrt(var_x * var_y)
+
+    incomplete = n < max(min_periods, 2)
+    beta[incomplete | (var_y == 0)] = np.nan
+    corr[incomplete | (var_x == 0) | (var_y == 0)] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+
+    return beta, corr
+
+
+def rolling_market_panels(
+    daily_returns: pd.DataFrame,
+    market_returns: pd.Series,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    min_periods: Optional[int] = None,
+) -> Dict[int, Dict[str, pd.DataFrame]]:
+    """
+    Build (date x ticker) rolling beta and correlation panels for several window lengths.
+
+    Args:
+        daily_returns: Returns indexed by date with one column per ticker
+        market_returns: Market returns aligned to the same index
+        windows: Window lengths in trading days
+        min_periods: Minimum valid observations per window, defaults to the window length
+
+    Returns:
+        Dictionary mapping window -> {'beta': DataFrame, 'correlation': DataFrame}
+    """
+    market = market_returns.reindex(daily_returns.index).to_numpy(dtype=np.float64)
+    values = daily_returns.to_numpy(dtype=np.float64)
+
+    panels = {}
+    for window in windows:
+        beta, corr = rolling_beta_correlation(values, market, window, min_periods=min_periods)
+        panels[window] = {
+            'beta': pd.DataFrame(beta, index=daily_returns.index, columns=daily_returns.columns),
+            'correlation': pd.DataFrame(corr, index=daily_returns.index, columns=daily_returns.columns),
+        }
+
+    return panels
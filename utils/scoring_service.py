@@ -0,0 +1,377 @@
+"""
+Serve a cached model: vectorized scoring, request micro-batching and a local HTTP endpoint.
+
+    python -m utils.scoring_service --model-name enchanting_stasis --port 8080
+
+    curl -s localhost:8080/predict -d '{"instances": [{"pclass": 3, "sex": "male", "age": 22}]}'
+
+Concurrent requests are queued and scored together: a batch closes when it reaches
+max_batch_size rows or when its oldest request has waited max_latency seconds, whichever
+comes first, so one predict_proba call serves many callers.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from utils.model_cache import DEFAULT_MODEL_CACHE_DIR, ModelCache
+
+DEFAULT_MAX_BATCH_SIZE = 512
+DEFAULT_MAX_LATENCY = 0.005
+
+# Models already loaded in this process: {(cache_dir, key): ScoringModel}
+_LOADED: Dict[Tuple[str, str], 'ScoringModel'] = {}
+
+
+class InvalidFeaturesError(ValueError):
+    """
+    Records the model can't score, e.g. a non-numeric value in a numerical feature.
+    """
+
+
+def prepare_features(records: Any) -> Any:
+    """
+    Turn raw records into the model's input frame; the Pipeline model preprocesses it itself.
+
+    pandas and polars frames pass through unchanged. A list of dicts becomes a polars frame,
+    with fields missing from some records as nulls, so they are imputed like missing values.
+
+    Args:
+        records: List of dicts, pandas DataFrame or polars DataFrame
+
+    Returns:
+        DataFrame ready for predict_proba
+    """
+    if isinstance(records, (pd.DataFrame, pl.DataFrame)):
+        return records
+    if not all(isinstance(record, dict) for record in records):
+        raise InvalidFeaturesError('Every instance must be an object of feature values')
+    return pl.from_dicts(records, infer_schema_length=None)
+
+
+class ScoringModel:
+    """
+    A fitted classifier pipeline, ready to score raw records.
+
+    Args:
+        model: Fitted estimator with predict_proba
+        key: Model cache key, reported by the HTTP endpoint
+    """
+
+    def __init__(self, model: Any, key: Optional[str] = None):
+        self.model = model
+        self.key = key
+
+    def score(self, records: Any) -> Dict[str, np.ndarray]:
+        """
+        Score records; returns prediction (class label) and probability (of the last class).
+
+        Raises:
+            InvalidFeaturesError: If the records can't be turned into features
+        """
+        try:
+            features = prepare_features(records)
+            if len(features) == 0:
+                return {'prediction': np.empty(0), 'probability': np.empty(0)}
+            probabilities = self.model.predict_proba(features)
+        except (ValueError, TypeError, pl.exceptions.PolarsError) as err:
+            if isinstance(err, InvalidFeaturesError):
+                raise
+            raise InvalidFeaturesError(f'{type(err).__name__}: {err}') from err
+        return {
+            'prediction': self.model.classes_[np.argmax(probabilities, axis=1)],
+            'probability': probabilities[:, -1],
+        }
+
+
+def load_scoring_model(
+    model_name: Optional[str] = None,
+    model_key: Optional[str] = None,
+    cache_dir: str = DEFAULT_MODEL_CACHE_DIR,
+) -> ScoringModel:
+    """
+    Load a model from the model cache once per process, by key or by the name it was tagged with.
+    """
+    cache = ModelCache(cache_dir)
+    key = model_key or (cache.resolve(model_name) if model_name else None)
+    if key is None:
+        raise ValueError(f'No model tagged {model_name!r} in {cache_dir}; run the training block first')
+
+    if (cache_dir, key) not in _LOADED:
+        cached = cache.load(key)
+        if cached is None:
+            raise ValueError(f'Model {key} is not in {cache_dir}')
+        model, metadata = cached
+        _LOADED[(cache_dir, key)] = ScoringModel(model, key)
+    return _LOADED[(cache_dir, key)]
+
+
+class _Request:
+    __slots__ = ('records', 'future', 'enqueued_at')
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Collect concurrent scoring requests into batches scored with one call.
+
+    A batch closes at max_batch_size rows or once its oldest request has waited max_latency
+    seconds. Requests are never split, so a single request above max_batch_size is scored
+    on its own. When a batch fails, its requests are scored one by one, so one request with
+    invalid features doesn't fail the others.
+
+    Args:
+        score: Function scoring a list of records, returning arrays aligned with them
+        max_batch_size: Rows per batch
+        max_latency: Seconds the first request of a batch may wait for others
+    """
+
+    def __init__(
+        self,
+        score: Callable[[List[Dict[str, Any]]], Dict[str, np.ndarray]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_latency: float = DEFAULT_MAX_LATENCY,
+    ):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.stats = {'batches': 0, 'rows': 0, 'requests': 0}
+
+        self._queue: 'queue.Queue[_Request]' = queue.Queue()
+        self._carry: Optional[_Request] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'MicroBatcher':
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, records: List[Dict[str, Any]]) -> Future:
+        """
+        Queue records for scoring; the future resolves to their slice of the batch result.
+        """
+        request = _Request(records)
+        self._queue.put(request)
+        return request.future
+
+    def _next(self, timeout: float) -> Optional[_Request]:
+        if self._carry is not None:
+            request, self._carry = self._carry, None
+            return request
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            first = self._next(timeout=0.1)
+            if first is None:
+                continue
+
+            batch, rows = [first], len(first.records)
+            deadline = first.enqueued_at + self.max_latency
+            while rows < self.max_batch_size:
+                request = self._next(timeout=max(deadline - time.perf_counter(), 0.0))
+                if request is None:
+                    break
+                if rows + len(request.records) > self.max_batch_size:
+                    self._carry = request
+                    break
+                batch.append(request)
+                rows += len(request.records)
+
+            self._score_batch(batch)
+
+    def _score_batch(self, batch: List[_Request]) -> None:
+        records = [record for request in batch for record in request.records]
+        try:
+            result = self.score(records)
+        except Exception as err:
+            if len(batch) > 1:
+                for request in batch:
+                    self._score_batch([request])
+                return
+            batch[0].future.set_exception(err)
+            return
+
+        start = 0
+        for request in batch:
+            stop = start + len(request.records)
+            request.future.set_result({name: values[start:stop] for name, values in result.items()})
+            start = stop
+
+        self.stats['batches'] += 1
+        self.stats['rows'] += len(records)
+        self.stats['requests'] += len(batch)
+
+
+class ScoringServer:
+    """
+    Local HTTP scoring endpoint on a background thread.
+
+    POST /predict  {"instances": [{...}, ...]} -> {"predictions": [...], "probabilities": [...]}
+    GET  /health   {"status": "ok", "model": key, "batches": ..., "rows": ...}
+
+    Args:
+        scoring_model: Model to serve
+        host: Interface to listen on
+        port: Port to listen on; 0 picks a free port (see .port)
+        max_batch_size: Rows per scoring batch
+        max_latency: Seconds a request may wait for others to join its batch
+        timeout: Seconds a request waits for its result before failing
+    """
+
+    def __init__(
+        self,
+        scoring_model: ScoringModel,
+        host: str = '127.0.0.1',
+        port: int = 8080,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_latency: float = DEFAULT_MAX_LATENCY,
+        timeout: float = 30.0,
+    ):
+        self.scoring_model = scoring_model
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.batcher = MicroBatcher(scoring_model.score, max_batch_size=max_batch_size, max_latency=max_latency)
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'ScoringServer':
+        self.batcher.start()
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='scoring-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self.batcher.stop()
+
+    def __enter__(self) -> 'ScoringServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so load tests and clients don't pay a TCP handshake per request
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path != '/health':
+                    return self._reply(404, {'error': f'Unknown path {self.path}'})
+                self._reply(200, dict(status='ok', model=server.scoring_model.key, **server.batcher.stats))
+
+            def do_POST(self):
+                if self.path != '/predict':
+                    return self._reply(404, {'error': f'Unknown path {self.path}'})
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                    instances = body['instances']
+                    if isinstance(instances, dict):
+                        instances = [instances]
+                    if not isinstance(instances, list):
+                        raise TypeError(f'instances is a {type(instances).__name__}')
+                except (ValueError, KeyError, TypeError) as err:
+                    return self._reply(400, {'error': f'Expected {{"instances": [...]}}: {err}'})
+
+                try:
+                    result = server.batcher.submit(instances).result(timeout=server.timeout)
+                except InvalidFeaturesError as err:
+                    return self._reply(400, {'error': f'Invalid features: {err}'})
+                except Exception as err:
+                    return self._reply(500, {'error': f'{type(err).__name__}: {err}'})
+
+                self._reply(200, {
+                    'predictions': result['prediction'].tolist(),
+                    'probabilities': result['probability'].tolist(),
+                })
+
+            def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def score_in_batches(scoring_model: ScoringModel, frame: Any, batch_size: int) -> Dict[str, np.ndarray]:
+    """
+    Score a whole frame (pandas or polars) in slices of batch_size rows, bounding peak memory.
+    """
+    predictions, probabilities = [], []
+    for start in range(0, len(frame), batch_size):
+        result = scoring_model.score(frame[start:start + batch_size])
+        predictions.append(result['prediction'])
+        probabilities.append(result['probability'])
+    if not predictions:
+        return {'prediction': np.empty(0), 'probability': np.empty(0)}
+    return {'prediction': np.concatenate(predictions), 'probability': np.concatenate(probabilities)}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-name', default='enchanting_stasis', help='Tag written by the training block')
+    parser.add_argument('--model-key', help='Serve this cache key instead of the tagged model')
+    parser.add_argument('--model-cache-dir', default=DEFAULT_MODEL_CACHE_DIR)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument('--max-latency-ms', type=float, default=DEFAULT_MAX_LATENCY * 1000)
+    args = parser.parse_args(argv)
+
+    scoring_model = load_scoring_model(args.model_name, args.model_key, args.model_cache_dir)
+    server = ScoringServer(
+        scoring_model,
+        host=args.host,
+        port=args.port,
+        max_batch_size=args.max_batch_size,
+        max_latency=args.max_latency_ms / 1000,
+    ).start()
+    print(f'Serving model {scoring_model.key} on http://{server.host}:{server.port}/predict')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
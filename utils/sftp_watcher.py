@@ -0,0 +1,271 @@
+"""
+Long-lived SFTP directory watcher.
+
+Run as a service that feeds new uploads straight into the trigger path:
+
+    python -m utils.sftp_watcher --remote-dir /upload --pipeline calculate_user_account_holdings
+"""
+import argparse
+import asyncio
+import inspect
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import paramiko
+
+TEMPORARY_SUFFIXES = ('.part', '.tmp', '.filepart', '.partial')
+
+
+class SFTPWatcher:
+    """
+    Watch one SFTP directory over a single long-lived connection.
+
+    Each check stats the directory first and only lists it when its mtime changed. Because
+    mtimes have one-second resolution, listing continues for mtime_granularity seconds after
+    a change so uploads landing in the same second are not missed. New files are held back
+    until their size has stayed the same for stable_checks consecutive checks, so partially
+    uploaded files are never emitted.
+
+    paramiko is blocking and its clients aren't thread-safe, so every SFTP call runs on one
+    dedicated worker thread and the event loop stays free.
+
+    Args:
+        hostname: SFTP server hostname
+        port: SFTP server port
+        username: SFTP username
+        password: SFTP password
+        remote_dir: Directory to watch
+        known_files: Filenames that were already processed
+        store: Optional KnownFilesStore; listings are checked against it and emitted files are
+            recorded in it, so known filenames don't have to be held in memory
+        on_new_files: Callback (sync or async) receiving each batch of stable new filenames
+        poll_interval: Seconds between checks
+        stable_checks: Consecutive checks a file size must stay unchanged before it is emitted
+        mtime_granularity: Seconds to keep listing after the directory mtime changed
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str,
+        password: str,
+        remote_dir: str = '/upload',
+        known_files: Optional[Iterable[str]] = None,
+        store: Any = None,
+        on_new_files: Optional[Callable[[List[str]], Any]] = None,
+        poll_interval: float = 2.0,
+        stable_checks: int = 2,
+        mtime_granularity: float = 2.0,
+        reconnect_delay: float = 5.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.remote_dir = remote_dir
+        self.known_files: Set[str] = set(known_files or [])
+        self.store = store
+        self.on_new_files = on_new_files
+        self.poll_interval = poll_interval
+        self.stable_checks = stable_checks
+        self.mtime_granularity = mtime_granularity
+        self.reconnect_delay = reconnect_delay
+
+        self.stats = dict(checks=0, listings=0, skipped_listings=0, emitted=0, reconnects=0)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sftp-watcher')
+        self._transport: Optional[paramiko.Transport] = None
+        self._sftp: Optional[paramiko.SFTPClient] = None
+        self._dir_mtime: Optional[int] = None
+        self._dir_mtime_seen_at = 0.0
+        # filename -> (last seen size, number of consecutive checks with that size)
+        self._pending: Dict[str, List[int]] = {}
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None, max_seconds: Optional[float] = None) -> None:
+        """
+        Check the directory every poll_interval seconds until stopped, emitting new files.
+        """
+        started = time.monotonic()
+        try:
+            while not (stop_event and stop_event.is_set()):
+                if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                    break
+                await self._emit(await self.check())
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            await self.close()
+
+    async def wait_for_new_files(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Return the first non-empty batch of stable new files, or [] after timeout seconds.
+        """
+        started = time.monotonic()
+        while True:
+            new_files = await self.check()
+            if new_files:
+                await self._emit(new_files)
+                return new_files
+            if timeout is not None and time.monotonic() - started >= timeout:
+                return []
+            await asyncio.sleep(self.poll_interval)
+
+    async def check(self) -> List[str]:
+        """
+        Run one check and return filenames that became stable since the last check.
+        """
+        self.stats['checks'] += 1
+        try:
+            return await self._call(self._check_sync)
+        except (OSError, EOFError, paramiko.SSHException) as err:
+            print(f'SFTP watcher lost its connection ({err}); reconnecting in {self.reconnect_delay}s')
+            await self._call(self._disconnect_sync)
+            self.stats['reconnects'] += 1
+            await asyncio.sleep(self.reconnect_delay)
+            return []
+
+    async def close(self) -> None:
+        await self._call(self._disconnect_sync)
+        self._executor.shutdown(wait=False)
+
+    async def _emit(self, filenames: List[str]) -> None:
+        if not filenames:
+            return
+        if self.on_new_files:
+            result = self.on_new_files(filenames)
+            if inspect.isawaitable(result):
+                await result
+        if self.store is not None:
+            await self._call(self.store.add_many, filenames)
+        else:
+            self.known_files.update(filenames)
+        self.stats['emitted'] += len(filenames)
+
+    async def _call(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _check_sync(self) -> List[str]:
+        sftp = self._connect_sync()
+        now = time.monotonic()
+
+        mtime = sftp.stat(self.remote_dir).st_mtime
+        if mtime != self._dir_mtime:
+            self._dir_mtime = mtime
+            self._dir_mtime_seen_at = now
+
+        sizes = {}
+        if now - self._dir_mtime_seen_at <= self.mtime_granularity or self._dir_mtime is None:
+            self.stats['listings'] += 1
+            for attrs in sftp.listdir_attr(self.remote_dir):
+                if self._is_candidate(attrs.filename):
+                    sizes[attrs.filename] = attrs.st_size
+            if self.store is not None:
+                unchecked = [filename for filename in sizes if filename not in self._pending]
+                known = set(unchecked) - set(self.store.filter_new(unchecked))
+                sizes = {filename: size for filename, size in sizes.items() if filename not in known}
+        else:
+            # Directory unchanged: only the sizes of files still being uploaded are needed
+            self.stats['skipped_listings'] += 1
+            for filename in list(self._pending):
+                try:
+                    sizes[filename] = sftp.stat(f'{self.remote_dir.rstrip("/")}/{filename}').st_size
+                except FileNotFoundError:
+                    pass
+
+        for filename in list(self._pending):
+            if filename not in sizes:
+                del self._pending[filename]
+
+        stable = []
+        for filename, size in sizes.items():
+            previous = self._pending.get(filename)
+            if previous is None:
+                self._pending[filename] = [size, 0]
+            elif previous[0] == size:
+                previous[1] += 1
+            else:
+                self._pending[filename] = [size, 0]
+
+            if self._pending[filename][1] >= self.stable_checks:
+                stable.append(filename)
+                del self._pending[filename]
+
+        return sorted(stable)
+
+    def _is_candidate(self, filename: str) -> bool:
+        return (
+            not filename.startswith('.')
+            and not filename.endswith(TEMPORARY_SUFFIXES)
+            and filename not in self.known_files
+        )
+
+    def _connect_sync(self) -> paramiko.SFTPClient:
+        if self._sftp is not None and self._transport is not None and self._transport.is_active():
+            return self._sftp
+
+        self._disconnect_sync()
+        self._transport = paramiko.Transport((self.hostname, self.port))
+        self._transport.set_keepalive(30)
+        self._transport.connect(username=self.username, password=self.password)
+        self._sftp = paramiko.SFTPClient.from_transport(self._transport)
+        return self._sftp
+
+    def _disconnect_sync(self) -> None:
+        if self._sftp is not None:
+            self._sftp.close()
+        if self._transport is not None:
+            self._transport.close()
+        self._sftp = None
+        self._transport = None
+
+
+def main() -> None:
+    from mage_ai.orchestration.triggers.api import trigger_pipeline
+
+    from utils.known_files_store import KnownFilesStore
+    from utils.pipeline_triggers import symbols_from_filenames, trigger_symbol_batches
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hostname', default='sftp')
+    parser.add_argument('--port', type=int, default=22)
+    parser.add_argument('--remote-dir', default='/upload')
+    parser.add_argument('--pipeline', default='calculate_user_account_holdings')
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    parser.add_argument('--stable-checks', type=int, default=2)
+    parser.add_argument('--shards', type=int, default=1)
+    parser.add_argument('--known-files', default='known_files.sqlite3', help='SQLite store of processed files')
+    args = parser.parse_args()
+
+    store = KnownFilesStore(args.known_files)
+    if not store.count():
+        store.import_json('known_files.json')
+
+    def on_new_files(filenames: List[str]) -> None:
+        print(f'New files: {", ".join(filenames)}')
+        trigger_symbol_batches(
+            args.pipeline,
+            symbols_from_filenames(filenames),
+            trigger_pipeline,
+            shards=args.shards,
+            check_status=False,
+            verbose=True,
+        )
+
+    watcher = SFTPWatcher(
+        args.hostname,
+        args.port,
+        os.getenv('SFTP_USER'),
+        os.getenv('SFTP_PASS'),
+        remote_dir=args.remote_dir,
+        store=store,
+        on_new_files=on_new_files,
+        poll_interval=args.poll_interval,
+        stable_checks=args.stable_checks,
+    )
+    asyncio.run(watcher.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+OBJECTIVE_F_BETA = 'f_beta'
+OBJECTIVE_UTILITY = 'utility'
+
+# Utility of each confusion cell; the default scores -1 per error, i.e. maximizes accuracy
+DEFAULT_UTILITY_WEIGHTS = {'tp': 0.0, 'fp': -1.0, 'fn': -1.0, 'tn': 0.0}
+
+
+def cumulative_counts(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    sample_weight: Optional[np.ndarray] = None,
+    pos_label: Any = 1,
+) -> Dict[str, Any]:
+    """
+    Sort scores once and count true and false positives at every distinct score.
+
+    Thresholding at a distinct score t predicts positive for every score >= t, so the counts
+    at all thresholds are prefix sums over the labels in descending score order. Each
+    threshold after that is a binary search instead of another pass over the data.
+
+    Args:
+        y_true: True labels
+        y_score: Predicted scores or probabilities of the positive class
+        sample_weight: Optional per-sample weights
+        pos_label: Label of the positive class
+
+    Returns:
+        Dictionary with thresholds (distinct scores, descending), tp and fp (predicted
+        positives at each threshold that are positive/negative), positives and negatives
+    """
+    y_true = np.asarray(y_true).ravel() == pos_label
+    y_score = np.asarray(y_score).ravel()
+    if y_true.shape != y_score.shape:
+        raise ValueError(f'y_true and y_score have different lengths: {y_true.shape[0]} != {y_score.shape[0]}')
+
+    # Tied scores collapse into one threshold below, so an unstable sort is fine
+    order = np.argsort(y_score)[::-1]
+    scores = y_score[order]
+    if sample_weight is None:
+        positive = y_true[order].astype(np.int64)
+        negative = 1 - positive
+    else:
+        weight = np.asarray(sample_weight, dtype=np.float64).ravel()[order]
+        positive = y_true[order] * weight
+        negative = weight - positive
+    del order
+
+    # Last index of each run of equal scores
+    ends = np.r_[np.flatnonzero(np.diff(scores)), scores.size - 1] if scores.size else np.empty(0, dtype=np.int64)
+    tp = np.cumsum(positive)[ends]
+    fp = np.cumsum(negative)[ends]
+
+    return dict(
+        thresholds=scores[ends],
+        tp=tp,
+        fp=fp,
+        positives=tp[-1] if tp.size else 0,
+        negatives=fp[-1] if fp.size else 0,
+    )
+
+
+def counts_at(counts: Dict[str, Any], thresholds: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Look up TP/FP/FN/TN at arbitrary thresholds (predict positive when score >= threshold).
+
+    Args:
+        counts: Output of cumulative_counts
+        thresholds: Thresholds to evaluate
+
+    Returns:
+        Dictionary with thresholds, tp, fp, fn and tn arrays aligned with thresholds
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64).ravel()
+    # Number of distinct scores >= each threshold; distinct scores are sorted descending
+    index = np.searchsorted(-counts['thresholds'], -thresholds, side='right')
+    tp = np.r_[0, counts['tp']][index]
+    fp = np.r_[0, counts['fp']][index]
+
+    return dict(
+        thresholds=thresholds,
+        tp=tp,
+        fp=fp,
+        fn=counts['positives'] - tp,
+        tn=counts['negatives'] - fp,
+    )
+
+
+def threshold_metrics(
+    confusion: Dict[str, np.ndarray],
+    beta: float = 1.0,
+    utility_weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Precision, recall, F-beta and cost-weighted utility from confusion counts.
+
+    Undefined ratios (no predicted positives, no actual positives) are 0, like sklearn's
+    zero_division=0.
+
+    Args:
+        confusion: Dictionary with tp, fp, fn and tn arrays (e.g. from counts_at)
+        beta: Weight of recall relative to precision in F-beta
+        utility_weights: Value of each of tp, fp, fn and tn; missing cells count 0
+
+    Returns:
+        The confusion dictionary extended with precision, recall, f_beta and utility arrays
+    """
+    weights = dict(DEFAULT_UTILITY_WEIGHTS if utility_weights is None else utility_weights)
+    tp, fp, fn, tn = (np.asarray(confusion[cell], dtype=np.float64) for cell in ('tp', 'fp', 'fn', 'tn'))
+    beta2 = beta * beta
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        denominator = (1 + beta2) * tp + beta2 * fn + fp
+        f_beta = np.where(denominator > 0, (1 + beta2) * tp / denominator, 0.0)
+
+    utility = (
+        weights.get('tp', 0.0) * tp
+        + weights.get('fp', 0.0) * fp
+        + weights.get('fn', 0.0) * fn
+        + weights.get('tn', 0.0) * tn
+    )
+
+    return dict(confusion, precision=precision, recall=recall, f_beta=f_beta, utility=utility)
+
+
+def optimal_threshold(metrics: Dict[str, np.ndarray], objective: str = OBJECTIVE_F_BETA) -> Dict[str, float]:
+    """
+    Pick the threshold that maximizes an objective; ties go to the highest threshold.
+
+    Args:
+        metrics: Output of threshold_metrics
+        objective: 'f_beta' or 'utility'
+
+    Returns:
+        Dictionary with the threshold and the counts and metrics at it
+    """
+    if objective not in (OBJECTIVE_F_BETA, OBJECTIVE_UTILITY):
+        raise ValueError(f"objective must be '{OBJECTIVE_F_BETA}' or '{OBJECTIVE_UTILITY}', got {objective!r}")
+    if not len(metrics['thresholds']):
+        raise ValueError('No thresholds to choose from')
+
+    order = np.argsort(-metrics['thresholds'], kind='stable')
+    best = order[np.argmax(metrics[objective][order])]
+    optimum = {name: float(values[best]) for name, values in metrics.items() if isinstance(values, np.ndarray)}
+    optimum['threshold'] = optimum.pop('thresholds')
+    return optimum
+
+
+def sweep_thresholds(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    thresholds: Optional[Sequence[float]] = None,
+    beta: float = 1.0,
+    utility_weights: Optional[Dict[str, float]] = None,
+    sample_weight: Optional[np.ndarray] = None,
+    counts: Optional[Dict[str, Any]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Confusion counts and metrics at many thresholds in O(n log n + k log n).
+
+    Args:
+        y_true: True labels
+        y_score: Predicted scores or probabilities of the positive class
+        thresholds: Thresholds to evaluate; every distinct score when None
+        beta: Weight of recall relative to precision in F-beta
+        utility_weights: Value of each of tp, fp, fn and tn
+        sample_weight: Optional per-sample weights
+        counts: Reuse the output of an earlier cumulative_counts call instead of sorting again
+
+    Returns:
+        Dictionary of arrays aligned with thresholds: tp, fp, fn, tn, precision, recall,
+        f_beta and utility
+    """
+    if counts is None:
+        counts = cumulative_counts(y_true, y_score, sample_weight=sample_weight)
+    return sweep_counts(counts, thresholds, beta=beta, utility_weights=utility_weights)
+
+
+def sweep_counts(
+    counts: Dict[str, Any],
+    thresholds: Optional[Sequence[float]] = None,
+    beta: float = 1.0,
+    utility_weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    sweep_thresholds over counts that are already sorted (cumulative_counts or a metrics artifact).
+    """
+    if thresholds is None:
+        thresholds = counts['thresholds']
+    return threshold_metrics(counts_at(counts, thresholds), beta=beta, utility_weights=utility_weights)
+
+
+def precision_recall_curve(counts: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    sklearn.metrics.precision_recall_curve from already sorted counts, without another sort.
+
+    Args:
+        counts: Output of cumulative_counts
+
+    Returns:
+        Dictionary with precision, recall and thresholds in sklearn's order (increasing
+        thresholds, with a final precision 1 / recall 0 point that has no threshold)
+    """
+    tp = counts['tp'].astype(np.float64)
+    predicted = tp + counts['fp']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, tp / np.where(predicted > 0, predicted, 1), 1.0)
+        recall = tp / counts['positives'] if counts['positives'] else np.ones_like(tp)
+
+    return dict(
+        precision=np.r_[precision[::-1], 1.0],
+        recall=np.r_[recall[::-1], 0.0],
+        thresholds=counts['thresholds'][::-1],
+    )
@@ -0,0 +1,236 @@
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+TERMINAL_STATUSES = (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED)
+
+
+class MageTriggerBackend:
+    """
+    Trigger API backed by Mage: submits with trigger_pipeline and reads the status of
+    every outstanding run with a single query.
+    """
+
+    def submit(self, pipeline_uuid: str, variables: Dict[str, Any]) -> int:
+        from mage_ai.orchestration.triggers.api import trigger_pipeline
+
+        pipeline_run = trigger_pipeline(
+            pipeline_uuid,
+            variables=variables,
+            check_status=False,
+            error_on_failure=False,
+            verbose=False,
+        )
+        return pipeline_run.id
+
+    def statuses(self, run_ids: Iterable[int]) -> Dict[int, str]:
+        from mage_ai.orchestration.db import db_connection
+        from mage_ai.orchestration.db.models.schedules import PipelineRun
+
+        run_ids = list(run_ids)
+        if not run_ids:
+            return {}
+
+        # The scoped session outlives every poll; without expiring it the identity map keeps
+        # serving the first status it saw. Selecting columns also bypasses cached instances.
+        session = db_connection.session
+        session.expire_all()
+        rows = session.query(PipelineRun.id, PipelineRun.status).filter(PipelineRun.id.in_(run_ids)).all()
+        return {run_id: _status_value(status) for run_id, status in rows}
+
+
+class StubTriggerBackend:
+    """
+    In-process stand-in for the trigger API: every run finishes after a fixed duration.
+
+    Args:
+        duration: Seconds a run takes, or a callable variables -> seconds
+        fail: Optional callable variables -> bool deciding whether a run fails
+        clock: Time source, shared with the scheduler under test
+    """
+
+    def __init__(
+        self,
+        duration: Any = 1.0,
+        fail: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.duration = duration
+        self.fail = fail
+        self.clock = clock
+        self.runs: Dict[int, Dict[str, Any]] = {}
+        self.status_calls = 0
+        self.max_running = 0
+
+    def submit(self, pipeline_uuid: str, variables: Dict[str, Any]) -> int:
+        duration = self.duration(variables) if callable(self.duration) else self.duration
+        run_id = len(self.runs) + 1
+        self.runs[run_id] = dict(
+            pipeline_uuid=pipeline_uuid,
+            variables=variables,
+            finishes_at=self.clock() + duration,
+            failed=bool(self.fail and self.fail(variables)),
+        )
+        self.max_running = max(self.max_running, self._running())
+        return run_id
+
+    def statuses(self, run_ids: Iterable[int]) -> Dict[int, str]:
+        self.status_calls += 1
+        now = self.clock()
+        statuses = {}
+        for run_id in run_ids:
+            run = self.runs[run_id]
+            if now < run['finishes_at']:
+                statuses[run_id] = 'running'
+            else:
+                statuses[run_id] = STATUS_FAILED if run['failed'] else STATUS_COMPLETED
+        return statuses
+
+    def _running(self) -> int:
+        now = self.clock()
+        return sum(1 for run in self.runs.values() if now < run['finishes_at'])
+
+
+class TriggerScheduler:
+    """
+    Trigger runs of one pipeline with a cap on concurrent runs.
+
+    Requests beyond max_concurrent wait in a FIFO queue. Outstanding runs are polled together
+    with one batched status call per poll_interval, and a queued request is submitted as soon
+    as a slot frees up.
+
+    Args:
+        pipeline_uuid: Pipeline to trigger
+        backend: Object with submit(pipeline_uuid, variables) -> run_id and
+            statuses(run_ids) -> {run_id: status}; defaults to MageTriggerBackend
+        max_concurrent: Maximum runs in flight at once
+        poll_interval: Seconds between batched status checks
+        poll_timeout: Optional seconds after which run() raises TimeoutError
+        clock: Time source
+        sleep: Sleep function (swap for a fake clock's advance in tests)
+    """
+
+    def __init__(
+        self,
+        pipeline_uuid: str,
+        backend: Any = None,
+        max_concurrent: int = 4,
+        poll_interval: float = 5,
+        poll_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        verbose: bool = True,
+    ):
+        self.pipeline_uuid = pipeline_uuid
+        self.backend = backend or MageTriggerBackend()
+        self.max_concurrent = max(1, max_concurrent)
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.verbose = verbose
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._in_flight: Dict[int, Dict[str, Any]] = {}
+        self._finished: List[Dict[str, Any]] = []
+        self._max_queue_depth = 0
+        self._status_checks = 0
+        self._started_at: Optional[float] = None
+
+    def enqueue(self, variables: Optional[Dict[str, Any]] = None) -> None:
+        self._queue.append(dict(variables=variables or {}, queued_at=self.clock()))
+        self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+
+    def enqueue_many(self, variables_list: Iterable[Dict[str, Any]]) -> None:
+        for variables in variables_list:
+            self.enqueue(variables)
+
+    def run(self) -> List[Dict[str, Any]]:
+        """
+        Drain the queue and wait for every submitted run to finish.
+
+        Returns:
+            One record per run: variables, run_id, status, queue_seconds, run_seconds
+        """
+        self._started_at = self.clock()
+        self._fill_slots()
+
+        while self._in_flight:
+            if self.poll_timeout is not None and self.clock() - self._started_at > self.poll_timeout:
+                raise TimeoutError(
+                    f'{len(self._in_flight)} run(s) of {self.pipeline_uuid} still in flight '
+                    f'after {self.poll_timeout} seconds',
+                )
+
+            self.sleep(self.poll_interval)
+            self._poll()
+            self._fill_slots()
+
+            if self.verbose:
+                metrics = self.metrics()
+                print(
+                    f'{self.pipeline_uuid}: {metrics["in_flight"]} running, {metrics["queue_depth"]} queued, '
+                    f'{metrics["completed"]} completed, {metrics["failed"]} failed',
+                )
+
+        return list(self._finished)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Queue depth, latency and throughput of the scheduler so far.
+        """
+        latencies = sorted(record['run_seconds'] for record in self._finished)
+        queue_waits = sorted(record['queue_seconds'] for record in self._finished)
+        elapsed = self.clock() - self._started_at if self._started_at is not None else 0.0
+
+        return dict(
+            queue_depth=len(self._queue),
+            max_queue_depth=self._max_queue_depth,
+            in_flight=len(self._in_flight),
+            completed=sum(1 for record in self._finished if record['status'] == STATUS_COMPLETED),
+            failed=sum(1 for record in self._finished if record['status'] != STATUS_COMPLETED),
+            status_checks=self._status_checks,
+            run_latency_p50=_percentile(latencies, 0.5),
+            run_latency_p95=_percentile(latencies, 0.95),
+            run_latency_max=latencies[-1] if latencies else None,
+            queue_wait_p50=_percentile(queue_waits, 0.5),
+            elapsed_seconds=elapsed,
+            throughput_per_minute=(60.0 * len(self._finished) / elapsed) if elapsed > 0 else None,
+        )
+
+    def _fill_slots(self) -> None:
+        while self._queue and len(self._in_flight) < self.max_concurrent:
+            job = self._queue.popleft()
+            job['submitted_at'] = self.clock()
+            run_id = self.backend.submit(self.pipeline_uuid, job['variables'])
+            self._in_flight[run_id] = job
+
+    def _poll(self) -> None:
+        self._status_checks += 1
+        statuses = self.backend.statuses(list(self._in_flight))
+        now = self.clock()
+
+        for run_id, status in statuses.items():
+            if status not in TERMINAL_STATUSES:
+                continue
+            job = self._in_flight.pop(run_id)
+            self._finished.append(dict(
+                variables=job['variables'],
+                run_id=run_id,
+                status=status,
+                queue_seconds=job['submitted_at'] - job['queued_at'],
+                run_seconds=now - job['submitted_at'],
+            ))
+
+
+def _status_value(status: Any) -> str:
+    return getattr(status, 'value', status)
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]